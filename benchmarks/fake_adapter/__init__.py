@@ -0,0 +1,26 @@
+"""A DBT adapter that accepts every query without a warehouse
+
+Queries are answered from memory after an optional delay, so benchmarks measure
+DBT and this library rather than a database. Call `install` before DBT loads
+adapters, then use `type: fake` in a profile.
+"""
+import os
+import sys
+
+from dbt.adapters.base import AdapterPlugin
+
+from benchmarks.fake_adapter.connections import FakeConnectionManager, FakeCredentials
+from benchmarks.fake_adapter.impl import FakeAdapter
+
+Plugin = AdapterPlugin(
+    adapter=FakeAdapter,
+    credentials=FakeCredentials,
+    include_path=os.path.join(os.path.dirname(__file__), "include"),
+)
+
+__all__ = ["FakeAdapter", "FakeConnectionManager", "FakeCredentials", "install"]
+
+
+def install():
+    """Makes the adapter loadable as DBT's `fake` plugin in this process"""
+    sys.modules.setdefault("dbt.adapters.fake", sys.modules[__name__])
@@ -0,0 +1,92 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Tuple
+
+from dbt.adapters.sql import SQLConnectionManager
+from dbt.contracts.connection import (
+    AdapterResponse,
+    Connection,
+    ConnectionState,
+    Credentials,
+)
+
+# Generic tests read one row of counts back from the warehouse
+TEST_COLUMNS = ("failures", "should_warn", "should_error")
+
+
+@dataclass
+class FakeCredentials(Credentials):
+    latency: float = 0.0
+
+    @property
+    def type(self) -> str:
+        return "fake"
+
+    @property
+    def unique_field(self) -> str:
+        return self.database
+
+    def _connection_keys(self) -> Tuple[str, ...]:
+        return ("database", "schema", "latency")
+
+
+class FakeCursor:
+    def __init__(self, latency: float):
+        """Cursor answering every statement after `latency` seconds"""
+        self.latency = latency
+        self.description: Optional[List[Tuple[str, ...]]] = None
+        self.rows: List[Tuple[Any, ...]] = []
+
+    def execute(self, sql: str, bindings: Any = None):
+        if self.latency:
+            time.sleep(self.latency)
+        if "dbt_internal_test" in sql:
+            self.description = [(column,) for column in TEST_COLUMNS]
+            self.rows = [(0, False, False)]
+        else:
+            self.description = None
+            self.rows = []
+
+    def fetchall(self) -> List[Tuple[Any, ...]]:
+        return self.rows
+
+
+class FakeHandle:
+    def __init__(self, latency: float):
+        """Connection handle producing `FakeCursor`s"""
+        self.latency = latency
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self.latency)
+
+    def close(self):
+        pass
+
+
+class FakeConnectionManager(SQLConnectionManager):
+    TYPE = "fake"
+
+    @classmethod
+    def open(cls, connection: Connection) -> Connection:
+        if connection.state != ConnectionState.OPEN:
+            connection.handle = FakeHandle(connection.credentials.latency)
+            connection.state = ConnectionState.OPEN
+        return connection
+
+    @contextmanager
+    def exception_handler(self, sql: str) -> Iterator[None]:
+        yield
+
+    def cancel(self, connection: Connection):
+        pass
+
+    @classmethod
+    def get_response(cls, cursor: Any) -> AdapterResponse:
+        return AdapterResponse(_message="OK", rows_affected=len(cursor.rows))
+
+    def begin(self):
+        pass  # No transactions to open or commit
+
+    def commit(self):
+        pass
@@ -0,0 +1,32 @@
+from typing import List
+
+from dbt.adapters.base.relation import BaseRelation
+from dbt.adapters.sql import SQLAdapter
+
+from benchmarks.fake_adapter.connections import FakeConnectionManager
+
+
+class FakeAdapter(SQLAdapter):
+    ConnectionManager = FakeConnectionManager
+
+    @classmethod
+    def date_function(cls) -> str:
+        return "now()"
+
+    @classmethod
+    def is_cancelable(cls) -> bool:
+        return False
+
+    def list_relations_without_caching(
+        self, schema_relation: BaseRelation
+    ) -> List[BaseRelation]:
+        return []  # Every run starts from an empty warehouse
+
+    def list_schemas(self, database: str) -> List[str]:
+        return []
+
+    def check_schema_exists(self, database: str, schema: str) -> bool:
+        return False
+
+    def get_columns_in_relation(self, relation: BaseRelation) -> list:
+        return []
@@ -0,0 +1,3 @@
+{% macro fake__current_timestamp() -%}
+  now()
+{%- endmacro %}
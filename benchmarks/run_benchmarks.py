@@ -0,0 +1,191 @@
+"""Measures this library's overhead on synthetic DBT projects
+
+Projects are generated with `synthetic_project.generate_project` and run against
+the fake adapter, so the figures are DBT plus the wrapper with no warehouse. For
+each project size this reports parse time (cold and with a `ManifestCache`), the
+latency of each `DbtActivities` step, peak memory and the end-to-end time of a
+`DbtRefreshWorkflow` on Temporal's local test server.
+
+    python -m benchmarks.run_benchmarks --models 100 1000 --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json --tolerance 0.2
+
+With `--baseline`, exits non-zero if any timing regressed by more than the
+tolerance.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fake_adapter import install
+from benchmarks.synthetic_project import generate_project
+
+install()  # Before DBT is first imported
+
+from temporal_dbt_python.activities import DbtActivities  # noqa: E402
+from temporal_dbt_python.dbt_wrapper import dbt_handler, peak_rss_mb  # noqa: E402
+from temporal_dbt_python.dto import OperationRequest  # noqa: E402
+from temporal_dbt_python.manifest_cache import ManifestCache  # noqa: E402
+
+ACTIVITY_STEPS = ("debug", "deps", "run", "test", "build")
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def _checked(results):
+    if results.exit_code != 0:
+        raise RuntimeError(results.log_string[-2000:])
+    return results
+
+
+def bench_parse(project: Path, repeat: int) -> Dict[str, float]:
+    """Cold parses, then a first and partial parse through a `ManifestCache`"""
+    timings = {}
+    timings["parse_cold_s"] = min(
+        _timed(
+            lambda: _checked(
+                dbt_handler("dev", str(project), ["parse"], str(project), True)
+            )
+        )
+        for _ in range(repeat)
+    )
+    manifest_cache = ManifestCache()
+
+    def cached_parse():
+        _checked(
+            dbt_handler(
+                "dev",
+                str(project),
+                ["parse"],
+                str(project),
+                True,
+                manifest_cache=manifest_cache,
+            )
+        )
+
+    timings["parse_cache_fill_s"] = _timed(cached_parse)
+    timings["parse_cached_s"] = min(_timed(cached_parse) for _ in range(repeat))
+    return timings
+
+
+def bench_activities(project: Path, repeat: int) -> Dict[str, float]:
+    """Latency of each activity step as the worker would run it"""
+    from temporalio.testing import ActivityEnvironment
+
+    activity_mgr = DbtActivities(project.parent)
+    request = OperationRequest("dev", project.name, project.name)
+    timings = {}
+    for step in ACTIVITY_STEPS:
+        method = getattr(activity_mgr, step)
+        timings[f"activity_{step}_s"] = min(
+            _timed(lambda: asyncio.run(ActivityEnvironment().run(method, request)))
+            for _ in range(repeat)
+        )
+    return timings
+
+
+async def _run_workflow(project: Path) -> float:
+    from temporalio.testing import WorkflowEnvironment
+
+    from temporal_dbt_python.workers import create_worker
+    from temporal_dbt_python.workflow import DbtRefreshWorkflow
+
+    activity_mgr = DbtActivities(project.parent)
+    refresh = DbtRefreshWorkflow.configure(1, 3600, activity_mgr)
+    queue = f"benchmark-{uuid.uuid4().hex}"
+    async with await WorkflowEnvironment.start_local() as env:
+        worker = create_worker(env.client, activity_mgr, queue, workflows=[refresh])
+        async with worker:
+            started = time.perf_counter()
+            await env.client.execute_workflow(
+                refresh.run,
+                OperationRequest("dev", project.name, project.name),
+                id=queue,
+                task_queue=queue,
+            )
+            return time.perf_counter() - started
+
+
+def bench_project(args: argparse.Namespace, models: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        started = time.perf_counter()
+        project = generate_project(
+            str(Path(tmp_dir, "synthetic")),
+            models=models,
+            width=args.width,
+            depth=args.depth,
+            fan_in=args.fan_in,
+            threads=args.threads,
+            latency=args.latency,
+        )
+        result: Dict[str, Any] = {
+            "models": models,
+            "generate_s": time.perf_counter() - started,
+        }
+        result.update(bench_parse(project, args.repeat))
+        result.update(bench_activities(project, args.repeat))
+        if not args.no_workflow:
+            result["workflow_s"] = asyncio.run(_run_workflow(project))
+        result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def regressions(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float
+) -> List[str]:
+    """Timings more than `tolerance` slower than the baseline's for the same size"""
+    previous = {entry["models"]: entry for entry in baseline}
+    slower = []
+    for result in results:
+        for metric, value in result.items():
+            before = previous.get(result["models"], {}).get(metric)
+            if metric.endswith("_s") and before and value > before * (1 + tolerance):
+                slower.append(
+                    f"{result['models']} models {metric}: {before:.2f}s -> {value:.2f}s"
+                )
+    return slower
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--width", type=int, default=None)
+    parser.add_argument("--depth", type=int, default=None)
+    parser.add_argument("--fan-in", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-workflow", action="store_true")
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--baseline", type=str, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = []
+    for models in args.models:
+        result = bench_project(args, models)
+        print(" ".join(f"{key}={value:g}" for key, value in result.items()))
+        results.append(result)
+
+    if args.output is not None:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    if args.baseline is not None:
+        baseline = json.loads(Path(args.baseline).read_text())
+        slower = regressions(results, baseline, args.tolerance)
+        for line in slower:
+            print(f"REGRESSION {line}")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import math
+from pathlib import Path
+from typing import Optional
+
+PROFILE_NAME = "benchmark"
+
+
+def model_name(layer: int, index: int) -> str:
+    return f"m_{layer:03d}_{index:04d}"
+
+
+def generate_project(
+    path: str,
+    models: int = 100,
+    width: Optional[int] = None,
+    depth: Optional[int] = None,
+    fan_in: int = 2,
+    tests: bool = True,
+    threads: int = 4,
+    latency: float = 0.0,
+) -> Path:
+    """generate_project Writes a DBT project of layered models for benchmarking
+
+    Models are laid out in `depth` layers of `width`. Each model outside the first
+    layer selects from `fan_in` models of the layer before, so the DAG's critical
+    path is `depth` models long. `profiles.yml` is written alongside, for the fake
+    adapter, with target "dev".
+
+    :param path: Directory to create the project in
+    :type path: str
+    :param models: Number of models, defaults to 100
+    :type models: int, optional
+    :param width: Models per layer, defaults to None for 10, or from `depth`
+    :type width: Optional[int], optional
+    :param depth: Number of layers, defaults to None for whatever `width` needs
+    :type depth: Optional[int], optional
+    :param fan_in: Parents of each model outside the first layer, defaults to 2
+    :type fan_in: int, optional
+    :param tests: Add a `not_null` test to every model, defaults to True
+    :type tests: bool, optional
+    :param threads: Threads in the profile, defaults to 4
+    :type threads: int, optional
+    :param latency: Seconds the fake warehouse takes per query, defaults to 0.0
+    :type latency: float, optional
+    :return: The project directory, also usable as the profiles directory
+    :rtype: Path
+    """
+    if width is None:
+        width = math.ceil(models / depth) if depth else 10
+    project = Path(path)
+    (project / "models").mkdir(parents=True, exist_ok=True)
+    (project / "dbt_project.yml").write_text(
+        "config-version: 2\n"
+        "name: synthetic\n"
+        'version: "1.0"\n'
+        f"profile: {PROFILE_NAME}\n"
+        "models:\n"
+        "  synthetic:\n"
+        "    +materialized: view\n"
+    )
+    (project / "profiles.yml").write_text(
+        f"{PROFILE_NAME}:\n"
+        "  target: dev\n"
+        "  outputs:\n"
+        "    dev:\n"
+        "      type: fake\n"
+        "      database: benchmark\n"
+        "      schema: synthetic\n"
+        f"      threads: {threads}\n"
+        f"      latency: {latency}\n"
+    )
+
+    schema = ["version: 2", "models:"]
+    previous = 0
+    for layer in range(math.ceil(models / width)):
+        layer_dir = project / "models" / f"layer_{layer:03d}"
+        layer_dir.mkdir(exist_ok=True)
+        size = min(width, models - layer * width)
+        for index in range(size):
+            name = model_name(layer, index)
+            if layer == 0:
+                sql = f"select {index} as id\n"
+            else:
+                parents = sorted({(index + 7 * n) % previous for n in range(fan_in)})
+                sql = "\nunion all\n".join(
+                    f"select id from {{{{ ref('{model_name(layer - 1, parent)}') }}}}"
+                    for parent in parents
+                )
+            (layer_dir / f"{name}.sql").write_text(sql + "\n")
+            if tests:
+                schema.append(f"  - name: {name}")
+                schema.append("    columns: [{name: id, tests: [not_null]}]")
+        previous = size
+    if tests:
+        (project / "models" / "schema.yml").write_text("\n".join(schema) + "\n")
+    return project
@@ -1,13 +1,52 @@
+import asyncio
+import contextvars
+import functools
+import json
 import logging
-import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
-from typing import Awaitable, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
 
 from temporalio import activity
 
-from temporal_dbt_python.dbt_wrapper import DbtResults, dbt_handler
-from temporal_dbt_python.dto import OperationRequest
-from temporal_dbt_python.exceptions import WorkflowExecutionError
+from temporal_dbt_python.artifacts import CompressedArtifact
+from temporal_dbt_python.concurrency import WarehouseSlots, project_key, warehouse_key
+from temporal_dbt_python.dag import (
+    node_selectors,
+    plan_shards,
+    predict_makespan,
+    stage_selectors,
+    summarise_run_results,
+)
+from temporal_dbt_python.dbt_wrapper import (
+    DbtResults,
+    dbt_handler,
+    probe_connection,
+    profile_threads,
+)
+from temporal_dbt_python.debug_cache import DebugCache, debug_cache_key
+from temporal_dbt_python.dto import (
+    ActivityMetrics,
+    FreshnessReport,
+    OperationRequest,
+    RunSummary,
+    ShardPlan,
+)
+from temporal_dbt_python.exceptions import PartialRunError, WorkflowExecutionError
+from temporal_dbt_python.freshness import FreshnessStore, fresh_sources
+from temporal_dbt_python.history import DurationHistory
+from temporal_dbt_python.log_sink import log_tail
+from temporal_dbt_python.manifest_cache import ManifestCache, project_target_path
+from temporal_dbt_python.metrics import MetricsSink, node_metrics
+from temporal_dbt_python.package_cache import PackageCache, package_cache_key
+from temporal_dbt_python.process_pool import DbtProcessPool
+from temporal_dbt_python.result_cache import ResultCache, node_fingerprints
+from temporal_dbt_python.state import STATE_SELECTORS, StateStore
+from temporal_dbt_python.thread_policy import ThreadPolicy
+
+SUCCESS_STATUSES = frozenset({"success", "pass", "warn"})
+# Commands whose `run_results` describe executed nodes
+NODE_RESULT_COMMANDS = frozenset({"build", "run", "seed", "snapshot", "test"})
 
 
 def log_start_activity(env: str, step: str, project_location: str) -> str:
@@ -47,9 +86,10 @@ def parse_output(
     """
     completion_success = True
     if results.exit_code != 0:
-        logging.error(results.log_string)
+        tail = log_tail(results.log_string)
+        logging.error(tail)
         raise WorkflowExecutionError(
-            f"Error occured in {identifier} with code {results.exit_code}"
+            f"Error occured in {identifier} with code {results.exit_code}:\n" + tail
         )
     if store_output_callback is not None:
         completion_success = store_output_callback(identifier, results.outputs)
@@ -57,12 +97,220 @@ def parse_output(
     return completion_success
 
 
+def selection_flags(
+    select: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    state_location: Optional[str] = None,
+) -> List[str]:
+    """selection_flags Converts node selection lists into DBT command line flags
+
+    :param select: DBT node selectors to include, defaults to None
+    :type select: Optional[List[str]], optional
+    :param exclude: DBT node selectors to skip, defaults to None
+    :type exclude: Optional[List[str]], optional
+    :param state_location: Saved state to compare against. Narrows the selection to
+        modified nodes and their children, deferring everything else to the state.
+        Defaults to None
+    :type state_location: Optional[str], optional
+    :return: Flags to append to the DBT command
+    :rtype: List[str]
+    """
+    flags = []
+    if state_location is not None:
+        state_selector = STATE_SELECTORS["slim"]
+        select = [f"{s},{state_selector}" for s in select or []] or [state_selector]
+    if select:
+        flags.extend(["--select"] + list(select))
+    if exclude:
+        flags.extend(["--exclude"] + list(exclude))
+    if state_location is not None:
+        flags.extend(["--defer", "--state", state_location])
+    return flags
+
+
+def store_state_output(
+    state_store: StateStore,
+    project_location: str,
+    env: str,
+    run_id: Optional[str],
+    store_output_callback: Optional[Callable[[str, Dict], bool]],
+    identifier: str,
+    outputs: Dict[str, Any],
+) -> bool:
+    """store_state_output Output callback saving a successful run's manifest
+
+    Bind the leading arguments with `functools.partial`, the remainder match
+    `store_output_callback`, which is called afterwards if given.
+
+    :return: Result of the wrapped callback, or True if there is none
+    :rtype: bool
+    """
+    manifest = outputs.get("manifest")
+    if not isinstance(manifest, CompressedArtifact):  # Streamed rather than parsed
+        manifest = load_artifact(outputs, project_location, "manifest")
+    if manifest is not None:
+        state_store.save(project_location, env, manifest, run_id)
+    if store_output_callback is None:
+        return True
+    return store_output_callback(identifier, outputs)
+
+
+def load_artifact(
+    outputs: Dict[str, Any],
+    project_location: str,
+    name: str,
+    sections: Optional[Sequence[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """load_artifact Fetches a DBT artifact from captured outputs or the target dir
+
+    :param outputs: Artifacts captured by `dbt_handler`
+    :type outputs: Dict[str, Any]
+    :param project_location: Filepath to the DBT project
+    :type project_location: str
+    :param name: Artifact name without extension, e.g. "run_results"
+    :type name: str
+    :param sections: Top-level keys needed, compressed artifacts only parse these.
+        Defaults to None for the whole artifact
+    :type sections: Optional[Sequence[str]], optional
+    :return: The parsed artifact, or None if DBT didn't produce it
+    :rtype: Optional[Dict[str, Any]]
+    """
+    if name in outputs:
+        artifact = outputs[name]
+        if isinstance(artifact, CompressedArtifact):
+            return artifact.load(sections)
+        return json.loads(artifact) if isinstance(artifact, (str, bytes)) else artifact
+
+    artifact_file = Path(project_target_path(project_location), f"{name}.json")
+    if not artifact_file.exists():
+        return None
+    with open(artifact_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def merge_retry_results(
+    outputs: Dict[str, Any],
+    project_location: str,
+    completed: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """merge_retry_results Folds earlier attempts' successes into `run_results`
+
+    The merged artifact replaces `run_results` in the outputs, so callbacks see
+    the outcome of the whole run rather than the final attempt only.
+
+    :param outputs: Artifacts captured by `dbt_handler`
+    :type outputs: Dict[str, Any]
+    :param project_location: Filepath to the DBT project
+    :type project_location: str
+    :param completed: `run_results` entries of nodes built by earlier attempts
+    :type completed: List[Dict[str, Any]]
+    :return: `run_results` entries of every node built so far
+    :rtype: List[Dict[str, Any]]
+    """
+    run_results = load_artifact(outputs, project_location, "run_results")
+    if run_results is None:
+        return completed
+    if completed:
+        run_results["results"] = completed + run_results.get("results", [])
+        merged: Any = json.dumps(run_results)
+        captured = outputs.get("run_results")
+        if isinstance(captured, CompressedArtifact):
+            merged = CompressedArtifact.from_contents(merged, captured.codec)
+        outputs["run_results"] = merged
+    return [r for r in run_results["results"] if r["status"] in SUCCESS_STATUSES]
+
+
+def parse_manifest(
+    env: str,
+    project_location: str,
+    profile_location: Optional[str] = None,
+    activity_name: str = "dbt_parse",
+    sections: Sequence[str] = ("nodes",),
+    **handler_kwargs: Any,
+) -> Dict[str, Any]:
+    """parse_manifest Parses the project without writing to its target directory
+
+    :param env: Denotes target environment to execute transform against
+    :type env: str
+    :param project_location: Filepath to the DBT project
+    :type project_location: str
+    :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
+    :type profile_location: Optional[str], optional
+    :param activity_name: Name the parse is logged under, defaults to "dbt_parse"
+    :type activity_name: str, optional
+    :param sections: Top-level manifest keys needed, defaults to ("nodes",)
+    :type sections: Sequence[str], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
+    :raises WorkflowExecutionError: If DBT failed or produced no manifest
+    :return: DBT's `manifest` artifact
+    :rtype: Dict[str, Any]
+    """
+    identifier = log_start_activity(env, activity_name, project_location)
+    results = dbt_handler(
+        env,
+        project_location,
+        ["parse", "--write-manifest"],
+        profile_location,
+        prevent_writes=True,
+        **handler_kwargs,
+    )
+    parse_output(identifier, results, None)
+    manifest = load_artifact(results.outputs, project_location, "manifest", sections)
+    if manifest is None:
+        raise WorkflowExecutionError(f"No manifest produced by {identifier}")
+    return manifest
+
+
+def build_phases(
+    run_results: Dict[str, Any],
+    manifest: Optional[Dict[str, Any]] = None,
+    staging_name: str = "staging",
+) -> Dict[str, bool]:
+    """build_phases Maps `dbt build` results onto the refresh workflow's steps
+
+    Tests defined under the staging directory count towards `test_source`, other
+    tests towards `test`, and every other node towards `run`.
+
+    :param run_results: DBT's `run_results` artifact
+    :type run_results: Dict[str, Any]
+    :param manifest: DBT's `manifest` artifact, used to locate tests, defaults to
+        None which treats all tests as `test`
+    :type manifest: Optional[Dict[str, Any]], optional
+    :param staging_name: Which model the staging systems lie under, defaults to
+        "staging"
+    :type staging_name: str, optional
+    :return: Success of each phase, in workflow order
+    :rtype: Dict[str, bool]
+    """
+    nodes = {} if manifest is None else manifest.get("nodes", {})
+    phases = {"test_source": True, "run": True, "test": True}
+    for result in run_results.get("results", []):
+        unique_id = result["unique_id"]
+        if unique_id.startswith("test."):
+            fqn = nodes.get(unique_id, {}).get("fqn", [])
+            phase = "test_source" if staging_name in fqn else "test"
+        else:
+            phase = "run"
+        if result["status"] in ("error", "fail"):
+            phases[phase] = False
+    return phases
+
+
 def dbt_run(
     env: str,
     project_location: str,
     profile_location: Optional[str] = None,
     prevent_writes: bool = False,
     store_output_callback: Optional[Callable[[str, Dict], bool]] = None,
+    select: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    state_location: Optional[str] = None,
+    completed: Optional[List[str]] = None,
+    full_refresh: bool = False,
+    result_cache: Optional[ResultCache] = None,
+    source_loaded_at: Optional[Dict[str, str]] = None,
+    **handler_kwargs: Any,
 ) -> bool:
     """dbt_run Implements `dbt run` for conversion to activity
 
@@ -78,19 +326,101 @@ def dbt_run(
     :param store_output_callback: Allows export of DBT artifacts to external sources,
         defaults to None
     :type store_output_callback: Optional[Callable], optional
+    :param select: DBT node selectors to run, defaults to None running everything
+    :type select: Optional[List[str]], optional
+    :param exclude: DBT node selectors to skip, defaults to None
+    :type exclude: Optional[List[str]], optional
+    :param state_location: Saved state for a slim run of modified nodes only,
+        defaults to None
+    :type state_location: Optional[str], optional
+    :param completed: Unique ids of nodes built by an earlier attempt, these are
+        excluded. Their `run_results` entries are merged into the results if the
+        attempt left them in the target dir. Defaults to None
+    :type completed: Optional[List[str]], optional
+    :param full_refresh: Rebuild incremental models from scratch, also
+        invalidating the result cache. Defaults to False
+    :type full_refresh: bool, optional
+    :param result_cache: Fingerprints of previously built nodes, nodes whose
+        inputs are unchanged since are skipped. Defaults to None
+    :type result_cache: Optional[ResultCache], optional
+    :param source_loaded_at: `max_loaded_at` of each source from this refresh's
+        freshness check, sources are fingerprinted by these rather than a
+        `sources.json` of unknown age. Models reading other sources aren't skipped.
+        Defaults to None
+    :type source_loaded_at: Optional[Dict[str, str]], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
+    :raises PartialRunError: If the run failed, carrying the nodes built so far
     :return: Returns a true value denoting the success of the run
     :rtype: bool
     """
+    completed = list(dict.fromkeys(completed or []))
+    skipped = list(completed)
+    earlier: List[Dict[str, Any]] = []
+    if completed:
+        previous = load_artifact({}, project_location, "run_results", ["results"])
+        earlier = [
+            result
+            for result in (previous or {}).get("results", [])
+            if result["unique_id"] in completed
+        ]
+
+    # Parses aren't runs worth recording
+    parse_kwargs = {k: v for k, v in handler_kwargs.items() if k != "results_callback"}
+    manifest: Optional[Dict[str, Any]] = None
+    fingerprints: Dict[str, Optional[str]] = {}
+    cache_key = project_key(project_location, env)
+    if result_cache is not None:
+        manifest = parse_manifest(
+            env,
+            project_location,
+            profile_location,
+            "dbt_fingerprint",
+            ["nodes", "sources", "macros"],
+            **parse_kwargs,
+        )
+        freshness = {
+            "results": [
+                {"unique_id": unique_id, "max_loaded_at": loaded_at}
+                for unique_id, loaded_at in (source_loaded_at or {}).items()
+            ]
+        }
+        fingerprints = node_fingerprints(manifest, freshness)
+        if full_refresh:
+            result_cache.invalidate(cache_key)
+        else:
+            unchanged = result_cache.unchanged(cache_key, fingerprints)
+            logging.info(f"Skipping {len(unchanged)} nodes with unchanged inputs")
+            skipped.extend(unchanged)
+    if skipped:
+        if manifest is None:
+            manifest = parse_manifest(
+                env, project_location, profile_location, **parse_kwargs
+            )
+        # A bare name would also exclude models under a same-named directory
+        nodes = manifest["nodes"]
+        skipped = [uid for uid in dict.fromkeys(skipped) if uid in nodes]
+        exclude = list(exclude or []) + node_selectors(manifest, skipped)
 
     identifier = log_start_activity(env, "dbt_run", project_location)
     results = dbt_handler(
         env,
         project_location,
-        ["run", "--fail-fast"],
+        ["run", "--fail-fast"]
+        + (["--full-refresh"] if full_refresh else [])
+        + selection_flags(select, exclude, state_location),
         profile_location,
         prevent_writes=prevent_writes,
+        **handler_kwargs,
     )
-    return parse_output(identifier, results, store_output_callback)
+    built = merge_retry_results(results.outputs, project_location, earlier)
+    if result_cache is not None:
+        result_cache.record(cache_key, fingerprints, built)
+    try:
+        return parse_output(identifier, results, store_output_callback)
+    except WorkflowExecutionError as e:
+        completed.extend(result["unique_id"] for result in built)
+        raise PartialRunError(str(e), list(dict.fromkeys(completed))) from e
 
 
 def dbt_docs_generate(
@@ -99,6 +429,7 @@ def dbt_docs_generate(
     profile_location: Optional[str] = None,
     prevent_writes: bool = False,
     store_output_callback: Optional[Callable[[str, Dict], bool]] = None,
+    **handler_kwargs: Any,
 ) -> bool:
     """dbt_run Implements `dbt docs generate` for conversion to activity
 
@@ -114,6 +445,8 @@ def dbt_docs_generate(
     :param store_output_callback: Allows export of DBT artifacts to external sources,
         defaults to None
     :type store_output_callback: Optional[Callable], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
     :return: Returns a true value denoting the success of the run
     :rtype: bool
     """
@@ -125,12 +458,18 @@ def dbt_docs_generate(
         ["docs", "generate"],
         profile_location,
         prevent_writes=prevent_writes,
+        **handler_kwargs,
     )
     return parse_output(identifier, results, store_output_callback)
 
 
 def dbt_debug(
-    env: str, project_location: str, profile_location: Optional[str] = None
+    env: str,
+    project_location: str,
+    profile_location: Optional[str] = None,
+    debug_cache: Optional[DebugCache] = None,
+    connection_only: bool = False,
+    **handler_kwargs: Any,
 ) -> bool:
     """dbt_run Implements `dbt debug` for conversion to activity
 
@@ -140,23 +479,53 @@ def dbt_debug(
     :type project_location: str
     :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
     :type profile_location: Optional[str], optional
+    :param debug_cache: Recent successful checks, which are skipped, defaults to
+        None
+    :type debug_cache: Optional[DebugCache], optional
+    :param connection_only: Only open a connection to the target, without loading
+        the project or running DBT, defaults to False
+    :type connection_only: bool, optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
+    :raises WorkflowExecutionError: If the check failed
     :return: Returns a true value denoting the success of the run
     :rtype: bool
     """
 
     identifier = log_start_activity(env, "dbt_debug", project_location)
-    results = dbt_handler(
-        env,
-        project_location,
-        ["debug"],
-        profile_location,
-        prevent_writes=False,
-    )
-    return parse_output(identifier, results, None)
+    cache_key = None
+    if debug_cache is not None:
+        cache_key = debug_cache_key(env, project_location, profile_location)
+        if debug_cache.passed(cache_key):
+            logging.info(f"Activity {identifier} passed recently, skipping check")
+            return True
+
+    if connection_only:
+        error = probe_connection(env, project_location, profile_location)
+        if error is not None:
+            raise WorkflowExecutionError(f"Error occured in {identifier}:\n{error}")
+        logging.info(f"Activity {identifier} completed successfully")
+    else:
+        results = dbt_handler(
+            env,
+            project_location,
+            ["debug"],
+            profile_location,
+            prevent_writes=False,
+            **handler_kwargs,
+        )
+        parse_output(identifier, results, None)
+
+    if debug_cache is not None and cache_key is not None:
+        debug_cache.record(cache_key)
+    return True
 
 
 def dbt_clean(
-    env: str, project_location: str, profile_location: Optional[str] = None
+    env: str,
+    project_location: str,
+    profile_location: Optional[str] = None,
+    **handler_kwargs: Any,
 ) -> bool:
     """dbt_run Implements `dbt clean` for conversion to activity
 
@@ -166,6 +535,8 @@ def dbt_clean(
     :type project_location: str
     :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
     :type profile_location: Optional[str], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
     :return: Returns a true value denoting the success of the run
     :rtype: bool
     """
@@ -177,12 +548,17 @@ def dbt_clean(
         ["clean"],
         profile_location,
         prevent_writes=False,
+        **handler_kwargs,
     )
     return parse_output(identifier, results, None)
 
 
 def dbt_deps(
-    env: str, project_location: str, profile_location: Optional[str] = None
+    env: str,
+    project_location: str,
+    profile_location: Optional[str] = None,
+    package_cache: Optional[PackageCache] = None,
+    **handler_kwargs: Any,
 ) -> bool:
     """dbt_run Implements `dbt deps` for conversion to activity
 
@@ -192,19 +568,35 @@ def dbt_deps(
     :type project_location: str
     :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
     :type profile_location: Optional[str], optional
+    :param package_cache: Local store of installed packages, used instead of
+        `dbt deps` when the package specification is unchanged, defaults to None
+    :type package_cache: Optional[PackageCache], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
     :return: Returns a true value denoting the success of the run
     :rtype: bool
     """
 
     identifier = log_start_activity(env, "dbt_deps", project_location)
+    cache_key = None
+    if package_cache is not None:
+        cache_key = package_cache_key(project_location)
+        if cache_key is not None and package_cache.install(project_location, cache_key):
+            logging.info(f"Activity {identifier} satisfied from the package cache")
+            return True
+
     results = dbt_handler(
         env,
         project_location,
         ["deps"],
         profile_location,
         prevent_writes=False,
+        **handler_kwargs,
     )
-    return parse_output(identifier, results, None)
+    completion_success = parse_output(identifier, results, None)
+    if package_cache is not None and cache_key is not None:
+        package_cache.store(project_location, cache_key)
+    return completion_success
 
 
 def dbt_test(
@@ -213,6 +605,10 @@ def dbt_test(
     profile_location: Optional[str] = None,
     staging_only: bool = False,
     staging_name: str = "staging",
+    select: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    state_location: Optional[str] = None,
+    **handler_kwargs: Any,
 ) -> bool:
     """dbt_run Implements `dbt deps` for conversion to activity
 
@@ -226,10 +622,21 @@ def dbt_test(
     :type project_location: str
     :param project_location: Which model the staging systems lie under
     :type project_location: str
+    :param select: DBT node selectors to test, defaults to None running everything
+    :type select: Optional[List[str]], optional
+    :param exclude: DBT node selectors to skip, defaults to None
+    :type exclude: Optional[List[str]], optional
+    :param state_location: Saved state for a slim run of modified nodes only,
+        defaults to None
+    :type state_location: Optional[str], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
     :return: Returns a true value denoting the success of the run
     :rtype: bool
     """
-    additional_flags = ["--select", staging_name] if staging_only else []
+    additional_flags = selection_flags(
+        [staging_name] if staging_only else select, exclude, state_location
+    )
 
     identifier = log_start_activity(env, "dbt_test", project_location)
     results = dbt_handler(
@@ -238,10 +645,293 @@ def dbt_test(
         ["test"] + additional_flags,
         profile_location,
         prevent_writes=False,
+        **handler_kwargs,
     )
     return parse_output(identifier, results, None)
 
 
+def dbt_source_freshness(
+    env: str,
+    project_location: str,
+    profile_location: Optional[str] = None,
+    prevent_writes: bool = False,
+    store_output_callback: Optional[Callable[[str, Dict], bool]] = None,
+    freshness_store: Optional[FreshnessStore] = None,
+    **handler_kwargs: Any,
+) -> FreshnessReport:
+    """dbt_source_freshness Implements `dbt source freshness` for conversion to activity
+
+    Stale sources don't fail the activity, they are left out of the report's fresh
+    sources for the workflow to decide on.
+
+    :param env: Denotes target environment to execute transform against
+    :type env: str
+    :param project_location: Relative filepath to the DBT project
+    :type project_location: str
+    :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
+    :type profile_location: Optional[str], optional
+    :param prevent_writes: Boolean to disable writing to file, prevents memory use,
+        defaults to False
+    :type prevent_writes: bool, optional
+    :param store_output_callback: Allows export of DBT artifacts to external sources,
+        defaults to None
+    :type store_output_callback: Optional[Callable], optional
+    :param freshness_store: Source load times as of the last refresh. Sources count
+        as fresh when loaded since, rather than when within DBT's thresholds.
+        Defaults to None
+    :type freshness_store: Optional[FreshnessStore], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
+    :raises WorkflowExecutionError: If DBT failed without checking any sources
+    :return: Fresh sources, None if no source has freshness configured
+    :rtype: FreshnessReport
+    """
+
+    identifier = log_start_activity(env, "dbt_source_freshness", project_location)
+    results = dbt_handler(
+        env,
+        project_location,
+        ["source", "freshness"],
+        profile_location,
+        prevent_writes=prevent_writes,
+        **handler_kwargs,
+    )
+    freshness = load_artifact(results.outputs, project_location, "sources")
+    if freshness is None:
+        parse_output(identifier, results, None)  # Raises unless nothing to check
+    elif store_output_callback is not None:
+        store_output_callback(identifier, results.outputs)
+    if freshness is None or not freshness.get("results"):
+        logging.info(f"No sources with freshness checks in {identifier}")
+        return FreshnessReport()
+
+    refreshed = None
+    if freshness_store is not None:
+        refreshed = freshness_store.refreshed(project_key(project_location, env))
+    return FreshnessReport(
+        fresh_sources(freshness, refreshed),
+        {
+            result["unique_id"]: result["max_loaded_at"]
+            for result in freshness["results"]
+            if result.get("max_loaded_at") is not None
+        },
+    )
+
+
+def dbt_plan_shards(
+    env: str,
+    project_location: str,
+    profile_location: Optional[str] = None,
+    max_shards: int = 4,
+    duration_history: Optional[DurationHistory] = None,
+    **handler_kwargs: Any,
+) -> ShardPlan:
+    """dbt_plan_shards Parses the project and splits its models into shards
+
+    Without history every model costs the same, and no makespan is predicted.
+    With it, shards are predicted to run with the call's `threads`, or the
+    profile's if unset.
+
+    :param env: Denotes target environment to execute transform against
+    :type env: str
+    :param project_location: Relative filepath to the DBT project
+    :type project_location: str
+    :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
+    :type profile_location: Optional[str], optional
+    :param max_shards: Upper limit on shards run concurrently, defaults to 4
+    :type max_shards: int, optional
+    :param duration_history: Past node durations to balance and order shards by,
+        defaults to None
+    :type duration_history: Optional[DurationHistory], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
+    :return: Stages to run in order, each a list of shards of model selectors,
+        and the predicted makespan in seconds if there is history
+    :rtype: ShardPlan
+    """
+
+    manifest = parse_manifest(
+        env, project_location, profile_location, "dbt_plan_shards", **handler_kwargs
+    )
+    cost = None
+    history_key = project_key(project_location, env)
+    if duration_history is not None and duration_history.durations(history_key):
+        cost = duration_history.estimator(history_key)
+    stages = plan_shards(manifest, max_shards, cost)
+    predicted_makespan = None
+    if cost is not None:
+        threads = handler_kwargs.get("threads") or profile_threads(
+            env, project_location, profile_location
+        )
+        predicted_makespan = predict_makespan(manifest, stages, cost, threads or 1)
+    return ShardPlan(stage_selectors(manifest, stages), predicted_makespan)
+
+
+def dbt_run_shard(
+    env: str,
+    project_location: str,
+    profile_location: Optional[str] = None,
+    prevent_writes: bool = False,
+    store_output_callback: Optional[Callable[[str, Dict], bool]] = None,
+    select: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    **handler_kwargs: Any,
+) -> RunSummary:
+    """dbt_run_shard Implements `dbt run` over a subset of nodes
+
+    :param env: Denotes target environment to execute transform against
+    :type env: str
+    :param project_location: Relative filepath to the DBT project
+    :type project_location: str
+    :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
+    :type profile_location: Optional[str], optional
+    :param prevent_writes: Boolean to disable writing to file, prevents memory use,
+        defaults to False
+    :type prevent_writes: bool, optional
+    :param store_output_callback: Allows export of DBT artifacts to external sources,
+        defaults to None
+    :type store_output_callback: Optional[Callable], optional
+    :param select: DBT node selectors to run, defaults to None running everything
+    :type select: Optional[List[str]], optional
+    :param exclude: DBT node selectors to skip, defaults to None
+    :type exclude: Optional[List[str]], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
+    :return: Per-node results of the shard
+    :rtype: RunSummary
+    """
+
+    identifier = log_start_activity(env, "dbt_run_shard", project_location)
+    results = dbt_handler(
+        env,
+        project_location,
+        ["run", "--fail-fast"] + selection_flags(select, exclude),
+        profile_location,
+        prevent_writes=prevent_writes,
+        **handler_kwargs,
+    )
+    success = parse_output(identifier, results, store_output_callback)
+    run_results = load_artifact(results.outputs, project_location, "run_results")
+    return summarise_run_results(run_results, success)
+
+
+def dbt_build(
+    env: str,
+    project_location: str,
+    profile_location: Optional[str] = None,
+    prevent_writes: bool = False,
+    store_output_callback: Optional[Callable[[str, Dict], bool]] = None,
+    staging_name: str = "staging",
+    select: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    **handler_kwargs: Any,
+) -> Dict[str, bool]:
+    """dbt_build Implements `dbt build` for conversion to activity
+
+    Runs sources tests, models and tests in one invocation, with tests interleaved
+    per node. Node failures are reported per phase rather than raised, so the
+    caller can alert on the step that broke.
+
+    :param env: Denotes target environment to execute transform against
+    :type env: str
+    :param project_location: Relative filepath to the DBT project
+    :type project_location: str
+    :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
+    :type profile_location: Optional[str], optional
+    :param prevent_writes: Boolean to disable writing to file, prevents memory use,
+        defaults to False
+    :type prevent_writes: bool, optional
+    :param store_output_callback: Allows export of DBT artifacts to external sources,
+        defaults to None
+    :type store_output_callback: Optional[Callable], optional
+    :param staging_name: Which model the staging systems lie under, defaults to
+        "staging"
+    :type staging_name: str, optional
+    :param select: DBT node selectors to build, defaults to None building everything
+    :type select: Optional[List[str]], optional
+    :param exclude: DBT node selectors to skip, defaults to None
+    :type exclude: Optional[List[str]], optional
+    :param handler_kwargs: Additional options forwarded to `dbt_handler`
+    :type handler_kwargs: Any
+    :raises WorkflowExecutionError: If DBT failed outside of individual nodes
+    :return: Success of the `test_source`, `run` and `test` phases
+    :rtype: Dict[str, bool]
+    """
+
+    identifier = log_start_activity(env, "dbt_build", project_location)
+    results = dbt_handler(
+        env,
+        project_location,
+        ["build"] + selection_flags(select, exclude),
+        profile_location,
+        prevent_writes=prevent_writes,
+        **handler_kwargs,
+    )
+    run_results = load_artifact(results.outputs, project_location, "run_results")
+    if results.exit_code != 1 or run_results is None:
+        # Success, or a failure that isn't attributable to nodes
+        parse_output(identifier, results, store_output_callback)
+        return {"test_source": True, "run": True, "test": True}
+
+    manifest = load_artifact(results.outputs, project_location, "manifest", ["nodes"])
+    phases = build_phases(run_results, manifest, staging_name)
+    if all(phases.values()):
+        phases["run"] = False  # DBT failed on a node we couldn't attribute
+    logging.error(results.log_string)
+    logging.error(f"Nodes failed in {identifier}, phase results {phases}")
+    return phases
+
+
+def _workflow_run_id() -> Optional[str]:
+    """Run id of the calling workflow, or None outside of an activity"""
+    try:
+        return activity.info().workflow_run_id
+    except RuntimeError:
+        return None
+
+
+def _retry_details() -> List[str]:
+    """Nodes an earlier attempt of the current activity built, if any"""
+    try:
+        details = activity.info().heartbeat_details
+    except RuntimeError:
+        return []
+    return list(details[0]) if details else []
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _progress_heartbeat() -> Optional[Callable[[int, int], None]]:
+    """Thread-safe callback heartbeating node progress for the current activity
+
+    Details are `(completed_nodes, {"completed": n, "total": m})`, so progress
+    never overwrites the retry state a failed run records.
+    """
+    try:
+        retry_state = _retry_details()
+        activity.info()
+    except RuntimeError:
+        return None
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+
+    def heartbeat(completed: int, total: int):
+        progress = {"completed": completed, "total": total}
+        if _running_loop() is loop:  # DBT is running inline
+            activity.heartbeat(retry_state, progress)
+        else:
+            loop.call_soon_threadsafe(
+                activity.heartbeat, retry_state, progress, context=context
+            )
+
+    return heartbeat
+
+
 class DbtActivities:
     def __init__(
         self,
@@ -249,6 +939,25 @@ class DbtActivities:
         prevent_writes: bool = False,
         store_output_callback: Optional[Callable[[str, Dict], bool]] = None,
         staging_dir_name: str = "staging",
+        executor: Optional[Executor] = None,
+        process_pool: Optional[DbtProcessPool] = None,
+        manifest_cache: Optional[ManifestCache] = None,
+        package_cache: Optional[PackageCache] = None,
+        state_store: Optional[StateStore] = None,
+        log_max_bytes: Optional[int] = None,
+        log_spill_dir: Optional[str] = None,
+        structured_logs: bool = False,
+        compress_artifacts: Optional[str] = None,
+        metrics_sink: Optional[MetricsSink] = None,
+        duration_history: Optional[DurationHistory] = None,
+        result_cache: Optional[ResultCache] = None,
+        freshness_store: Optional[FreshnessStore] = None,
+        warehouse_slots: Optional[WarehouseSlots] = None,
+        thread_policy: Optional[ThreadPolicy] = None,
+        debug_cache: Optional[DebugCache] = None,
+        debug_connection_only: bool = False,
+        profiling: Optional[str] = None,
+        host_queue: Optional[str] = None,
     ) -> None:
         """DbtActivities Converts dbt activity steps into Temporal activities
 
@@ -260,6 +969,72 @@ class DbtActivities:
         :param store_output_callback: Allows export of DBT artifacts to external
             sources, defaults to None
         :type store_output_callback: Optional[Callable], optional
+        :param executor: Thread or process pool that blocking DBT calls are dispatched
+            to, keeping the worker's event loop free. Process pools require the
+            output callback to be picklable. Defaults to None, running DBT inline
+        :type executor: Optional[Executor], optional
+        :param process_pool: Warm DBT subprocesses that invocations are sent to,
+            pair with a thread executor to keep the event loop free. Defaults to None
+        :type process_pool: Optional[DbtProcessPool], optional
+        :param manifest_cache: Keeps parse state between invocations so later steps
+            skip re-parsing unchanged projects, defaults to None
+        :type manifest_cache: Optional[ManifestCache], optional
+        :param package_cache: Local store of installed packages for the deps step,
+            defaults to None
+        :type package_cache: Optional[PackageCache], optional
+        :param state_store: Manifests of successful runs, required for requests with
+            a `state_mode`, defaults to None
+        :type state_store: Optional[StateStore], optional
+        :param log_max_bytes: Size of the DBT log tail kept in memory, defaults to
+            None using the handler's default
+        :type log_max_bytes: Optional[int], optional
+        :param log_spill_dir: Directory the full DBT logs are written to, defaults to
+            None
+        :type log_spill_dir: Optional[str], optional
+        :param structured_logs: Run DBT with JSON logs, collecting per-node events
+            on the results, defaults to False
+        :type structured_logs: bool, optional
+        :param compress_artifacts: With `prevent_writes`, hold artifacts compressed
+            with this codec ("zstd" or "gzip") rather than as written. Callbacks
+            then receive `CompressedArtifact`s that parse sections on demand and
+            stream with `iter_chunks`. Defaults to None
+        :type compress_artifacts: Optional[str], optional
+        :param metrics_sink: Receives per-node and per-call timings for every DBT
+            invocation. Not used with process executors. Defaults to None
+        :type metrics_sink: Optional[MetricsSink], optional
+        :param duration_history: Node durations recorded from each run, used to
+            cost and order shards. Only recorded without process executors.
+            Defaults to None
+        :type duration_history: Optional[DurationHistory], optional
+        :param result_cache: Fingerprints of the nodes built by earlier runs, the
+            run step skips nodes whose inputs haven't changed. Defaults to None
+        :type result_cache: Optional[ResultCache], optional
+        :param freshness_store: Source load times as of the last successful refresh,
+            so the freshness gate only passes sources with new data. Defaults to
+            None, using DBT's freshness thresholds
+        :type freshness_store: Optional[FreshnessStore], optional
+        :param warehouse_slots: Limits threads per profile and target across
+            workers, DBT calls wait for slots and run with the threads granted.
+            Defaults to None
+        :type warehouse_slots: Optional[WarehouseSlots], optional
+        :param thread_policy: Chooses `--threads` for each call unless the request
+            sets `threads`. Adaptive policies only learn without process
+            executors. Defaults to None, using the profile's threads
+        :type thread_policy: Optional[ThreadPolicy], optional
+        :param debug_cache: Recent successful debug checks, so the debug step is
+            skipped while one is within its TTL. Defaults to None
+        :type debug_cache: Optional[DebugCache], optional
+        :param debug_connection_only: Debug steps only open a connection to the
+            target instead of running `dbt debug`, defaults to False
+        :type debug_connection_only: bool, optional
+        :param profiling: Profile every DBT call with "cprofile" or "sampling",
+            adding the profile and named phase timings to the outputs. Requests
+            can turn it on with their own `profiling`. Defaults to None
+        :type profiling: Optional[str], optional
+        :param host_queue: Task queue only this worker process listens on, handed
+            to workflows that claim a worker. Set by `create_worker(sticky=True)`,
+            defaults to None
+        :type host_queue: Optional[str], optional
         :return: Returns a true value denoting the success of the run
         :rtype: bool
         """
@@ -267,31 +1042,289 @@ class DbtActivities:
         self.prevent_writes = prevent_writes
         self.store_output_callback = store_output_callback
         self.staging_dir_name = staging_dir_name
+        self.executor = executor
+        self.process_pool = process_pool
+        self.manifest_cache = manifest_cache
+        self.package_cache = package_cache
+        self.state_store = state_store
+        self.log_max_bytes = log_max_bytes
+        self.log_spill_dir = log_spill_dir
+        self.structured_logs = structured_logs
+        self.compress_artifacts = compress_artifacts
+        self.metrics_sink = metrics_sink
+        self.duration_history = duration_history
+        self.result_cache = result_cache
+        self.freshness_store = freshness_store
+        self.warehouse_slots = warehouse_slots
+        self.thread_policy = thread_policy
+        self.debug_cache = debug_cache
+        self.debug_connection_only = debug_connection_only
+        self.profiling = profiling
+        self.host_queue = host_queue
+
+    def _resolve(self, location: str) -> str:
+        """Anchors request paths to the navigation root rather than the process cwd"""
+        return str(Path(self.navigation_root, location).absolute())
+
+    def _state_options(
+        self, run_params: OperationRequest, save_state: bool = False
+    ) -> Dict[str, Any]:
+        """Slim run options, comparing against the previous refresh's state"""
+        if run_params.state_mode is None:
+            return {}
+        if run_params.state_mode not in STATE_SELECTORS or self.state_store is None:
+            raise WorkflowExecutionError(
+                f"State mode {run_params.state_mode} requires a configured state store"
+            )
+
+        project_location = self._resolve(run_params.project_location)
+        run_id = _workflow_run_id()
+        options: Dict[str, Any] = {
+            "state_location": self.state_store.latest(
+                project_location, run_params.env, exclude_run_id=run_id
+            )
+        }
+        if save_state:
+            options["store_output_callback"] = functools.partial(
+                store_state_output,
+                self.state_store,
+                project_location,
+                run_params.env,
+                run_id,
+                self.store_output_callback,
+            )
+        return options
+
+    def _record_results(
+        self,
+        run_params: OperationRequest,
+        activity_name: str,
+        dbt_commands: List[str],
+        results: DbtResults,
+        wall_time: float,
+    ):
+        """Records node durations and publishes metrics, never failing the activity"""
+        project_location = self._resolve(run_params.project_location)
+        run_results = None
+        if dbt_commands[0] in NODE_RESULT_COMMANDS:
+            run_results = load_artifact(
+                results.outputs, project_location, "run_results"
+            )
+
+        if self.duration_history is not None:
+            try:
+                key = project_key(project_location, run_params.env)
+                self.duration_history.update(key, run_results)
+            except Exception as e:
+                logging.warning(
+                    f"Failed to record durations for {activity_name}: {e!r}"
+                )
+        if self.thread_policy is not None:
+            try:
+                self.thread_policy.observe(
+                    warehouse_key(project_location, run_params.env),
+                    results.threads,
+                    run_results,
+                )
+            except Exception as e:
+                logging.warning(f"Failed to tune threads for {activity_name}: {e!r}")
+        if self.metrics_sink is None:
+            return
+
+        parse_time = None
+        if run_results is not None and "elapsed_time" in run_results:
+            parse_time = max(wall_time - run_results["elapsed_time"], 0.0)
+        metrics = ActivityMetrics(
+            activity_name,
+            run_params.env,
+            Path(project_location).stem,
+            results.exit_code,
+            wall_time,
+            parse_time,
+            results.peak_rss_mb,
+            node_metrics(run_results),
+            results.threads,
+        )
+        try:
+            self.metrics_sink.emit(metrics)
+        except Exception as e:
+            logging.warning(f"Failed to publish metrics for {activity_name}: {e!r}")
+
+    async def _dispatch(
+        self,
+        dbt_fn: Callable[..., Any],
+        run_params: OperationRequest,
+        *args: Any,
+        uses_warehouse: bool = True,
+        **kwargs: Any,
+    ) -> Any:
+        """Executes a DBT function inline, or on the executor if one is configured"""
+        project_location = self._resolve(run_params.project_location)
+        profile_location = None
+        if run_params.profile_location is not None:
+            profile_location = self._resolve(run_params.profile_location)
+        threads = run_params.threads
+        if threads is None and self.thread_policy is not None and uses_warehouse:
+            threads = self.thread_policy.threads(
+                warehouse_key(project_location, run_params.env)
+            )
+        if threads is not None and self.warehouse_slots is None:
+            kwargs["threads"] = threads
+        if self.process_pool is not None:
+            kwargs["process_pool"] = self.process_pool
+        if self.manifest_cache is not None:
+            kwargs["manifest_cache"] = self.manifest_cache
+        if self.log_max_bytes is not None:
+            kwargs["log_max_bytes"] = self.log_max_bytes
+        if self.log_spill_dir is not None:
+            kwargs["log_spill_dir"] = self.log_spill_dir
+        if self.structured_logs:
+            kwargs["structured_logs"] = True
+        if self.compress_artifacts is not None:
+            kwargs["compress_artifacts"] = self.compress_artifacts
+        if (run_params.profiling or self.profiling) is not None:
+            kwargs["profiling"] = run_params.profiling or self.profiling
+        if not isinstance(self.executor, ProcessPoolExecutor):
+            # Closures can't be sent to another process
+            kwargs["progress_callback"] = _progress_heartbeat()
+            if (
+                self.metrics_sink is not None
+                or self.duration_history is not None
+                or self.thread_policy is not None
+            ):
+                kwargs["results_callback"] = functools.partial(
+                    self._record_results, run_params, dbt_fn.__name__
+                )
 
-    def _reset_path(self):
-        """Written to account for the fact DBT jumps as part of the install process"""
-        os.chdir(self.navigation_root)
+        call = functools.partial(
+            dbt_fn,
+            run_params.env,
+            project_location,
+            profile_location,
+            *args,
+            **kwargs,
+        )
+        loop = asyncio.get_running_loop()
+        if self.warehouse_slots is not None and uses_warehouse:
+            key = warehouse_key(project_location, run_params.env)
+            call = functools.partial(self.warehouse_slots.run, key, call, threads)
+            if self.executor is None:
+                # Waiting for a slot blocks, so keep it off the event loop
+                call = functools.partial(contextvars.copy_context().run, call)
+                return await loop.run_in_executor(None, call)
+        if self.executor is None:
+            return call()
+
+        return await loop.run_in_executor(self.executor, call)
 
     @activity.defn(name="dbt_run")
     async def run(self, run_params: OperationRequest) -> bool:
         """Handles calls from the workflow to to `dbt_run` activity"""
-        self._reset_path()
-        return dbt_run(
-            run_params.env,
-            run_params.project_location,
-            run_params.profile_location,
+        options: Dict[str, Any] = {"store_output_callback": self.store_output_callback}
+        options.update(self._state_options(run_params, save_state=True))
+        try:
+            return await self._dispatch(
+                dbt_run,
+                run_params,
+                self.prevent_writes,
+                select=run_params.select,
+                exclude=run_params.exclude,
+                completed=_retry_details(),
+                full_refresh=run_params.full_refresh,
+                result_cache=self.result_cache,
+                source_loaded_at=run_params.source_loaded_at,
+                **options,
+            )
+        except PartialRunError as e:
+            # Recorded against the activity so the retry only reruns what's left
+            activity.heartbeat(e.completed)
+            raise
+
+    @activity.defn(name="dbt_source_freshness")
+    async def source_freshness(self, run_params: OperationRequest) -> FreshnessReport:
+        """Handles calls from the workflow to to `dbt_source_freshness` activity"""
+        return await self._dispatch(
+            dbt_source_freshness,
+            run_params,
             self.prevent_writes,
             self.store_output_callback,
+            freshness_store=self.freshness_store,
+        )
+
+    @activity.defn(name="dbt_commit_freshness")
+    async def commit_freshness(
+        self, run_params: OperationRequest, report: FreshnessReport
+    ) -> bool:
+        """Records the source load times a successful refresh consumed"""
+        if self.freshness_store is not None:
+            project_location = self._resolve(run_params.project_location)
+            key = project_key(project_location, run_params.env)
+            self.freshness_store.commit(key, report.loaded_at)
+        return True
+
+    @activity.defn(name="dbt_claim_worker")
+    async def claim_worker(self, run_params: OperationRequest) -> str:
+        """claim_worker Pins a workflow to the host that picked up this activity
+
+        :param run_params: Request of the claiming workflow, for logging
+        :type run_params: OperationRequest
+        :raises WorkflowExecutionError: If the worker has no host queue
+        :return: Task queue to send the workflow's remaining activities to
+        :rtype: str
+        """
+        if self.host_queue is None:
+            raise WorkflowExecutionError(
+                "Worker has no host queue, create it with `create_worker(sticky=True)`"
+            )
+        identifier = log_start_activity(
+            run_params.env, "dbt_claim_worker", run_params.project_location
+        )
+        logging.info(f"Activity {identifier} claimed {self.host_queue}")
+        return self.host_queue
+
+    @activity.defn(name="dbt_plan_shards")
+    async def plan_shards(
+        self, run_params: OperationRequest, max_shards: int
+    ) -> ShardPlan:
+        """Handles calls from the workflow to to `dbt_plan_shards` activity"""
+        return await self._dispatch(
+            dbt_plan_shards,
+            run_params,
+            max_shards,
+            duration_history=self.duration_history,
+        )
+
+    @activity.defn(name="dbt_run_shard")
+    async def run_shard(self, run_params: OperationRequest) -> RunSummary:
+        """Handles calls from the workflow to to `dbt_run_shard` activity"""
+        return await self._dispatch(
+            dbt_run_shard,
+            run_params,
+            self.prevent_writes,
+            self.store_output_callback,
+            select=run_params.select,
+            exclude=run_params.exclude,
+        )
+
+    @activity.defn(name="dbt_build")
+    async def build(self, run_params: OperationRequest) -> Dict[str, bool]:
+        """Handles calls from the workflow to to `dbt_build` activity"""
+        return await self._dispatch(
+            dbt_build,
+            run_params,
+            self.prevent_writes,
+            self.store_output_callback,
+            staging_name=self.staging_dir_name,
+            select=run_params.select,
+            exclude=run_params.exclude,
         )
 
     @activity.defn(name="dbt_docs_generate")
     async def docs_generate(self, run_params: OperationRequest) -> bool:
         """Handles calls from the workflow to to `dbt_docs_generate` activity"""
-        self._reset_path()
-        return dbt_docs_generate(
-            run_params.env,
-            run_params.project_location,
-            run_params.profile_location,
+        return await self._dispatch(
+            dbt_docs_generate,
+            run_params,
             self.prevent_writes,
             self.store_output_callback,
         )
@@ -299,71 +1332,70 @@ class DbtActivities:
     @activity.defn(name="dbt_debug")
     async def debug(self, run_params: OperationRequest) -> bool:
         """Handles calls from the workflow to to `dbt_debug` activity"""
-        self._reset_path()
-        return dbt_debug(
-            run_params.env,
-            run_params.project_location,
-            run_params.profile_location,
+        return await self._dispatch(
+            dbt_debug,
+            run_params,
+            debug_cache=self.debug_cache,
+            connection_only=self.debug_connection_only,
         )
 
     @activity.defn(name="dbt_clean")
     async def clean(self, run_params: OperationRequest) -> bool:
         """Handles calls from the workflow to to `dbt_clean` activity"""
-        self._reset_path()
-        return dbt_clean(
-            run_params.env,
-            run_params.project_location,
-            run_params.profile_location,
+        return await self._dispatch(
+            dbt_clean,
+            run_params,
+            uses_warehouse=False,
         )
 
     @activity.defn(name="dbt_deps")
     async def deps(self, run_params: OperationRequest) -> bool:
         """Handles calls from the workflow to to `dbt_deps` activity"""
-        self._reset_path()
-        return dbt_deps(
-            run_params.env,
-            f"{run_params.project_location}",
-            run_params.profile_location,
+        return await self._dispatch(
+            dbt_deps,
+            run_params,
+            uses_warehouse=False,
+            package_cache=self.package_cache,
         )
 
     @activity.defn(name="dbt_test")
     async def test(self, run_params: OperationRequest) -> bool:
         """Handles calls from the workflow to to `dbt_test` activity"""
-        self._reset_path()
-        return dbt_test(
-            run_params.env,
-            run_params.project_location,
-            run_params.profile_location,
+        return await self._dispatch(
+            dbt_test,
+            run_params,
+            select=run_params.select,
+            exclude=run_params.exclude,
+            **self._state_options(run_params),
         )
 
     @activity.defn(name="dbt_test_source")
     async def test_source(self, run_params: OperationRequest) -> bool:
         """Handles calls from the workflow to to `dbt_test_source` activity"""
-        self._reset_path()
-        return dbt_test(
-            run_params.env,
-            run_params.project_location,
-            run_params.profile_location,
+        return await self._dispatch(
+            dbt_test,
+            run_params,
             staging_only=True,
             staging_name=self.staging_dir_name,
+            exclude=run_params.exclude,
         )
 
 
 def _wrap_notification(
-    callback_name: str, alert_callback: Callable[[str], None]
-) -> Callable[[str, Dict], Awaitable[None]]:
+    callback_name: str, alert_callback: Callable[[str], bool]
+) -> Callable[[str], Awaitable[None]]:
     """_wrap_notification Wraps notification callback for success or failure
 
     :param identifier: A string indicating where in the workflow the alert is raised
     :type identifier: str
     :param alert_callback: Callback function
-    :type alert_callback: Callable[[str, Dict], bool]
-    :return: Boolean denoting success of the callback
-    :rtype: bool
+    :type alert_callback: Callable[[str], bool]
+    :return: Activity raising if the callback reports a failure
+    :rtype: Callable[[str], Awaitable[None]]
     """
 
     @activity.defn(name=callback_name)
-    async def callback(identifier_string: str):
+    async def callback(identifier_string: str) -> None:
         if not alert_callback(identifier_string):
             raise WorkflowExecutionError(
                 f"Notification callback {callback_name} failed to complete"
@@ -374,17 +1406,17 @@ def _wrap_notification(
 
 
 def create_notifications(
-    alert_error_callback: Optional[Callable[[str], None]] = None,
-    alert_success_callback: Optional[Callable[[str], None]] = None,
-) -> Dict[str, Callable[[str], None]]:
+    alert_error_callback: Optional[Callable[[str], bool]] = None,
+    alert_success_callback: Optional[Callable[[str], bool]] = None,
+) -> Dict[str, Callable[[str], Awaitable[None]]]:
     """create_notifications Converts notification callbacks into temporal activities
 
     :param alert_error_callback: Callback in case of error, defaults to None
-    :type alert_error_callback: Optional[Callable[[str], None]], optional
+    :type alert_error_callback: Optional[Callable[[str], bool]], optional
     :param alert_success_callback: Callback for success, defaults to None
-    :type alert_success_callback: Optional[Callable[[str], None]], optional
+    :type alert_success_callback: Optional[Callable[[str], bool]], optional
     :return: A dictionary containing the wrapped callbacks
-    :rtype: Dict[str, Callable[[str], None]]
+    :rtype: Dict[str, Callable[[str], Awaitable[None]]]
     """
     activities = {}
     if alert_error_callback is not None:
@@ -0,0 +1,140 @@
+import gzip
+import json
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # Optional, gzip is used without it
+    zstandard = None  # type: ignore
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def default_codec() -> str:
+    """zstd if `zstandard` is installed, otherwise gzip"""
+    return "gzip" if zstandard is None else "zstd"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress_chunks(data: bytes, codec: str) -> Iterator[bytes]:
+    if codec == "zstd":
+        reader = zstandard.ZstdDecompressor().stream_reader(data)
+        while True:
+            chunk = reader.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)  # gzip framing
+    for start in range(0, len(data), CHUNK_SIZE):
+        yield decompressor.decompress(data[start : start + CHUNK_SIZE])
+    yield decompressor.flush()
+
+
+def _top_level_spans(text: str) -> List[Tuple[str, int, int]]:
+    """Key and value offsets of each member of a JSON object
+
+    Values are decoded one at a time and dropped, so only a single section is ever
+    materialised while scanning.
+    """
+    decoder = json.JSONDecoder()
+    whitespace = " \t\n\r"
+    spans: List[Tuple[str, int, int]] = []
+    index = text.index("{") + 1
+    while True:
+        while text[index] in whitespace + ",":
+            index += 1
+        if text[index] == "}":
+            return spans
+        key, index = decoder.raw_decode(text, index)
+        while text[index] in whitespace + ":":
+            index += 1
+        _, end = decoder.raw_decode(text, index)
+        spans.append((key, index, end))
+        index = end
+
+
+class CompressedArtifact:
+    def __init__(self, sections: Dict[str, bytes], codec: str, raw_size: int = 0):
+        """CompressedArtifact A DBT artifact held as compressed JSON
+
+        Each top-level key of the artifact is compressed separately, so a single
+        section such as `nodes` can be parsed without loading the rest. Build with
+        `from_contents`.
+
+        :param sections: Compressed JSON of each top-level value, in order
+        :type sections: Dict[str, bytes]
+        :param codec: "zstd" or "gzip"
+        :type codec: str
+        :param raw_size: Size of the uncompressed JSON, defaults to 0
+        :type raw_size: int, optional
+        """
+        self.sections = sections
+        self.codec = codec
+        self.raw_size = raw_size
+
+    @classmethod
+    def from_contents(
+        cls, contents: Union[str, bytes, Dict[str, Any]], codec: Optional[str] = None
+    ) -> "CompressedArtifact":
+        """from_contents Compresses an artifact as DBT writes it
+
+        :param contents: Serialised JSON, or an already parsed artifact
+        :type contents: Union[str, bytes, Dict[str, Any]]
+        :param codec: "zstd" or "gzip", defaults to None picking `default_codec`
+        :type codec: Optional[str], optional
+        :return: The compressed artifact
+        :rtype: CompressedArtifact
+        """
+        codec = codec or default_codec()
+        if codec == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package")
+        if isinstance(contents, bytes):
+            contents = contents.decode("utf-8")
+        elif not isinstance(contents, str):
+            contents = json.dumps(contents)
+
+        sections = {
+            key: _compress(contents[start:end].encode("utf-8"), codec)
+            for key, start, end in _top_level_spans(contents)
+        }
+        return cls(sections, codec, len(contents))
+
+    @property
+    def compressed_size(self) -> int:
+        """Bytes held in memory"""
+        return sum(len(data) for data in self.sections.values())
+
+    def section(self, name: str) -> Any:
+        """Parses a single top-level value, e.g. `nodes` or `results`"""
+        return json.loads(b"".join(_decompress_chunks(self.sections[name], self.codec)))
+
+    def load(self, sections: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """load Parses the artifact, or only the requested sections of it
+
+        :param sections: Top-level keys to include, defaults to None for all
+        :type sections: Optional[Sequence[str]], optional
+        :return: The parsed artifact
+        :rtype: Dict[str, Any]
+        """
+        names = self.sections if sections is None else sections
+        return {name: self.section(name) for name in names if name in self.sections}
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """iter_chunks Streams the artifact's uncompressed JSON
+
+        :yield: Consecutive pieces of the serialised artifact
+        :rtype: Iterator[bytes]
+        """
+        yield b"{"
+        for position, (name, data) in enumerate(self.sections.items()):
+            yield (", " if position else "").encode() + json.dumps(name).encode()
+            yield b": "
+            yield from _decompress_chunks(data, self.codec)
+        yield b"}"
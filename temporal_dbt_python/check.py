@@ -12,6 +12,8 @@ from temporal_dbt_python.dto import OperationRequest
 @workflow.defn
 class DbtExampleWorkflow:
     activity_mgr: DbtActivities
+    start_to_close: timedelta
+    retry_policy: RetryPolicy
 
     @classmethod
     def configure(
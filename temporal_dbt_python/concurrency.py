@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Union
+
+from temporal_dbt_python.exceptions import WorkflowExecutionError
+from temporal_dbt_python.manifest_cache import project_config
+
+
+def warehouse_key(project_location: str, env: str) -> str:
+    """Profile and target a project runs against, e.g. `jaffle_shop--dev`"""
+    profile = project_config(project_location).get(
+        "profile", Path(project_location).stem
+    )
+    return re.sub(r"[^\w.-]", "_", f"{profile}--{env}")
+
+
+def project_key(project_location: str, env: str) -> str:
+    """`warehouse_key` narrowed to one project, e.g. `jaffle_shop--dev--shop-1a2b3c4d`
+
+    Same-named projects in other directories get their own keys.
+    """
+    name = project_config(project_location).get("name", Path(project_location).stem)
+    location = Path(project_location).resolve().as_posix()
+    location_hash = hashlib.sha1(location.encode()).hexdigest()[:8]
+    project = re.sub(r"[^\w.-]", "_", f"{name}-{location_hash}")
+    return f"{warehouse_key(project_location, env)}--{project}"
+
+
+class WarehouseSlots:
+    def __init__(
+        self,
+        lock_dir: str,
+        slots: Union[int, Dict[str, int]] = 8,
+        threads_per_run: int = 4,
+        poll_interval: float = 1.0,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """WarehouseSlots Caps the DBT threads running against each profile and target
+
+        Slots are lock files, one per permitted thread, so every worker sharing the
+        lock directory shares the limit. That's every process on a host, or every
+        host if the directory is on a file system with working `flock`. A run takes
+        as many free slots as it wants, waiting for at least one, and is given that
+        many `--threads`. Locks are released by the OS if a worker dies.
+
+        :param lock_dir: Directory holding the slot files
+        :type lock_dir: str
+        :param slots: Threads allowed per `warehouse_key`, or a mapping of keys to
+            limits with "default" for the rest. Defaults to 8
+        :type slots: Union[int, Dict[str, int]], optional
+        :param threads_per_run: Threads a run asks for, defaults to 4
+        :type threads_per_run: int, optional
+        :param poll_interval: Seconds between attempts while the warehouse is full,
+            defaults to 1.0
+        :type poll_interval: float, optional
+        :param timeout: Seconds to wait for a slot before failing the attempt,
+            defaults to None waiting indefinitely
+        :type timeout: Optional[float], optional
+        """
+        self.lock_dir = lock_dir
+        self.slots = slots
+        self.threads_per_run = threads_per_run
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def limit(self, key: str) -> int:
+        """Threads allowed against a warehouse key"""
+        if isinstance(self.slots, int):
+            return self.slots
+        return self.slots.get(key, self.slots.get("default", 8))
+
+    def _try_lock(self, key: str, wanted: int) -> List[IO[Any]]:
+        import fcntl  # POSIX only
+
+        slot_dir = Path(self.lock_dir, key)
+        slot_dir.mkdir(parents=True, exist_ok=True)
+        held: List[IO[Any]] = []
+        for slot in range(self.limit(key)):
+            if len(held) == wanted:
+                break
+            handle = open(Path(slot_dir, f"{slot}.lock"), "a")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                held.append(handle)
+            except OSError:
+                handle.close()
+        return held
+
+    @contextmanager
+    def acquire(self, key: str, wanted: Optional[int] = None) -> Iterator[int]:
+        """acquire Holds free slots of a warehouse for the duration of the block
+
+        :param key: Output of `warehouse_key`
+        :type key: str
+        :param wanted: Slots to take at most, defaults to None for `threads_per_run`
+        :type wanted: Optional[int], optional
+        :raises WorkflowExecutionError: If no slot came free within the timeout
+        :yield: Number of slots granted, at least one
+        :rtype: Iterator[int]
+        """
+        wanted = max(1, wanted or self.threads_per_run)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        held = self._try_lock(key, wanted)
+        while not held:
+            if deadline is not None and time.monotonic() > deadline:
+                raise WorkflowExecutionError(f"No free slots on {key}")
+            time.sleep(self.poll_interval)
+            held = self._try_lock(key, wanted)
+        if len(held) < wanted:
+            logging.info(f"Granted {len(held)} of {wanted} threads on {key}")
+        try:
+            yield len(held)
+        finally:
+            for handle in held:
+                handle.close()  # Closing drops the lock
+
+    def run(
+        self, key: str, call: Callable[..., Any], wanted: Optional[int] = None
+    ) -> Any:
+        """run Calls `call(threads=n)` while holding the `n` slots granted
+
+        :param key: Output of `warehouse_key`
+        :type key: str
+        :param call: Blocking DBT call accepting `threads`
+        :type call: Callable[..., Any]
+        :param wanted: Slots to take at most, defaults to None for `threads_per_run`
+        :type wanted: Optional[int], optional
+        :return: Whatever the call returns
+        :rtype: Any
+        """
+        with self.acquire(key, wanted) as threads:
+            return call(threads=threads)
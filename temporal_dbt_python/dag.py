@@ -0,0 +1,318 @@
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from temporal_dbt_python.dto import NodeResult, RunSummary
+
+ModelGraph = Dict[str, Set[str]]
+
+
+def model_graph(
+    manifest: Dict[str, Any], resource_types: Sequence[str] = ("model",)
+) -> ModelGraph:
+    """model_graph Extracts node dependencies from a DBT manifest
+
+    :param manifest: DBT's `manifest` artifact
+    :type manifest: Dict[str, Any]
+    :param resource_types: Node types to keep, defaults to models only
+    :type resource_types: Sequence[str], optional
+    :return: Mapping of each node's unique id to the ids of its parents
+    :rtype: ModelGraph
+    """
+    nodes = {
+        unique_id: node
+        for unique_id, node in manifest.get("nodes", {}).items()
+        if node.get("resource_type") in resource_types
+    }
+    return {
+        unique_id: {
+            parent
+            for parent in node.get("depends_on", {}).get("nodes", [])
+            if parent in nodes
+        }
+        for unique_id, node in nodes.items()
+    }
+
+
+def topological_layers(graph: ModelGraph) -> List[List[str]]:
+    """topological_layers Groups nodes so each layer only depends on earlier ones
+
+    :param graph: Mapping of node ids to parent ids
+    :type graph: ModelGraph
+    :raises ValueError: If the graph contains a cycle
+    :return: Layers of node ids, sorted for deterministic output
+    :rtype: List[List[str]]
+    """
+    remaining = {node: set(parents) for node, parents in graph.items()}
+    layers = []
+    while remaining:
+        layer = sorted(node for node, parents in remaining.items() if not parents)
+        if not layer:
+            raise ValueError(f"Cycle detected between nodes {sorted(remaining)}")
+        layers.append(layer)
+        for node in layer:
+            del remaining[node]
+        for parents in remaining.values():
+            parents.difference_update(layer)
+    return layers
+
+
+def connected_components(graph: ModelGraph) -> List[List[str]]:
+    """Splits the graph into subgraphs that share no dependencies"""
+    neighbours: ModelGraph = defaultdict(set)
+    for node, parents in graph.items():
+        neighbours[node].update(parents)
+        for parent in parents:
+            neighbours[parent].add(node)
+
+    seen: Set[str] = set()
+    components = []
+    for start in sorted(graph):
+        if start in seen:
+            continue
+        component, frontier = [], [start]
+        seen.add(start)
+        while frontier:
+            node = frontier.pop()
+            component.append(node)
+            for neighbour in neighbours[node] - seen:
+                seen.add(neighbour)
+                frontier.append(neighbour)
+        components.append(sorted(component))
+    return components
+
+
+def balance(
+    groups: List[List[str]],
+    n_bins: int,
+    cost: Optional[Callable[[str], float]] = None,
+) -> List[List[str]]:
+    """balance Packs groups of nodes into at most `n_bins` evenly costed bins
+
+    Uses longest-processing-time-first, placing the most expensive group in the
+    cheapest bin.
+
+    :param groups: Node groups that must stay together
+    :type groups: List[List[str]]
+    :param n_bins: Maximum number of bins
+    :type n_bins: int
+    :param cost: Cost of a single node, defaults to None which counts nodes
+    :type cost: Optional[Callable[[str], float]], optional
+    :return: Non-empty bins of node ids
+    :rtype: List[List[str]]
+    """
+    node_cost = cost if cost is not None else (lambda node: 1.0)
+    bins: List[List[str]] = [[] for _ in range(max(1, n_bins))]
+    loads = [0.0] * len(bins)
+    ranked = sorted(groups, key=lambda g: sum(node_cost(n) for n in g), reverse=True)
+    for group in ranked:
+        cheapest = loads.index(min(loads))
+        bins[cheapest].extend(group)
+        loads[cheapest] += sum(node_cost(node) for node in group)
+    return [sorted(b) for b in bins if b]
+
+
+def critical_path_priorities(
+    graph: ModelGraph, cost: Optional[Callable[[str], float]] = None
+) -> Dict[str, float]:
+    """critical_path_priorities Longest costed path from each node to the DAG's end
+
+    A node's priority is its own cost plus the most expensive chain of
+    descendants, so nodes on the critical path rank highest.
+
+    :param graph: Mapping of node ids to parent ids
+    :type graph: ModelGraph
+    :param cost: Cost of a single node, defaults to None which counts nodes
+    :type cost: Optional[Callable[[str], float]], optional
+    :return: Priority of every node in the graph
+    :rtype: Dict[str, float]
+    """
+    node_cost = cost if cost is not None else (lambda node: 1.0)
+    children: ModelGraph = defaultdict(set)
+    for node, parents in graph.items():
+        for parent in parents:
+            children[parent].add(node)
+
+    priorities: Dict[str, float] = {}
+    for layer in reversed(topological_layers(graph)):
+        for node in layer:
+            downstream = [priorities[child] for child in children[node]]
+            priorities[node] = node_cost(node) + max(downstream, default=0.0)
+    return priorities
+
+
+def _shard_time(
+    graph: ModelGraph, shard: List[str], node_cost: Callable[[str], float], threads: int
+) -> float:
+    """Estimated duration of a shard run with `threads` DBT threads"""
+    members = set(shard)
+    subgraph = {node: graph.get(node, set()) & members for node in shard}
+    longest_chain = max(critical_path_priorities(subgraph, node_cost).values())
+    return max(longest_chain, sum(node_cost(node) for node in shard) / threads)
+
+
+def predict_makespan(
+    manifest: Dict[str, Any],
+    stages: List[List[List[str]]],
+    cost: Optional[Callable[[str], float]] = None,
+    threads: int = 1,
+) -> float:
+    """predict_makespan Estimated wall time of running shards stage by stage
+
+    Each shard takes the longer of its critical path and its total cost spread over
+    `threads`, and each stage as long as its slowest shard.
+
+    :param manifest: DBT's `manifest` artifact
+    :type manifest: Dict[str, Any]
+    :param stages: Output of `plan_shards`
+    :type stages: List[List[List[str]]]
+    :param cost: Cost of a single node, defaults to None which counts nodes
+    :type cost: Optional[Callable[[str], float]], optional
+    :param threads: DBT threads each shard runs with, defaults to 1
+    :type threads: int, optional
+    :return: Predicted makespan in the units of `cost`
+    :rtype: float
+    """
+    node_cost = cost if cost is not None else (lambda node: 1.0)
+    graph = model_graph(manifest)
+    return sum(
+        max(_shard_time(graph, shard, node_cost, threads) for shard in stage)
+        for stage in stages
+        if stage
+    )
+
+
+def plan_shards(
+    manifest: Dict[str, Any],
+    max_shards: int,
+    cost: Optional[Callable[[str], float]] = None,
+) -> List[List[List[str]]]:
+    """plan_shards Splits a project's models into stages of parallel shards
+
+    Independent subgraphs are run side by side in a single stage. A project that
+    is one connected graph is run layer by layer instead, each topological layer
+    split across shards. Shards in a stage are listed longest critical path first.
+
+    :param manifest: DBT's `manifest` artifact
+    :type manifest: Dict[str, Any]
+    :param max_shards: Upper limit on shards run concurrently
+    :type max_shards: int
+    :param cost: Cost of a single node, defaults to None which counts nodes
+    :type cost: Optional[Callable[[str], float]], optional
+    :return: Stages to run in order, each a list of shards of unique ids
+    :rtype: List[List[List[str]]]
+    """
+    graph = model_graph(manifest)
+    components = connected_components(graph)
+    if len(components) > 1:
+        stages = [balance(components, max_shards, cost)]
+    else:
+        stages = [
+            balance([[node] for node in layer], max_shards, cost)
+            for layer in topological_layers(graph)
+        ]
+
+    priorities = critical_path_priorities(graph, cost)
+    return [
+        sorted(stage, key=lambda s: max(priorities[n] for n in s), reverse=True)
+        for stage in stages
+    ]
+
+
+def _fqn_selects(fqn: List[str], selector: str) -> bool:
+    """Whether a selector without a method picks the node, as DBT matches FQNs"""
+    for qualified in (fqn, fqn[1:]):  # DBT also matches without the package
+        if not qualified:
+            continue
+        if qualified[-1] == selector:
+            return True
+        flat = [part for segment in qualified for part in segment.split(".")]
+        parts = selector.split(".")
+        if len(flat) >= len(parts) and all(
+            part == "*" or part == flat[i] for i, part in enumerate(parts)
+        ):
+            return True
+    return False
+
+
+def node_selectors(manifest: Dict[str, Any], unique_ids: Iterable[str]) -> List[str]:
+    """node_selectors DBT selectors picking out exactly the given nodes
+
+    A bare name or FQN also selects nodes under a directory of that name, so each
+    is narrowed to the node's package, and its file if the name alone is
+    ambiguous. Nodes still not told apart are selected by file path, which DBT
+    only resolves within the root project.
+
+    :param manifest: DBT's `manifest` artifact
+    :type manifest: Dict[str, Any]
+    :param unique_ids: Nodes to select
+    :type unique_ids: Iterable[str]
+    :return: One selector per node, in the same order
+    :rtype: List[str]
+    """
+    nodes = manifest.get("nodes", {})
+    # A plain name selects the nodes it is the leaf, package or top directory of
+    claims: Counter = Counter()
+    by_file: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+    for unique_id, node in nodes.items():
+        package, fqn = unique_id.split(".")[1], node.get("fqn") or []
+        heads = {segment.split(".")[0] for segment in fqn[:2]} | set(fqn[-1:])
+        claims.update((package, head) for head in heads)
+        file_name = Path(node.get("original_file_path", "")).name
+        by_file[(package, file_name)].append(node)
+
+    selectors = []
+    for unique_id in unique_ids:
+        node = nodes[unique_id]
+        package, name = unique_id.split(".")[1], node["name"]
+        fqn = node.get("fqn") or []
+        file_name = Path(node.get("original_file_path", "")).name
+        if fqn[-1:] == [name] and "." not in name and claims[(package, name)] == 1:
+            selectors.append(f"package:{package},{name}")
+            continue
+        same_file = by_file[(package, file_name)]
+        if fqn and not any(
+            other is not node and _fqn_selects(other.get("fqn") or [], ".".join(fqn))
+            for other in same_file
+        ):
+            selectors.append(f"package:{package},{'.'.join(fqn)},file:{file_name}")
+        else:
+            selectors.append(f"path:{node['original_file_path']}")
+    return selectors
+
+
+def stage_selectors(
+    manifest: Dict[str, Any], stages: List[List[List[str]]]
+) -> List[List[List[str]]]:
+    """Replaces the unique ids in `plan_shards` output with `node_selectors`"""
+    return [[node_selectors(manifest, shard) for shard in stage] for stage in stages]
+
+
+def summarise_run_results(
+    run_results: Optional[Dict[str, Any]], success: bool = True
+) -> RunSummary:
+    """Condenses DBT's `run_results` artifact into a serialisable summary"""
+    if run_results is None:
+        return RunSummary(success)
+    return RunSummary(
+        success,
+        [
+            NodeResult(
+                result["unique_id"],
+                result["status"],
+                result.get("execution_time") or 0.0,
+            )
+            for result in run_results.get("results", [])
+        ],
+    )
+
+
+def merge_run_summaries(summaries: Iterable[RunSummary]) -> RunSummary:
+    """Combines shard summaries, later results for a node replace earlier ones"""
+    merged: Dict[str, NodeResult] = {}
+    success = True
+    for summary in summaries:
+        success = success and summary.success
+        for result in summary.results:
+            merged[result.unique_id] = result
+    return RunSummary(success, list(merged.values()))
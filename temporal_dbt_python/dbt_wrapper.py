@@ -1,30 +1,226 @@
 import io
+import logging
+import os
+import sys
+import threading
+import time
 import traceback
 import warnings
-from contextlib import redirect_stdout
+import weakref
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Union,
+)
 
+from temporal_dbt_python.artifacts import CompressedArtifact
 from temporal_dbt_python.dto import DbtResults
+from temporal_dbt_python.log_sink import DEFAULT_LOG_MAX_BYTES, LogSink
+from temporal_dbt_python.profiling import (
+    InvocationProfile,
+    active_profile,
+    captured_run_results,
+    profile_phase,
+)
+
+if TYPE_CHECKING:
+    from temporal_dbt_python.manifest_cache import ManifestCache
+    from temporal_dbt_python.process_pool import DbtProcessPool
+
+# DBT keeps process-wide state (flags, adapters, the working directory it moves to),
+# so in-process calls are serialised: a thread pool of activities still runs one DBT
+# call at a time. Use a `DbtProcessPool` for calls that run in parallel.
+_INVOCATION_LOCK = threading.RLock()
+_ROUTING_LOCK = threading.Lock()
+
+# Commands that parse the project, and so benefit from cached parse state
+PARSING_COMMANDS = frozenset(
+    {"build", "compile", "docs", "list", "ls", "parse", "run", "seed", "snapshot"}
+    | {"source", "test", "run-operation"}
+)
+# Commands that accept `--threads`
+THREADED_COMMANDS = frozenset(
+    {"build", "compile", "docs", "parse", "run", "seed", "snapshot", "source", "test"}
+)
 
 
 class FileCapture:
-    def __init__(self):
-        """IO Interceptor to prevent DBT from writing to disk"""
+    def __init__(self, compress: Optional[str] = None):
+        """IO Interceptor to prevent DBT from writing to disk
+
+        :param compress: Keep JSON artifacts as `CompressedArtifact`s using this
+            codec ("zstd" or "gzip"), defaults to None keeping them as written
+        :type compress: Optional[str], optional
+        """
         self.buffer: Dict[str, Any] = {}
+        self.compress = compress
 
-    def write_file(self, path: str, contents: Dict[str, Any]):
+    def write_file(self, path: str, contents: Any):
         """Stream interceptior that redirects file writes to an internal buffer"""
         key = Path(path).stem
+        if self.compress is not None and Path(path).suffix == ".json":
+            contents = CompressedArtifact.from_contents(contents, self.compress)
         self.buffer[key] = contents
 
 
+class _InvocationRoutes:
+    """Sinks belonging to the invocation currently holding the lock"""
+
+    log_sink: Optional[io.TextIOBase] = None
+    file_capture: Optional[FileCapture] = None
+    profile: Optional[InvocationProfile] = None
+    # The invoking thread and every thread started from one of the call's threads
+    threads: "weakref.WeakSet[threading.Thread]" = weakref.WeakSet()
+    original_write_file: Any = None
+    original_thread_start: Any = None
+
+    @classmethod
+    def owns_current_thread(cls) -> bool:
+        """Whether the calling thread belongs to the active invocation"""
+        return threading.current_thread() in cls.threads
+
+
+class _StdoutRouter(io.TextIOBase):
+    def __init__(self, fallback: TextIO):
+        """Process stdout replacement that sends writes to the active invocation"""
+        self.fallback = fallback
+
+    def _target(self) -> Union[TextIO, io.TextIOBase]:
+        sink = _InvocationRoutes.log_sink
+        if sink is None or not _InvocationRoutes.owns_current_thread():
+            return self.fallback
+        return sink
+
+    def write(self, text: str) -> int:
+        """Writes to the active invocation's log sink, else the original stream"""
+        profile = _InvocationRoutes.profile
+        if profile is None or not _InvocationRoutes.owns_current_thread():
+            return self._target().write(text)
+        started = time.perf_counter()
+        written = self._target().write(text)
+        profile.add("log_capture", time.perf_counter() - started)
+        return written
+
+    def flush(self):
+        """Flushes whichever stream is currently receiving output"""
+        self._target().flush()
+
+
+def _routed_write_file(path: str, contents: Any = "") -> bool:
+    """Replacement for DBT's `write_file` that captures writes for the active call"""
+    file_capture = _InvocationRoutes.file_capture
+    if file_capture is None or not _InvocationRoutes.owns_current_thread():
+        return _InvocationRoutes.original_write_file(path, contents)
+    started = time.perf_counter()
+    file_capture.write_file(path, contents)
+    if _InvocationRoutes.profile is not None:
+        _InvocationRoutes.profile.add("artifact_capture", time.perf_counter() - started)
+    return True
+
+
+def _tracked_thread_start(thread: threading.Thread):
+    """Replacement for `Thread.start`, threads a DBT call starts join its routes"""
+    if _InvocationRoutes.owns_current_thread():
+        _InvocationRoutes.threads.add(thread)
+    _InvocationRoutes.original_thread_start(thread)
+
+
+def _install_routing(capture_writes: bool):
+    """Idempotently installs the stdout router, thread tracking and logbook silencing,
+    and, if needed, the write_file patch"""
+    from logbook import Handler  # Limited context
+
+    with _ROUTING_LOCK:
+        # DBT's node threads log through logbook too, so silence it process-wide
+        Handler.blackhole = True
+        if not isinstance(sys.stdout, _StdoutRouter):
+            sys.stdout = _StdoutRouter(sys.stdout)
+        if threading.Thread.start is not _tracked_thread_start:
+            _InvocationRoutes.original_thread_start = threading.Thread.start
+            setattr(threading.Thread, "start", _tracked_thread_start)
+
+        if capture_writes:
+            import dbt.clients.system as dbt_system  # Limited context
+
+            if dbt_system.write_file is not _routed_write_file:
+                _InvocationRoutes.original_write_file = dbt_system.write_file
+                dbt_system.write_file = _routed_write_file
+
+
+def _prune_stdout_handlers():
+    """DBT adds a stdout handler per call, drop ours so output isn't duplicated"""
+    stdout_log = logging.getLogger("configured_std_out")
+    stdout_log.handlers = [
+        handler
+        for handler in stdout_log.handlers
+        if not isinstance(getattr(handler, "stream", None), _StdoutRouter)
+    ]
+
+
+@contextmanager
+def invocation_context(
+    log_sink: io.TextIOBase, file_capture: Optional[FileCapture] = None
+) -> Iterator[None]:
+    """invocation_context Isolates the state a single DBT call touches
+
+    Routes stdout and (optionally) artifact writes from the calling thread, and any
+    thread it starts, to the per-call sinks, and restores the working directory DBT
+    moves into once the call completes. Calls are serialised across the process, use
+    a `DbtProcessPool` to run DBT in parallel.
+
+    :param log_sink: Stream receiving everything DBT prints
+    :type log_sink: io.TextIOBase
+    :param file_capture: Interceptor for artifact writes, defaults to None
+    :type file_capture: Optional[FileCapture], optional
+    """
+    warnings.filterwarnings("ignore", category=DeprecationWarning, module="logbook")
+    _install_routing(file_capture is not None)
+    with _INVOCATION_LOCK:
+        cwd = os.getcwd()
+        _InvocationRoutes.log_sink = log_sink
+        _InvocationRoutes.file_capture = file_capture
+        _InvocationRoutes.profile = active_profile()
+        _InvocationRoutes.threads = weakref.WeakSet([threading.current_thread()])
+        try:
+            yield
+        finally:
+            _InvocationRoutes.threads = weakref.WeakSet()
+            _InvocationRoutes.log_sink = None
+            _InvocationRoutes.file_capture = None
+            _InvocationRoutes.profile = None
+            _prune_stdout_handlers()
+            os.chdir(cwd)
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of the current process's resident set size in megabytes
+
+    This is the peak over the process's lifetime so far, not of a single call.
+    """
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
 def invoke_dbt(args: List[str]) -> int:
     """Isolate DBT call to util function"""
-    from dbt import exceptions
-    from dbt import main as dbt_main
-    from dbt.events import functions, types
-    from dbt.utils import ExitCodes
+    with profile_phase("dbt_import"):
+        from dbt import exceptions
+        from dbt import main as dbt_main
+        from dbt.events import functions, types
+        from dbt.utils import ExitCodes
 
     dbt_main.log_manager.set_path(None)
     try:
@@ -40,35 +236,201 @@ def invoke_dbt(args: List[str]) -> int:
     return exit_code
 
 
+def profiles_dir(profile_location: Optional[str] = None) -> str:
+    """Directory DBT reads `profiles.yml` from, as `--profiles-dir` would resolve"""
+    if profile_location is not None:
+        return str(Path(profile_location).absolute())
+    from dbt import flags  # Limited context
+
+    return os.path.expanduser(os.getenv("DBT_PROFILES_DIR", flags.DEFAULT_PROFILES_DIR))
+
+
+def profile_threads(
+    env: str, project_location: str, profile_location: Optional[str] = None
+) -> Optional[int]:
+    """Threads the profile's target runs DBT with, None if unset or templated"""
+    from dbt.config.profile import read_profile
+
+    from temporal_dbt_python.manifest_cache import project_config
+
+    profile_name = project_config(project_location).get("profile")
+    if profile_name is None:
+        return None
+    try:
+        profiles = read_profile(profiles_dir(profile_location))
+        threads = profiles[profile_name]["outputs"][env].get("threads")
+    except Exception:  # Missing or malformed profiles
+        return None
+    return threads if isinstance(threads, int) else None
+
+
+def probe_connection(
+    env: str,
+    project_location: str,
+    profile_location: Optional[str] = None,
+) -> Optional[str]:
+    """probe_connection Opens a warehouse connection the way `dbt debug` does
+
+    Only the profile is read, so the project isn't loaded or checked and no logs
+    or artifacts are produced.
+
+    :param env: Target in the profile to connect with
+    :type env: str
+    :param project_location: Filepath to the DBT project, read for its profile name
+    :type project_location: str
+    :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
+    :type profile_location: Optional[str], optional
+    :return: DBT's error message, or None if the connection succeeded
+    :rtype: Optional[str]
+    """
+    from dbt.adapters.factory import adapter_management
+    from dbt.config.profile import Profile, read_profile
+    from dbt.config.renderer import ProfileRenderer
+    from dbt.task.debug import DebugTask
+
+    from temporal_dbt_python.manifest_cache import project_config
+
+    profile_name = project_config(project_location).get("profile")
+    if profile_name is None:
+        return f"No profile named in {project_location}/dbt_project.yml"
+    with _INVOCATION_LOCK:
+        try:
+            profile = Profile.from_raw_profiles(
+                read_profile(profiles_dir(profile_location)),
+                profile_name,
+                ProfileRenderer({}),
+                target_override=env,
+            )
+            with adapter_management():
+                return DebugTask.attempt_connection(profile)
+        except Exception as e:  # Missing profiles or adapter plugins
+            return str(e)
+
+
+@contextmanager
+def _cached_parse(
+    manifest_cache: Optional["ManifestCache"],
+    project_location: str,
+    env: str,
+    dbt_commands: List[str],
+) -> Iterator[None]:
+    """Restores cached parse state for the block, storing DBT's if it succeeds"""
+    if manifest_cache is None or dbt_commands[0] not in PARSING_COMMANDS:
+        yield
+        return
+    with profile_phase("manifest_cache_restore"):
+        fingerprint = manifest_cache.restore(project_location, env)
+    yield
+    with profile_phase("manifest_cache_store"):
+        manifest_cache.store(project_location, env, fingerprint)
+
+
 def dbt_handler(
     env: str,
     project_location: str,
     dbt_commands: List[str],
     profile_location: Optional[str] = None,
     prevent_writes: bool = False,
+    process_pool: Optional["DbtProcessPool"] = None,
+    manifest_cache: Optional["ManifestCache"] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    log_max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+    log_spill_dir: Optional[str] = None,
+    structured_logs: bool = False,
+    compress_artifacts: Optional[str] = None,
+    results_callback: Optional[Callable[[List[str], DbtResults, float], None]] = None,
+    threads: Optional[int] = None,
+    profiling: Optional[str] = None,
 ) -> DbtResults:
-    """Wrapper interface to the DBT API"""
-    from logbook import Handler
+    """Wrapper interface to the DBT API
+
+    In-process calls run one at a time, pass a `process_pool` to run them in parallel
+    """
+    # DBT changes directory, so pin paths to where they point at call time
+    project_location = str(Path(project_location).absolute())
+    if profile_location is not None:
+        profile_location = str(Path(profile_location).absolute())
 
-    Handler.blackhole = True
+    # Profiled where DBT runs, so a process pool's subprocess profiles itself
+    profile = None
+    if profiling is not None and active_profile() is None and process_pool is None:
+        profile = InvocationProfile(profiling)
 
-    # Set up monkey patch to capture file writes
-    file_capture = FileCapture()
+    with nullcontext() if profile is None else profile.activate():
+        started = time.monotonic()
+        with _cached_parse(manifest_cache, project_location, env, dbt_commands):
+            if process_pool is not None:
+                # Hand off to a warm subprocess, which runs this same function
+                results = process_pool.execute(
+                    env,
+                    project_location,
+                    dbt_commands,
+                    profile_location,
+                    prevent_writes,
+                    progress_callback=progress_callback,
+                    log_max_bytes=log_max_bytes,
+                    log_spill_dir=log_spill_dir,
+                    structured_logs=structured_logs,
+                    compress_artifacts=compress_artifacts,
+                    threads=threads,
+                    profiling=profiling,
+                )
+            else:
+                results = _invoke_in_process(
+                    env,
+                    project_location,
+                    dbt_commands,
+                    profile_location,
+                    prevent_writes,
+                    progress_callback,
+                    log_max_bytes,
+                    log_spill_dir,
+                    structured_logs,
+                    compress_artifacts,
+                    threads,
+                )
+        # Reported in the calling process, whichever process DBT ran in
+        if results_callback is not None:
+            with profile_phase("results_callback"):
+                results_callback(dbt_commands, results, time.monotonic() - started)
 
-    if prevent_writes:
-        import dbt.clients.system as dbt_system  # Limited context
+    if profile is not None:
+        run_results = captured_run_results(
+            results.outputs, project_location, profile.started_at
+        )
+        results.outputs.update(profile.artifacts(dbt_commands, run_results))
+    return results
 
-        file_capture = FileCapture()
-        dbt_system.write_file = file_capture.write_file
 
-    # STDOUT capture
-    warnings.filterwarnings("ignore", category=DeprecationWarning, module="logbook")
-    handle = io.StringIO()
+def _invoke_in_process(
+    env: str,
+    project_location: str,
+    dbt_commands: List[str],
+    profile_location: Optional[str],
+    prevent_writes: bool,
+    progress_callback: Optional[Callable[[int, int], None]],
+    log_max_bytes: int,
+    log_spill_dir: Optional[str],
+    structured_logs: bool,
+    compress_artifacts: Optional[str],
+    threads: Optional[int],
+) -> DbtResults:
+    """Runs DBT in this process, capturing its output as `dbt_handler` describes"""
+    # Per-call capture of file writes and STDOUT, keeping only the log's tail
+    file_capture = FileCapture(compress_artifacts) if prevent_writes else None
+    spill_path = None
+    if log_spill_dir is not None:
+        spill_name = f"dbt-{dbt_commands[0]}-{time.time_ns()}-{os.getpid()}.log"
+        spill_path = str(Path(log_spill_dir, spill_name).absolute())
+        logging.info(f"Writing full DBT log to {spill_path}")
+    handle = LogSink(
+        log_max_bytes,
+        spill_path,
+        progress_callback=progress_callback,
+        structured=structured_logs,
+    )
     args = (
-        [
-            #     "--log-format",
-            #     "json",
-        ]
+        (["--log-format", "json"] if structured_logs else [])
         + dbt_commands
         + [
             "--project-dir",
@@ -79,10 +441,20 @@ def dbt_handler(
     )
     if profile_location is not None:
         args.extend(["--profiles-dir", profile_location])
+    if dbt_commands[0] not in THREADED_COMMANDS:
+        threads = None
+    if threads is not None:
+        args.extend(["--threads", str(threads)])
 
     # Reproduce DBT call interface with printout redirect
-    with redirect_stdout(handle):
+    with invocation_context(handle, file_capture), profile_phase("dbt_invocation"):
         exit_code = invoke_dbt(args)
+    handle.close()
     return DbtResults(
-        exit_code, handle.getvalue(), file_capture.buffer if prevent_writes else {}
+        exit_code,
+        handle.getvalue(),
+        {} if file_capture is None else file_capture.buffer,
+        handle.events,
+        peak_rss_mb(),
+        threads,
     )
@@ -0,0 +1,60 @@
+import hashlib
+import time
+from pathlib import Path
+from typing import Optional
+
+from temporal_dbt_python.concurrency import warehouse_key
+from temporal_dbt_python.dbt_wrapper import profiles_dir
+from temporal_dbt_python.json_store import JsonStore
+
+
+def debug_cache_key(
+    env: str, project_location: str, profile_location: Optional[str] = None
+) -> str:
+    """debug_cache_key Identifies a connection check by profile, target and profiles
+
+    :param env: Target the check connects with
+    :type env: str
+    :param project_location: Filepath to the DBT project
+    :type project_location: str
+    :param profile_location: Filepath for DBT's `profile.yaml`, defaults to None
+    :type profile_location: Optional[str], optional
+    :return: `warehouse_key` with a digest of `profiles.yml`, so edited credentials
+        are checked again
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    profiles_file = Path(profiles_dir(profile_location), "profiles.yml")
+    if profiles_file.exists():
+        digest.update(profiles_file.read_bytes())
+    return f"{warehouse_key(project_location, env)}--{digest.hexdigest()[:16]}"
+
+
+class DebugCache:
+    def __init__(self, path: str, ttl: float = 300.0) -> None:
+        """DebugCache Remembers recent successful connection checks
+
+        Kept in a local JSON file. Failures aren't stored, so a broken connection
+        is checked again on the next attempt.
+
+        :param path: JSON file to keep the cache in, created if missing
+        :type path: str
+        :param ttl: Seconds a successful check is trusted for, defaults to 300.0
+        :type ttl: float, optional
+        """
+        self.store = JsonStore(path)
+        self.ttl = ttl
+
+    def passed(self, key: str) -> bool:
+        """Whether the connection was checked successfully within the TTL"""
+        checked = self.store.read().get(key)
+        return checked is not None and 0 <= time.time() - checked < self.ttl
+
+    def record(self, key: str):
+        """Stores a successful check, dropping entries that have expired"""
+        with self.store.transaction() as cache:
+            now = time.time()
+            for cached, checked in list(cache.items()):
+                if now - checked >= self.ttl:
+                    del cache[cached]
+            cache[key] = now
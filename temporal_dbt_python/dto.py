@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
 
 @dataclass
@@ -7,10 +7,93 @@ class OperationRequest:
     env: str
     project_location: str
     profile_location: Optional[str] = None
+    select: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
+    state_mode: Optional[str] = None
+    full_refresh: bool = False
+    threads: Optional[int] = None
+    profiling: Optional[str] = None
+    source_loaded_at: Optional[Dict[str, str]] = None
+
+
+@dataclass
+class NodeEvent:
+    unique_id: str
+    kind: str
+    status: Optional[str] = None
+    timestamp: Optional[str] = None
+    execution_time: Optional[float] = None
+    rows_affected: Optional[int] = None
 
 
 @dataclass
 class DbtResults:
     exit_code: int
     log_string: str
-    outputs: Dict[str, Dict[str, Any]]
+    outputs: Dict[str, Any]
+    events: List[NodeEvent] = field(default_factory=list)
+    peak_rss_mb: float = 0.0
+    threads: Optional[int] = None
+
+
+@dataclass
+class NodeResult:
+    unique_id: str
+    status: str
+    execution_time: float = 0.0
+
+
+@dataclass
+class RunSummary:
+    success: bool
+    results: List[NodeResult] = field(default_factory=list)
+    predicted_makespan: Optional[float] = None
+    makespan: Optional[float] = None
+
+
+@dataclass
+class ShardPlan:
+    stages: List[List[List[str]]]
+    predicted_makespan: Optional[float] = None
+
+
+@dataclass
+class NodeMetrics:
+    unique_id: str
+    status: str
+    execution_time: float = 0.0
+    rows_affected: Optional[int] = None
+    bytes_processed: Optional[int] = None
+
+
+@dataclass
+class ActivityMetrics:
+    activity: str
+    env: str
+    project: str
+    exit_code: int
+    wall_time: float
+    parse_time: Optional[float] = None
+    peak_rss_mb: float = 0.0
+    nodes: List[NodeMetrics] = field(default_factory=list)
+    threads: Optional[int] = None
+
+
+@dataclass
+class FreshnessReport:
+    fresh: Optional[List[str]] = None
+    loaded_at: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class BatchSummary:
+    succeeded: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchRequest:
+    requests: List[OperationRequest]
+    depends_on: Dict[str, List[str]] = field(default_factory=dict)
+    summary: BatchSummary = field(default_factory=BatchSummary)
@@ -1,2 +1,22 @@
+from typing import List
+
+
 class WorkflowExecutionError(ValueError):
     pass
+
+
+class PartialRunError(WorkflowExecutionError):
+    def __init__(self, message: str, completed: List[str]):
+        """Failed DBT run that still built some nodes
+
+        :param message: Error description
+        :type message: str
+        :param completed: Unique ids of the nodes built so far, by this attempt or
+            earlier ones
+        :type completed: List[str]
+        """
+        super().__init__(message, completed)
+        self.completed = completed
+
+    def __str__(self) -> str:
+        return self.args[0]
@@ -0,0 +1,206 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from temporal_dbt_python.artifacts import CompressedArtifact
+
+# (identifier, artifact name, contents as captured)
+ExportItem = Tuple[str, str, Any]
+
+
+def artifact_chunks(contents: Any) -> Iterator[bytes]:
+    """Serialises captured artifact contents, streaming compressed artifacts"""
+    if isinstance(contents, CompressedArtifact):
+        yield from contents.iter_chunks()
+    elif isinstance(contents, bytes):
+        yield contents
+    elif isinstance(contents, str):
+        yield contents.encode("utf-8")
+    else:
+        yield json.dumps(contents).encode("utf-8")
+
+
+class LocalFileStore:
+    def __init__(self, root_dir: str) -> None:
+        """LocalFileStore Artifact store writing to `<root>/<identifier>/<name>`
+
+        :param root_dir: Directory artifacts are exported to
+        :type root_dir: str
+        """
+        self.root_dir = Path(root_dir)
+
+    def put_batch(self, items: List[ExportItem]):
+        """Writes each artifact to its own file"""
+        for identifier, name, contents in items:
+            export_dir = Path(self.root_dir, identifier)
+            export_dir.mkdir(parents=True, exist_ok=True)
+            with open(Path(export_dir, name), "wb") as f:
+                for chunk in artifact_chunks(contents):
+                    f.write(chunk)
+
+
+class SQLiteStore:
+    def __init__(self, db_path: str) -> None:
+        """SQLiteStore Artifact store keeping every export in a SQLite table
+
+        :param db_path: Database file, created if missing
+        :type db_path: str
+        """
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                "identifier TEXT, name TEXT, contents BLOB, exported_at REAL, "
+                "PRIMARY KEY (identifier, name))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def put_batch(self, items: List[ExportItem]):
+        """Writes the whole batch in a single transaction"""
+        exported_at = time.time()
+        rows = [
+            (identifier, name, b"".join(artifact_chunks(contents)), exported_at)
+            for identifier, name, contents in items
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?)", rows
+            )
+
+    def get(self, identifier: str, name: str) -> Optional[bytes]:
+        """Reads an exported artifact back"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT contents FROM artifacts WHERE identifier = ? AND name = ?",
+                (identifier, name),
+            ).fetchone()
+        return None if row is None else row[0]
+
+
+class ArtifactExporter:
+    def __init__(
+        self,
+        store: Any,
+        max_workers: int = 4,
+        batch_size: int = 16,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        max_queued: int = 0,
+    ) -> None:
+        """ArtifactExporter Background export of DBT artifacts from a worker
+
+        Use an instance as `store_output_callback`. Calls only queue the outputs, so
+        activities return as soon as DBT finishes, and an export that fails after
+        its retries is logged rather than failing the run. Queued artifacts are
+        grouped into batches and handed to `store.put_batch` on a bounded pool of
+        threads. Keep the exporter in the worker process, it isn't picklable.
+
+        :param store: Object with a `put_batch(items)` method, e.g. `LocalFileStore`
+        :type store: Any
+        :param max_workers: Batches uploaded concurrently, defaults to 4
+        :type max_workers: int, optional
+        :param batch_size: Artifacts per batch, defaults to 16
+        :type batch_size: int, optional
+        :param max_retries: Attempts per batch, defaults to 3
+        :type max_retries: int, optional
+        :param backoff: Seconds before the first retry, doubling after each,
+            defaults to 1.0
+        :type backoff: float, optional
+        :param max_queued: Outputs queued before callers block, defaults to 0 for
+            no limit
+        :type max_queued: int, optional
+        """
+        self.store = store
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.failed: List[ExportItem] = []
+        self._queue: "queue.Queue[Optional[ExportItem]]" = queue.Queue(max_queued)
+        self._uploads = ThreadPoolExecutor(max_workers, "artifact-export")
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def __call__(self, identifier: str, outputs: Dict[str, Any]) -> bool:
+        """Queues every artifact in the outputs for export"""
+        for name, contents in outputs.items():
+            with self._idle:
+                self._pending += 1
+            self._queue.put((identifier, name, contents))
+        return True
+
+    def _dispatch(self):
+        """Groups queued artifacts into batches and hands them to the upload pool"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # Finish this batch, then stop
+                    break
+                batch.append(item)
+            self._slots.acquire()  # Bounds memory held by in-flight batches
+            self._uploads.submit(self._upload, batch)
+
+    def _upload(self, batch: List[ExportItem]):
+        try:
+            for attempt in range(self.max_retries):
+                try:
+                    self.store.put_batch(batch)
+                    return
+                except Exception as e:
+                    logging.warning(
+                        f"Artifact export attempt {attempt + 1} failed: {e!r}"
+                    )
+                    if attempt + 1 < self.max_retries:
+                        time.sleep(self.backoff * 2**attempt)
+            logging.error(
+                "Giving up exporting "
+                + ", ".join(f"{identifier}/{name}" for identifier, name, _ in batch)
+            )
+            self.failed.extend(batch)
+        finally:
+            self._slots.release()
+            with self._idle:
+                self._pending -= len(batch)
+                self._idle.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """flush Waits for everything queued so far to be exported or given up on
+
+        :param timeout: Seconds to wait, defaults to None waiting indefinitely
+        :type timeout: Optional[float], optional
+        :return: True if the queue drained within the timeout
+        :rtype: bool
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Exports whatever is queued, then stops the background threads"""
+        self.flush(timeout)
+        self._queue.put(None)
+        self._dispatcher.join(timeout)
+        self._uploads.shutdown(wait=True)
+
+    def __enter__(self) -> "ArtifactExporter":
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.close()
@@ -0,0 +1,66 @@
+from typing import Any, Dict, List, Optional
+
+from temporal_dbt_python.json_store import JsonStore
+
+FRESH_STATUSES = frozenset({"pass", "warn"})
+
+
+def source_selector(unique_id: str) -> str:
+    """DBT selector for a source and everything downstream of it"""
+    _, _, source_name, table_name = unique_id.split(".", 3)
+    return f"source:{source_name}.{table_name}+"
+
+
+def fresh_sources(
+    freshness: Dict[str, Any], refreshed: Optional[Dict[str, str]] = None
+) -> List[str]:
+    """fresh_sources Sources with data the transforms haven't seen yet
+
+    :param freshness: DBT's `sources` artifact
+    :type freshness: Dict[str, Any]
+    :param refreshed: `max_loaded_at` of each source at the last successful refresh,
+        defaults to None which uses DBT's freshness thresholds instead
+    :type refreshed: Optional[Dict[str, str]], optional
+    :return: Unique ids of sources that have new data, or couldn't be checked
+    :rtype: List[str]
+    """
+    fresh = []
+    for result in freshness.get("results", []):
+        loaded_at = result.get("max_loaded_at")
+        if loaded_at is None:
+            fresh.append(result["unique_id"])  # Runtime error, assume new data
+        elif refreshed is None:
+            if result.get("status") in FRESH_STATUSES:
+                fresh.append(result["unique_id"])
+        elif refreshed.get(result["unique_id"]) != loaded_at:
+            fresh.append(result["unique_id"])
+    return sorted(fresh)
+
+
+class FreshnessStore:
+    def __init__(self, path: str) -> None:
+        """FreshnessStore When each source was last loaded, as of the last refresh
+
+        Kept in a local JSON file per project and target. Sources loaded since are
+        the ones whose downstream models need rebuilding.
+
+        :param path: JSON file to keep the load times in, created if missing
+        :type path: str
+        """
+        self.store = JsonStore(path)
+
+    def refreshed(self, key: str) -> Dict[str, str]:
+        """`max_loaded_at` of each source at the project's last successful refresh"""
+        return self.store.read().get(key, {})
+
+    def commit(self, key: str, loaded_at: Dict[str, str]):
+        """commit Records the source load times a successful refresh consumed
+
+        :param key: Project and warehouse the refresh was executed against, see
+            `project_key`
+        :type key: str
+        :param loaded_at: `max_loaded_at` of each source checked before the refresh
+        :type loaded_at: Dict[str, str]
+        """
+        with self.store.transaction() as store:
+            store.setdefault(key, {}).update(loaded_at)
@@ -0,0 +1,72 @@
+import statistics
+from typing import Any, Callable, Dict, Optional
+
+from temporal_dbt_python.json_store import JsonStore
+
+TIMED_STATUSES = frozenset({"success", "pass", "warn", "fail", "error"})
+
+
+class DurationHistory:
+    def __init__(
+        self,
+        path: str,
+        smoothing: float = 0.5,
+        default_duration: Optional[float] = None,
+    ) -> None:
+        """DurationHistory Local record of how long each DBT node takes to run
+
+        Durations are an exponentially weighted average of the `execution_time`
+        DBT reports in `run_results`, kept per project and target in a JSON file.
+
+        :param path: JSON file to keep the history in, created if missing
+        :type path: str
+        :param smoothing: Weight given to the latest run, defaults to 0.5
+        :type smoothing: float, optional
+        :param default_duration: Estimate for nodes without history, defaults to
+            None which uses the median of the known nodes
+        :type default_duration: Optional[float], optional
+        """
+        self.store = JsonStore(path)
+        self.smoothing = smoothing
+        self.default_duration = default_duration
+
+    def durations(self, key: str) -> Dict[str, float]:
+        """Average duration of each of the project's nodes, in seconds"""
+        return self.store.read().get(key, {})
+
+    def update(self, key: str, run_results: Optional[Dict[str, Any]]):
+        """update Folds a run's node timings into the history
+
+        :param key: Project and warehouse the run was executed against, see
+            `project_key`
+        :type key: str
+        :param run_results: DBT's `run_results` artifact
+        :type run_results: Optional[Dict[str, Any]]
+        """
+        if run_results is None:
+            return
+        with self.store.transaction() as history:
+            durations = history.setdefault(key, {})
+            for result in run_results.get("results", []):
+                if result.get("status") not in TIMED_STATUSES:
+                    continue
+                latest = result.get("execution_time") or 0.0
+                previous = durations.get(result["unique_id"], latest)
+                durations[result["unique_id"]] = (
+                    self.smoothing * latest + (1 - self.smoothing) * previous
+                )
+
+    def estimator(self, key: str) -> Callable[[str], float]:
+        """estimator Cost function for scheduling a project's nodes
+
+        :param key: Project and warehouse the run will be executed against, see
+            `project_key`
+        :type key: str
+        :return: Estimated seconds for a node's unique id
+        :rtype: Callable[[str], float]
+        """
+        durations = self.durations(key)
+        default = self.default_duration
+        if default is None:
+            default = statistics.median(durations.values()) if durations else 1.0
+        return lambda unique_id: durations.get(unique_id, default)
@@ -0,0 +1,50 @@
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+
+class JsonStore:
+    def __init__(self, path: str) -> None:
+        """JsonStore A JSON object in a local file, shared by threads and processes
+
+        Updates hold an exclusive `flock` on a sidecar `.lock` file, so concurrent
+        read-modify-writes from any process on the host are serialised. The file
+        is replaced atomically, so plain reads never see a partial write. Only
+        the path is kept, so stores can be sent to process executors.
+
+        :param path: JSON file to keep the object in, created if missing
+        :type path: str
+        """
+        self.path = path
+
+    def read(self) -> Dict[str, Any]:
+        """The stored object, empty if the file is missing or unreadable"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Any]]:
+        """transaction Locks the store and yields its object to modify in place
+
+        The object is written back when the block exits without an exception.
+
+        :yield: The stored object
+        :rtype: Iterator[Dict[str, Any]]
+        """
+        import fcntl  # POSIX only
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # Released when the file closes
+            contents = self.read()
+            yield contents
+            staging = f"{self.path}.{uuid.uuid4().hex}"
+            with open(staging, "w", encoding="utf-8") as f:
+                json.dump(contents, f)
+            os.replace(staging, self.path)
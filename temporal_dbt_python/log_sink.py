@@ -0,0 +1,220 @@
+import io
+import json
+import os
+import re
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, TextIO
+
+from temporal_dbt_python.dto import NodeEvent
+
+DEFAULT_LOG_MAX_BYTES = 1024 * 1024
+DEFAULT_SPILL_MAX_BYTES = 64 * 1024 * 1024
+
+# DBT prefixes node lines with e.g. "3 of 40 START", "3 of 40 OK created"
+NODE_PROGRESS = re.compile(r"\b(\d+) of (\d+) (START|OK|PASS|WARN|ERROR|FAIL|SKIP)\b")
+
+NODE_STATUSES = {
+    "OK": "success",
+    "PASS": "pass",
+    "WARN": "warn",
+    "ERROR": "error",
+    "FAIL": "fail",
+    "SKIP": "skipped",
+}
+ROWS_AFFECTED = re.compile(r"(\d+)$")
+# DBT truncates `execution_time` to an int in event data, the message keeps 2dp
+EXECUTION_TIME = re.compile(r" in (\d+(?:\.\d+)?)s\]$")
+
+
+def node_event(line: str) -> Optional[NodeEvent]:
+    """node_event Reads a per-node event from one of DBT's JSON log lines
+
+    DBT's console events only carry the node and its progress line, so the status
+    and timing come from the progress line and rows affected from the adapter's
+    status message, e.g. "SELECT 42".
+
+    :param line: A line of `--log-format json` output
+    :type line: str
+    :return: The event, or None if the line isn't about a node starting or finishing
+    :rtype: Optional[NodeEvent]
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    data = record.get("data") or {}
+    node_info = data.get("node_info") or {}
+    progress = NODE_PROGRESS.search(record.get("msg") or "")
+    if not node_info.get("unique_id") or progress is None:
+        return None
+
+    if progress.group(3) == "START":
+        return NodeEvent(node_info["unique_id"], "start", timestamp=record.get("ts"))
+
+    rows = ROWS_AFFECTED.search(str(data.get("status") or ""))
+    timing = EXECUTION_TIME.search(record["msg"])
+    return NodeEvent(
+        node_info["unique_id"],
+        "finish",
+        status=NODE_STATUSES[progress.group(3)],
+        timestamp=record.get("ts"),
+        execution_time=float(timing.group(1)) if timing else data.get("execution_time"),
+        rows_affected=int(rows.group(1)) if rows else None,
+    )
+
+
+def parse_node_events(lines: Iterable[str]) -> Iterator[NodeEvent]:
+    """parse_node_events Lazily turns DBT JSON log lines into node events
+
+    :param lines: Lines of `--log-format json` output, e.g. an open spill file
+    :type lines: Iterable[str]
+    :yield: Node start and finish events in log order
+    :rtype: Iterator[NodeEvent]
+    """
+    for line in lines:
+        event = node_event(line)
+        if event is not None:
+            yield event
+
+
+def _encoded_size(text: str) -> int:
+    """Bytes the text takes as UTF-8"""
+    return len(text) if text.isascii() else len(text.encode())
+
+
+def _clip(text: str, max_bytes: int) -> str:
+    """End of the text, at most `max_bytes` as UTF-8"""
+    if _encoded_size(text) <= max_bytes:
+        return text
+    return text.encode()[-max_bytes:].decode(errors="ignore")
+
+
+def log_tail(log_string: str, lines: int = 20) -> str:
+    """Last few lines of a DBT log, for error messages"""
+    return "\n".join(log_string.rstrip("\n").splitlines()[-lines:])
+
+
+class LogSink(io.TextIOBase):
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        spill_path: Optional[str] = None,
+        spill_max_bytes: int = DEFAULT_SPILL_MAX_BYTES,
+        spill_backups: int = 3,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        structured: bool = False,
+    ):
+        """LogSink Streaming destination for DBT's console output
+
+        Keeps only the most recent `max_bytes` of output in memory, plus at most as
+        much of a line that hasn't been terminated yet. The full log can
+        be spilled to a file that rotates once it passes `spill_max_bytes`. Node
+        completion lines are counted as they arrive and reported through
+        `progress_callback(completed, total)`. Structured output is parsed into
+        `events` as it arrives, and the tail keeps each line's message only.
+
+        :param max_bytes: Size of the in-memory tail, defaults to 1MB
+        :type max_bytes: int, optional
+        :param spill_path: File to write the full log to, defaults to None
+        :type spill_path: Optional[str], optional
+        :param spill_max_bytes: Size the spill file rotates at, defaults to 64MB
+        :type spill_max_bytes: int, optional
+        :param spill_backups: Rotated spill files kept, defaults to 3
+        :type spill_backups: int, optional
+        :param progress_callback: Called with completed and total node counts,
+            defaults to None
+        :type progress_callback: Optional[Callable[[int, int], None]], optional
+        :param structured: Output is DBT's `--log-format json`, defaults to False
+        :type structured: bool, optional
+        """
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self.spill_backups = spill_backups
+        self.progress_callback = progress_callback
+        self.structured = structured
+        self.events: List[NodeEvent] = []
+        self.completed = 0
+        self.total = 0
+        self._tail: Deque[str] = deque()
+        self._tail_bytes = 0
+        self._partial = ""
+        self._spill: Optional[TextIO] = None
+        if spill_path is not None:
+            Path(spill_path).parent.mkdir(parents=True, exist_ok=True)
+            self._spill = open(spill_path, "a", encoding="utf-8")
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        """Adds output to the tail and spill file, reporting any node progress"""
+        if self._spill is not None:
+            self._spill.write(text)
+            if self._spill.tell() >= self.spill_max_bytes:
+                self._rotate()
+
+        lines = (self._partial + text).split("\n")
+        self._partial = _clip(lines.pop(), self.max_bytes)
+        for line in lines:
+            if self.structured:
+                line = self._track_event(line)
+            self._append(line + "\n")
+            self._track_progress(line)
+        return len(text)
+
+    def _track_event(self, line: str) -> str:
+        """Records any node event, returning the line's human readable message"""
+        event = node_event(line)
+        if event is not None:
+            self.events.append(event)
+        try:
+            return json.loads(line)["msg"]
+        except (ValueError, KeyError, TypeError):
+            return line
+
+    def _append(self, line: str):
+        line = _clip(line, self.max_bytes)
+        self._tail.append(line)
+        self._tail_bytes += _encoded_size(line)
+        while self._tail_bytes > self.max_bytes:
+            self._tail_bytes -= _encoded_size(self._tail.popleft())
+
+    def _track_progress(self, line: str):
+        match = NODE_PROGRESS.search(line)
+        if match is None or match.group(3) == "START":
+            return
+        self.completed += 1
+        self.total = max(self.total, int(match.group(2)))
+        if self.progress_callback is not None:
+            self.progress_callback(self.completed, self.total)
+
+    def _rotate(self):
+        self._spill.close()
+        for index in range(self.spill_backups - 1, 0, -1):
+            if os.path.exists(f"{self.spill_path}.{index}"):
+                os.replace(
+                    f"{self.spill_path}.{index}", f"{self.spill_path}.{index + 1}"
+                )
+        if self.spill_backups > 0:
+            os.replace(self.spill_path, f"{self.spill_path}.1")
+        else:
+            os.remove(self.spill_path)
+        self._spill = open(self.spill_path, "a", encoding="utf-8")
+
+    def flush(self):
+        if self._spill is not None:
+            self._spill.flush()
+
+    def getvalue(self) -> str:
+        """The retained tail of the log, including any unterminated last line"""
+        return "".join(self._tail) + self._partial
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        super().close()
@@ -0,0 +1,132 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+PARTIAL_PARSE_FILE_NAME = "partial_parse.msgpack"
+UNHASHED_DIRS = frozenset({"target", "logs"})
+
+
+def project_config(project_location: str) -> Dict[str, Any]:
+    """The project's `dbt_project.yml`, empty if there isn't one"""
+    project_file = Path(project_location, "dbt_project.yml")
+    if not project_file.exists():
+        return {}
+    import yaml  # Shipped with DBT
+
+    with open(project_file, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def project_target_path(project_location: str) -> Path:
+    """Location of the project's target directory, honouring `target-path`"""
+    target_path = project_config(project_location).get("target-path", "target")
+    return Path(project_location, target_path)
+
+
+def hash_project_files(project_location: str) -> str:
+    """hash_project_files Content hash of every file DBT may parse in a project
+
+    :param project_location: Filepath to the DBT project
+    :type project_location: str
+    :return: Hex digest covering relative paths and file contents
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    root = Path(project_location)
+    for dir_path, dir_names, file_names in os.walk(root):
+        # Prune in place so os.walk skips generated and hidden directories
+        dir_names[:] = sorted(
+            d for d in dir_names if d not in UNHASHED_DIRS and not d.startswith(".")
+        )
+        for file_name in sorted(file_names):
+            file_path = Path(dir_path, file_name)
+            digest.update(str(file_path.relative_to(root)).encode())
+            digest.update(file_path.read_bytes())
+    return digest.hexdigest()
+
+
+class ManifestCache:
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024) -> None:
+        """ManifestCache Keeps DBT's partial parse state between invocations
+
+        Entries are keyed by project path, target and a hash of the project's
+        files. The saved state is restored into the project's target directory
+        before each parsing command, so runs after a `dbt clean` or in a fresh
+        workflow skip the full parse. DBT still validates the state it is given.
+
+        :param max_bytes: Memory budget for cached state, least recently used
+            entries are evicted beyond this, defaults to 512MB
+        :type max_bytes: int, optional
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of the cached parse state"""
+        return sum(len(state) for state in self._entries.values())
+
+    def restore(self, project_location: str, env: str) -> str:
+        """restore Writes cached parse state into the project if the files match
+
+        Any entries for the same project and target with a different file hash are
+        stale and dropped.
+
+        :param project_location: Filepath to the DBT project
+        :type project_location: str
+        :param env: Target the state was parsed for
+        :type env: str
+        :return: File hash to pass back to `store` once DBT has finished
+        :rtype: str
+        """
+        project = str(Path(project_location).absolute())
+        fingerprint = hash_project_files(project)
+        with self._lock:
+            for key in list(self._entries):
+                if key[:2] == (project, env) and key[2] != fingerprint:
+                    del self._entries[key]
+            state = self._entries.get((project, env, fingerprint))
+            if state is not None:
+                self._entries.move_to_end((project, env, fingerprint))
+
+        if state is not None:
+            target_path = project_target_path(project)
+            target_path.mkdir(parents=True, exist_ok=True)
+            Path(target_path, PARTIAL_PARSE_FILE_NAME).write_bytes(state)
+            logging.info(f"Restored cached parse state for {project} ({env})")
+        return fingerprint
+
+    def store(self, project_location: str, env: str, fingerprint: str):
+        """store Saves the parse state DBT left in the project's target directory
+
+        :param project_location: Filepath to the DBT project
+        :type project_location: str
+        :param env: Target the state was parsed for
+        :type env: str
+        :param fingerprint: File hash returned by `restore` before the invocation
+        :type fingerprint: str
+        """
+        project = str(Path(project_location).absolute())
+        state_file = Path(project_target_path(project), PARTIAL_PARSE_FILE_NAME)
+        if not state_file.exists():
+            return
+        state = state_file.read_bytes()
+
+        with self._lock:
+            if len(state) <= self.max_bytes:
+                self._entries[(project, env, fingerprint)] = state
+                self._entries.move_to_end((project, env, fingerprint))
+            while self.size_bytes > self.max_bytes:
+                self._entries.popitem(last=False)
+
+    def get(self, project_location: str, env: str) -> Optional[bytes]:
+        """Cached state for the project's current files, if any"""
+        project = str(Path(project_location).absolute())
+        key = (project, env, hash_project_files(project))
+        with self._lock:
+            return self._entries.get(key)
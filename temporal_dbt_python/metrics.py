@@ -0,0 +1,207 @@
+import dataclasses
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from temporal_dbt_python.dto import ActivityMetrics, NodeMetrics
+
+
+def node_metrics(run_results: Optional[Dict[str, Any]]) -> List[NodeMetrics]:
+    """node_metrics Per-node timings and adapter responses from `run_results`
+
+    :param run_results: DBT's `run_results` artifact
+    :type run_results: Optional[Dict[str, Any]]
+    :return: Metrics for each node DBT reported on
+    :rtype: List[NodeMetrics]
+    """
+    if run_results is None:
+        return []
+    metrics = []
+    for result in run_results.get("results", []):
+        adapter_response = result.get("adapter_response") or {}
+        metrics.append(
+            NodeMetrics(
+                result["unique_id"],
+                result["status"],
+                result.get("execution_time") or 0.0,
+                adapter_response.get("rows_affected"),
+                adapter_response.get("bytes_processed"),
+            )
+        )
+    return metrics
+
+
+class MetricsSink:
+    """Destination for activity metrics, subclasses implement `emit`"""
+
+    def emit(self, metrics: ActivityMetrics):
+        raise NotImplementedError
+
+
+class FileMetricsSink(MetricsSink):
+    def __init__(self, path: str) -> None:
+        """FileMetricsSink Appends each activity's metrics to a JSON lines file
+
+        :param path: File to append to, created if missing
+        :type path: str
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def emit(self, metrics: ActivityMetrics):
+        line = json.dumps(dataclasses.asdict(metrics))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _labels(**labels: Any) -> str:
+    def escape(value: Any) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class PrometheusMetricsSink(MetricsSink):
+    ACTIVITY_GAUGES = {
+        "dbt_activity_wall_seconds": ("wall_time", "Wall time of the DBT call"),
+        "dbt_activity_parse_seconds": (
+            "parse_time",
+            "Time outside of node execution, loading and parsing the project",
+        ),
+        "dbt_process_peak_rss_megabytes": (
+            "peak_rss_mb",
+            "High-water mark of the RSS of the process DBT ran in, since it started",
+        ),
+        "dbt_activity_exit_code": ("exit_code", "Exit code of the DBT call"),
+        "dbt_activity_threads": ("threads", "Threads the DBT call ran with"),
+    }
+    NODE_GAUGES = {
+        "dbt_node_execution_seconds": ("execution_time", "Execution time of a node"),
+        "dbt_node_rows_affected": ("rows_affected", "Rows affected by a node"),
+        "dbt_node_bytes_processed": ("bytes_processed", "Bytes processed by a node"),
+    }
+
+    def __init__(self, port: Optional[int] = None, host: str = "") -> None:
+        """PrometheusMetricsSink Serves the latest metrics in Prometheus text format
+
+        Gauges hold the most recent value per activity, project and target, and per
+        node. Node status isn't a label, so a node keeps a single series whatever
+        its latest status. Scrape `port` if given, or expose `render()` from an
+        existing server.
+
+        :param port: Port to serve `/metrics` on, defaults to None for no server
+        :type port: Optional[int], optional
+        :param host: Interface to bind, defaults to all
+        :type host: str, optional
+        """
+        self._lock = threading.Lock()
+        self._samples: Dict[Tuple[str, str], float] = {}
+        self.server: Optional[ThreadingHTTPServer] = None
+        if port is not None:
+            self.server = ThreadingHTTPServer((host, port), self._handler())
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def emit(self, metrics: ActivityMetrics):
+        base = {
+            "activity": metrics.activity,
+            "project": metrics.project,
+            "env": metrics.env,
+        }
+        samples = {}
+        for name, (attribute, _) in self.ACTIVITY_GAUGES.items():
+            value = getattr(metrics, attribute)
+            if value is not None:
+                samples[(name, _labels(**base))] = value
+        for node in metrics.nodes:
+            labels = _labels(**base, node=node.unique_id)
+            for name, (attribute, _) in self.NODE_GAUGES.items():
+                value = getattr(node, attribute)
+                if value is not None:
+                    samples[(name, labels)] = value
+        with self._lock:
+            self._samples.update(samples)
+
+    def render(self) -> str:
+        """Current metrics in the Prometheus text exposition format"""
+        with self._lock:
+            samples = dict(self._samples)
+        lines = []
+        for name, (_, description) in {
+            **self.ACTIVITY_GAUGES,
+            **self.NODE_GAUGES,
+        }.items():
+            lines.extend([f"# HELP {name} {description}", f"# TYPE {name} gauge"])
+            lines.extend(
+                f"{name}{labels} {value}"
+                for (sample, labels), value in sorted(samples.items())
+                if sample == name
+            )
+        return "\n".join(lines) + "\n"
+
+    def _handler(self):
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = sink.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any):
+                pass  # Scrapes aren't worth logging
+
+        return MetricsHandler
+
+    def close(self):
+        """Stops the HTTP server, if one was started"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+class OpenTelemetryMetricsSink(MetricsSink):
+    def __init__(self, meter: Any = None) -> None:
+        """OpenTelemetryMetricsSink Records metrics as OpenTelemetry histograms
+
+        Requires `opentelemetry-api`, export is configured through the SDK as usual.
+
+        :param meter: Meter to create instruments on, defaults to None using the
+            global meter provider
+        :type meter: Any, optional
+        """
+        if meter is None:
+            from opentelemetry import metrics  # Optional dependency
+
+            meter = metrics.get_meter("temporal_dbt_python")
+        # Same metrics as the Prometheus sink, named in OpenTelemetry's dotted style
+        self._activity = {
+            attribute: meter.create_histogram(name.replace("_", "."), description=desc)
+            for name, (attribute, desc) in PrometheusMetricsSink.ACTIVITY_GAUGES.items()
+        }
+        self._node = {
+            attribute: meter.create_histogram(name.replace("_", "."), description=desc)
+            for name, (attribute, desc) in PrometheusMetricsSink.NODE_GAUGES.items()
+        }
+
+    def emit(self, metrics: ActivityMetrics):
+        base = {
+            "activity": metrics.activity,
+            "project": metrics.project,
+            "env": metrics.env,
+        }
+        for attribute, histogram in self._activity.items():
+            value = getattr(metrics, attribute)
+            if value is not None:
+                histogram.record(value, attributes=base)
+        for node in metrics.nodes:
+            attributes = {**base, "node": node.unique_id, "status": node.status}
+            for attribute, histogram in self._node.items():
+                value = getattr(node, attribute)
+                if value is not None:
+                    histogram.record(value, attributes=attributes)
@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from temporal_dbt_python.manifest_cache import project_config
+
+PACKAGE_FILES = ("packages.yml", "dependencies.yml", "package-lock.yml")
+CACHE_KEY_FILE = ".package_cache_key"
+
+
+def packages_install_path(project_location: str) -> Path:
+    """Where `dbt deps` installs packages, honouring `packages-install-path`"""
+    config = project_config(project_location)
+    install_path = config.get(
+        "packages-install-path", config.get("modules-path", "dbt_packages")
+    )
+    return Path(project_location, install_path)
+
+
+def package_cache_key(
+    project_location: str, dbt_version: Optional[str] = None
+) -> Optional[str]:
+    """package_cache_key Hashes the package specification of a DBT project
+
+    :param project_location: Filepath to the DBT project
+    :type project_location: str
+    :param dbt_version: DBT version the packages are resolved for, defaults to None
+        which uses the installed version
+    :type dbt_version: Optional[str], optional
+    :return: Hex digest, or None if the project declares no packages
+    :rtype: Optional[str]
+    """
+    spec_files = [
+        Path(project_location, name)
+        for name in PACKAGE_FILES
+        if Path(project_location, name).exists()
+    ]
+    if not spec_files:
+        return None
+
+    if dbt_version is None:
+        from dbt.version import __version__ as dbt_version  # Limited context
+
+    digest = hashlib.sha256(str(dbt_version).encode())
+    for spec_file in spec_files:
+        digest.update(spec_file.name.encode())
+        digest.update(spec_file.read_bytes())
+    return digest.hexdigest()
+
+
+def _copy_tree(source: Path, destination: Path, hardlink: bool):
+    """Copies a directory, hardlinking files where the filesystem allows it"""
+
+    def link_or_copy(src: str, dst: str):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    shutil.copytree(
+        source,
+        destination,
+        symlinks=True,
+        copy_function=link_or_copy if hardlink else shutil.copy2,
+    )
+
+
+class PackageCache:
+    def __init__(
+        self, cache_dir: str, max_entries: int = 10, hardlink: bool = True
+    ) -> None:
+        """PackageCache Local store of installed DBT packages
+
+        Entries are keyed by a hash of `packages.yml`, `dependencies.yml` and
+        `package-lock.yml` plus the DBT version. A hit is linked or copied into the
+        project instead of running `dbt deps`, and a project whose installed
+        packages already match the key is left untouched.
+
+        :param cache_dir: Directory to keep cached package installs in
+        :type cache_dir: str
+        :param max_entries: Entries kept, least recently used are evicted first,
+            defaults to 10
+        :type max_entries: int, optional
+        :param hardlink: Hardlink files into projects rather than copy, defaults to
+            True. DBT doesn't modify installed packages, so links are safe
+        :type hardlink: bool, optional
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.hardlink = hardlink
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry(self, key: str) -> Path:
+        return Path(self.cache_dir, key)
+
+    def is_installed(self, project_location: str, key: str) -> bool:
+        """Whether the project's installed packages were built from this key"""
+        key_file = Path(packages_install_path(project_location), CACHE_KEY_FILE)
+        return key_file.exists() and key_file.read_text() == key
+
+    def install(self, project_location: str, key: str) -> bool:
+        """install Puts cached packages in place, skipping up to date projects
+
+        :param project_location: Filepath to the DBT project
+        :type project_location: str
+        :param key: Key from `package_cache_key`
+        :type key: str
+        :return: True if the project's packages are now current without `dbt deps`
+        :rtype: bool
+        """
+        if self.is_installed(project_location, key):
+            return True
+
+        entry = self._entry(key)
+        if not entry.exists():
+            return False
+
+        install_path = packages_install_path(project_location)
+        if install_path.exists():
+            shutil.rmtree(install_path)
+        _copy_tree(entry, install_path, self.hardlink)
+        os.utime(entry)  # Recency for eviction
+        logging.info(f"Installed cached packages {key[:12]} into {project_location}")
+        return True
+
+    def store(self, project_location: str, key: str):
+        """store Saves the project's freshly installed packages under the key
+
+        :param project_location: Filepath to the DBT project
+        :type project_location: str
+        :param key: Key from `package_cache_key`
+        :type key: str
+        """
+        install_path = packages_install_path(project_location)
+        install_path.mkdir(parents=True, exist_ok=True)
+        Path(install_path, CACHE_KEY_FILE).write_text(key)
+
+        entry = self._entry(key)
+        if not entry.exists():
+            # Stage then rename so concurrent readers never see a partial entry
+            staging = Path(self.cache_dir, f".{key}-{uuid.uuid4().hex}")
+            _copy_tree(install_path, staging, hardlink=False)
+            try:
+                staging.rename(entry)
+            except OSError:
+                shutil.rmtree(staging)  # Another worker stored it first
+        os.utime(entry)  # copytree carries over the install's timestamps
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries beyond `max_entries`"""
+        entries = sorted(
+            (p for p in self.cache_dir.iterdir() if not p.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in entries[self.max_entries :]:
+            shutil.rmtree(stale, ignore_errors=True)
@@ -0,0 +1,218 @@
+import functools
+import importlib
+import logging
+import multiprocessing
+import queue
+import threading
+from typing import Any, Callable, List, Optional, Sequence
+
+from temporal_dbt_python.dbt_wrapper import dbt_handler, peak_rss_mb
+from temporal_dbt_python.dto import DbtResults
+from temporal_dbt_python.exceptions import WorkflowExecutionError
+
+DEFAULT_PRELOAD = ("dbt.main", "dbt.clients.system", "logbook")
+
+
+def _send_progress(conn: Any, completed: int, total: int):
+    """Relays node progress from the subprocess to the caller"""
+    conn.send(("progress", (completed, total)))
+
+
+def _pool_worker_main(
+    conn: Any, preload: Sequence[str], handler: Callable[..., DbtResults]
+):
+    """Subprocess loop, imports DBT once then serves handler calls until told to stop"""
+    for module in preload:
+        importlib.import_module(module)
+
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+        args, kwargs, report_progress = request
+        if report_progress:
+            kwargs["progress_callback"] = functools.partial(_send_progress, conn)
+        try:
+            results = handler(*args, **kwargs)
+        except Exception as e:
+            results = DbtResults(2, f"DBT pool process raised: {e!r}", {})
+        conn.send(("results", (results, peak_rss_mb())))
+    conn.close()
+
+
+class _PoolProcess:
+    def __init__(
+        self,
+        context: Any,
+        preload: Sequence[str],
+        handler: Callable[..., DbtResults],
+    ):
+        """Handle on a single warm DBT subprocess"""
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_pool_worker_main,
+            args=(child_conn, preload, handler),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+        self.rss_mb = 0.0
+        # Set while a call's messages may still be unread on the pipe
+        self.busy = False
+
+    def call(
+        self,
+        args: tuple,
+        kwargs: dict,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> DbtResults:
+        """Sends a single handler call to the subprocess and waits on the results
+
+        If the call is interrupted, e.g. by the progress callback raising, the process
+        is left busy and has to be recycled rather than serve another call.
+        """
+        self.busy = True
+        try:
+            self.conn.send((args, kwargs, progress_callback is not None))
+            kind, message = self.conn.recv()
+            while kind == "progress":
+                if progress_callback is not None:
+                    progress_callback(*message)
+                kind, message = self.conn.recv()
+            results, self.rss_mb = message
+            self.busy = False
+        except (EOFError, OSError) as e:
+            raise WorkflowExecutionError(
+                f"DBT pool process {self.process.pid} exited unexpectedly"
+            ) from e
+        finally:
+            self.runs += 1
+        return results
+
+    def stop(self, timeout: float = 10.0):
+        """Asks the subprocess to exit, killing it if it doesn't comply"""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class DbtProcessPool:
+    def __init__(
+        self,
+        size: int = 2,
+        max_runs: Optional[int] = None,
+        max_rss_mb: Optional[float] = None,
+        adapters: Sequence[str] = (),
+        preload: Sequence[str] = DEFAULT_PRELOAD,
+        start_method: str = "spawn",
+        handler: Callable[..., DbtResults] = dbt_handler,
+    ) -> None:
+        """DbtProcessPool Long-lived subprocesses with DBT already imported
+
+        Each subprocess imports DBT, logbook and the requested adapters once, then
+        serves `dbt_handler` calls. Processes are recycled after `max_runs` calls or
+        once their peak RSS passes `max_rss_mb`, which also stops DBT's global state
+        leaking between too many runs.
+
+        :param size: Number of subprocesses kept warm, defaults to 2
+        :type size: int, optional
+        :param max_runs: Calls served before a process is replaced, defaults to None
+        :type max_runs: Optional[int], optional
+        :param max_rss_mb: Peak RSS in MB that triggers replacement, defaults to None
+        :type max_rss_mb: Optional[float], optional
+        :param adapters: Adapter names to preload, e.g. `["postgres"]`, defaults to ()
+        :type adapters: Sequence[str], optional
+        :param preload: Modules imported on process start, defaults to DEFAULT_PRELOAD
+        :type preload: Sequence[str], optional
+        :param start_method: Multiprocessing start method, defaults to "spawn" as
+            forking after the Temporal client has started threads is unsafe
+        :type start_method: str, optional
+        :param handler: Picklable function run in the subprocess, defaults to
+            `dbt_handler`
+        :type handler: Callable[..., DbtResults], optional
+        """
+        self.size = size
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.preload = tuple(preload) + tuple(f"dbt.adapters.{a}" for a in adapters)
+        self.handler = handler
+        self._context = multiprocessing.get_context(start_method)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._idle: "queue.Queue[_PoolProcess]" = queue.Queue()
+        self._processes: List[_PoolProcess] = []
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _PoolProcess:
+        process = _PoolProcess(self._context, self.preload, self.handler)
+        with self._lock:
+            self._processes.append(process)
+        return process
+
+    def _retire(self, process: _PoolProcess):
+        with self._lock:
+            self._processes.remove(process)
+        # An interrupted call is still running, so don't wait for it to finish
+        process.stop(0.0 if process.busy else 10.0)
+
+    def _needs_recycling(self, process: _PoolProcess) -> bool:
+        if process.busy or not process.process.is_alive():
+            return True
+        if self.max_runs is not None and process.runs >= self.max_runs:
+            return True
+        return self.max_rss_mb is not None and process.rss_mb >= self.max_rss_mb
+
+    def execute(self, *args: Any, **kwargs: Any) -> DbtResults:
+        """execute Runs the handler on the next free warm subprocess
+
+        Blocks until a subprocess is available, so dispatch from an executor thread
+        when used inside an activity.
+
+        Node progress reported by the handler is relayed to `progress_callback`
+        on the calling thread. If the callback raises, the subprocess is replaced,
+        as the rest of its call would otherwise be read by the next caller.
+
+        :raises WorkflowExecutionError: If the pool is closed or the process dies
+        :return: Results of the handler call
+        :rtype: DbtResults
+        """
+        if self._closed:
+            raise WorkflowExecutionError("DBT process pool has been closed")
+
+        progress_callback = kwargs.pop("progress_callback", None)
+        process = self._idle.get()
+        try:
+            return process.call(args, kwargs, progress_callback)
+        finally:
+            if self._needs_recycling(process) and not self._closed:
+                logging.info(
+                    f"Recycling DBT pool process {process.process.pid} after "
+                    f"{process.runs} runs at {process.rss_mb:.0f}MB peak RSS"
+                    + (", its last call was interrupted" if process.busy else "")
+                )
+                self._retire(process)
+                process = self._spawn()
+            self._idle.put(process)
+
+    def close(self):
+        """Stops every subprocess in the pool"""
+        self._closed = True
+        with self._lock:
+            processes = list(self._processes)
+            self._processes.clear()
+        for process in processes:
+            process.stop()
+
+    def __enter__(self) -> "DbtProcessPool":
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        self.close()
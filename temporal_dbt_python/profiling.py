@@ -0,0 +1,269 @@
+import contextvars
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from temporal_dbt_python.artifacts import CompressedArtifact
+from temporal_dbt_python.exceptions import WorkflowExecutionError
+
+PROFILERS = frozenset({"cprofile", "sampling"})
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+# Functions kept in the `profile_stats` artifact, by cumulative time
+TOP_FUNCTIONS = 100
+
+_ACTIVE_PROFILE: contextvars.ContextVar[
+    Optional["InvocationProfile"]
+] = contextvars.ContextVar("active_profile", default=None)
+
+
+def active_profile() -> Optional["InvocationProfile"]:
+    """The profile of the DBT call running on this thread, if it is profiled"""
+    return _ACTIVE_PROFILE.get()
+
+
+@contextmanager
+def profile_phase(name: str) -> Iterator[None]:
+    """Times the block as a named phase of the active profile, if there is one"""
+    profile = active_profile()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+def _parse_timestamp(timestamp: str) -> datetime:
+    return datetime.fromisoformat(timestamp.rstrip("Z"))
+
+
+def node_phases(run_results: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """node_phases Compile and execute time of the nodes in a `run_results` artifact
+
+    :param run_results: DBT's `run_results` artifact, or None
+    :type run_results: Optional[Dict[str, Any]]
+    :return: Seconds per DBT timing phase, prefixed "node_", summed over nodes so
+        they exceed wall time when DBT runs several threads
+    :rtype: Dict[str, float]
+    """
+    phases: Dict[str, float] = {}
+    for result in (run_results or {}).get("results", []):
+        for timing in result.get("timing", []):
+            if not timing.get("started_at") or not timing.get("completed_at"):
+                continue
+            elapsed = _parse_timestamp(timing["completed_at"]) - _parse_timestamp(
+                timing["started_at"]
+            )
+            name = f"node_{timing['name']}"
+            phases[name] = phases.get(name, 0.0) + elapsed.total_seconds()
+    return phases
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, target_ident: int, interval: float):
+        """Background thread recording the stacks of a DBT call's threads
+
+        Samples the thread that invoked DBT and every thread started after it,
+        which covers DBT's node threads.
+        """
+        super().__init__(name="dbt-profile-sampler", daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.ignored = {thread.ident for thread in threading.enumerate()}
+        self.ignored.discard(target_ident)
+        self.frames: List[Dict[str, Any]] = []
+        self.frame_index: Dict[Tuple[str, str, int], int] = {}
+        self.samples: Dict[int, List[Tuple[List[int], float]]] = {}
+        self.names: Dict[int, str] = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._stop_event = threading.Event()
+
+    def _frame_id(self, code: Any) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self.frame_index.get(key)
+        if index is None:
+            index = self.frame_index[key] = len(self.frames)
+            self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+        return index
+
+    def _sample(self, weight: float):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, top in sys._current_frames().items():
+            if ident == self.ident or ident in self.ignored:
+                continue
+            stack = []
+            frame: Optional[FrameType] = top
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.setdefault(ident, []).append((stack, weight))
+            self.names.setdefault(ident, names.get(ident, str(ident)))
+
+    def run(self):
+        previous = self.started
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - previous)
+            previous = now
+        self.elapsed = time.perf_counter() - self.started
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """The samples as a speedscope file, one profile per thread"""
+        profiles = []
+        for ident, samples in self.samples.items():
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": self.names[ident],
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.elapsed,
+                    "samples": [stack for stack, _ in samples],
+                    "weights": [weight for _, weight in samples],
+                }
+            )
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "temporal_dbt_python",
+            "shared": {"frames": self.frames},
+            "profiles": profiles,
+        }
+
+
+class InvocationProfile:
+    def __init__(self, mode: str, interval: float = 0.005) -> None:
+        """InvocationProfile Profiles one DBT call and times its named phases
+
+        "cprofile" traces every function call on the thread that invokes DBT, but
+        not DBT's node threads. "sampling" records the stacks of all of the call's
+        threads every `interval` seconds, with far less overhead.
+
+        :param mode: "cprofile" or "sampling"
+        :type mode: str
+        :param interval: Seconds between samples, defaults to 0.005
+        :type interval: float, optional
+        :raises WorkflowExecutionError: On an unknown mode
+        """
+        if mode not in PROFILERS:
+            raise WorkflowExecutionError(f"Unknown profiler {mode}")
+        self.mode = mode
+        self.interval = interval
+        self.phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_Sampler] = None
+        self.started_at = 0.0
+
+    def add(self, name: str, seconds: float):
+        """Adds time to a named phase, safe to call from any thread"""
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def activate(self) -> Iterator["InvocationProfile"]:
+        """Profiles the block and makes this the active profile on this thread"""
+        token = _ACTIVE_PROFILE.set(self)
+        self.started_at = time.time()
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = _Sampler(threading.get_ident(), self.interval)
+            self._sampler.start()
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add("total", time.perf_counter() - started)
+            if self._profiler is not None:
+                self._profiler.disable()
+            if self._sampler is not None:
+                self._sampler.stop()
+            _ACTIVE_PROFILE.reset(token)
+
+    def _function_stats(self) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(self._profiler).stats  # type: ignore
+        rows = [
+            {
+                "file": file_name,
+                "line": line,
+                "function": function,
+                "primitive_calls": primitive_calls,
+                "calls": calls,
+                "tottime": tottime,
+                "cumtime": cumtime,
+            }
+            for (file_name, line, function), (
+                primitive_calls,
+                calls,
+                tottime,
+                cumtime,
+                _,
+            ) in stats.items()
+        ]
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[:TOP_FUNCTIONS]
+
+    def artifacts(
+        self, dbt_commands: List[str], run_results: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, str]:
+        """artifacts The profile as JSON artifacts to add to the DBT outputs
+
+        :param dbt_commands: The profiled DBT command, used to name the profile
+        :type dbt_commands: List[str]
+        :param run_results: The call's `run_results` for node timings, defaults to
+            None
+        :type run_results: Optional[Dict[str, Any]], optional
+        :return: "profile_phases" with seconds per named phase, and "profile" in
+            speedscope format or "profile_stats" with the slowest functions
+        :rtype: Dict[str, str]
+        """
+        phases = dict(self.phases)
+        phases.update(node_phases(run_results))
+        outputs = {"profile_phases": json.dumps(phases)}
+        if self._profiler is not None:
+            outputs["profile_stats"] = json.dumps(self._function_stats())
+        if self._sampler is not None:
+            name = "dbt " + " ".join(dbt_commands)
+            outputs["profile"] = json.dumps(self._sampler.speedscope(name))
+        return outputs
+
+
+def captured_run_results(
+    outputs: Dict[str, Any], project_location: str, since: float
+) -> Optional[Dict[str, Any]]:
+    """`run_results` of a call, from captured outputs or the project's target dir
+
+    A file in the target dir older than `since`, a `time.time()`, is left from an
+    earlier call and ignored.
+    """
+    from temporal_dbt_python.manifest_cache import project_target_path
+
+    run_results = outputs.get("run_results")
+    if run_results is None:
+        path = Path(project_target_path(project_location), "run_results.json")
+        if not path.exists() or path.stat().st_mtime < since:
+            return None
+        run_results = path.read_text(encoding="utf-8")
+    if isinstance(run_results, CompressedArtifact):
+        return run_results.load(["results"])
+    if isinstance(run_results, (str, bytes)):
+        return json.loads(run_results)
+    return run_results
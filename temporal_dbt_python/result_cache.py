@@ -0,0 +1,151 @@
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from temporal_dbt_python.json_store import JsonStore
+
+CACHED_STATUSES = frozenset({"success"})
+
+
+def _own_inputs(entity: Dict[str, Any], loaded_at: Optional[str]) -> Dict[str, Any]:
+    """The parts of a node, macro or source that change what it builds"""
+    return {
+        "code": entity.get("raw_code", entity.get("raw_sql")),
+        "checksum": entity.get("checksum"),
+        "config": entity.get("config"),
+        "macro_sql": entity.get("macro_sql"),
+        "loaded_at": loaded_at,
+    }
+
+
+def node_fingerprints(
+    manifest: Dict[str, Any], freshness: Optional[Dict[str, Any]] = None
+) -> Dict[str, Optional[str]]:
+    """node_fingerprints Hashes everything that determines each node's output
+
+    A node's fingerprint covers its code, file checksum and config, the macros it
+    calls and the fingerprints of its upstream nodes. Sources are fingerprinted by
+    their `max_loaded_at` from a `dbt source freshness` run. Nodes reading from a
+    source without freshness data can't be shown to be unchanged, so they and
+    their descendants get None.
+
+    :param manifest: DBT's `manifest` artifact
+    :type manifest: Dict[str, Any]
+    :param freshness: DBT's `sources` artifact, defaults to None
+    :type freshness: Optional[Dict[str, Any]], optional
+    :return: Fingerprint of each node, None where it can't be determined
+    :rtype: Dict[str, Optional[str]]
+    """
+    entities = {
+        **manifest.get("macros", {}),
+        **manifest.get("sources", {}),
+        **manifest.get("nodes", {}),
+    }
+    loaded_at = {
+        result["unique_id"]: result.get("max_loaded_at")
+        for result in (freshness or {}).get("results", [])
+        if result.get("max_loaded_at")
+    }
+
+    fingerprints: Dict[str, Optional[str]] = {}
+    for root in manifest.get("nodes", {}):
+        # Iterative post-order walk, DBT DAGs can be deeper than the recursion limit
+        stack = [(root, False)]
+        while stack:
+            unique_id, expanded = stack.pop()
+            if unique_id in fingerprints:
+                continue
+            entity = entities.get(unique_id)
+            depends_on = {} if entity is None else entity.get("depends_on") or {}
+            parents = sorted(
+                set(depends_on.get("nodes", [])) | set(depends_on.get("macros", []))
+            )
+            if not expanded:
+                stack.append((unique_id, True))
+                stack.extend((p, False) for p in parents if p not in fingerprints)
+                continue
+
+            if entity is None or (
+                unique_id in manifest.get("sources", {}) and unique_id not in loaded_at
+            ):
+                fingerprints[unique_id] = None
+                continue
+            parent_fingerprints = [fingerprints.get(p) for p in parents]
+            if any(fp is None for fp in parent_fingerprints):
+                fingerprints[unique_id] = None
+                continue
+            digest = hashlib.sha256(
+                json.dumps(
+                    _own_inputs(entity, loaded_at.get(unique_id)),
+                    sort_keys=True,
+                    default=str,
+                ).encode()
+            )
+            for parent, fingerprint in zip(parents, parent_fingerprints):
+                digest.update(f"{parent}={fingerprint}".encode())
+            fingerprints[unique_id] = digest.hexdigest()
+
+    return {
+        unique_id: fingerprints[unique_id] for unique_id in manifest.get("nodes", {})
+    }
+
+
+class ResultCache:
+    def __init__(self, path: str) -> None:
+        """ResultCache Fingerprints of the nodes each project last built successfully
+
+        Kept in a local JSON file. A node whose fingerprint still matches was built
+        from the same code and inputs, so rebuilding it can be skipped.
+
+        :param path: JSON file to keep the cache in, created if missing
+        :type path: str
+        """
+        self.store = JsonStore(path)
+
+    def unchanged(self, key: str, fingerprints: Dict[str, Optional[str]]) -> List[str]:
+        """unchanged Nodes whose inputs match their last successful build
+
+        :param key: Project and warehouse the run will be executed against, see
+            `project_key`
+        :type key: str
+        :param fingerprints: Output of `node_fingerprints`
+        :type fingerprints: Dict[str, Optional[str]]
+        :return: Unique ids of nodes that can be skipped
+        :rtype: List[str]
+        """
+        built = self.store.read().get(key, {})
+        return sorted(
+            unique_id
+            for unique_id, fingerprint in fingerprints.items()
+            if fingerprint is not None and built.get(unique_id) == fingerprint
+        )
+
+    def record(
+        self,
+        key: str,
+        fingerprints: Dict[str, Optional[str]],
+        results: Iterable[Dict[str, Any]],
+    ):
+        """record Stores the fingerprints of successfully built nodes
+
+        :param key: Project and warehouse the run was executed against, see
+            `project_key`
+        :type key: str
+        :param fingerprints: Output of `node_fingerprints` from before the run
+        :type fingerprints: Dict[str, Optional[str]]
+        :param results: `run_results` entries of the run
+        :type results: Iterable[Dict[str, Any]]
+        """
+        with self.store.transaction() as cache:
+            built = cache.setdefault(key, {})
+            for result in results:
+                fingerprint = fingerprints.get(result["unique_id"])
+                if result.get("status") in CACHED_STATUSES and fingerprint:
+                    built[result["unique_id"]] = fingerprint
+                else:
+                    built.pop(result["unique_id"], None)
+
+    def invalidate(self, key: str):
+        """Forgets every build of the project, e.g. for a full refresh"""
+        with self.store.transaction() as cache:
+            cache.pop(key, None)
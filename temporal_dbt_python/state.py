@@ -0,0 +1,96 @@
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from temporal_dbt_python.artifacts import CompressedArtifact
+
+STATE_SELECTORS = {"slim": "state:modified+"}
+
+
+class StateStore:
+    def __init__(self, root_dir: str, retention: int = 5) -> None:
+        """StateStore Local history of manifests from successful runs
+
+        Manifests are kept per project and target so they can be handed to DBT as
+        `--state` for slim runs that only build modified nodes.
+
+        :param root_dir: Directory to keep saved manifests in
+        :type root_dir: str
+        :param retention: Manifests kept per project and target, defaults to 5
+        :type retention: int, optional
+        """
+        self.root_dir = Path(root_dir)
+        self.retention = retention
+
+    def _project_dir(self, project_location: str, env: str) -> Path:
+        project = Path(project_location).absolute()
+        project_hash = hashlib.sha1(str(project).encode()).hexdigest()[:8]
+        return Path(self.root_dir, f"{project.stem}-{project_hash}", env)
+
+    def save(
+        self,
+        project_location: str,
+        env: str,
+        manifest: Union[Dict[str, Any], CompressedArtifact],
+        run_id: Optional[str] = None,
+    ) -> Path:
+        """save Records the manifest of a successful run
+
+        :param project_location: Filepath to the DBT project
+        :type project_location: str
+        :param env: Target the run was executed against
+        :type env: str
+        :param manifest: DBT's `manifest` artifact
+        :type manifest: Union[Dict[str, Any], CompressedArtifact]
+        :param run_id: Workflow run that produced the manifest, defaults to None
+        :type run_id: Optional[str], optional
+        :return: Directory to pass to DBT as `--state`
+        :rtype: Path
+        """
+        state_dir = Path(
+            self._project_dir(project_location, env),
+            f"{time.time_ns()}--{run_id or 'local'}",
+        )
+        state_dir.mkdir(parents=True)
+        if isinstance(manifest, CompressedArtifact):
+            with open(Path(state_dir, "manifest.json"), "wb") as f:
+                for chunk in manifest.iter_chunks():
+                    f.write(chunk)
+        else:
+            with open(Path(state_dir, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+
+        saved = sorted(self._project_dir(project_location, env).iterdir())
+        for stale in saved[: -self.retention]:
+            shutil.rmtree(stale, ignore_errors=True)
+        return state_dir
+
+    def latest(
+        self,
+        project_location: str,
+        env: str,
+        exclude_run_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """latest Finds the most recent saved state for a project and target
+
+        :param project_location: Filepath to the DBT project
+        :type project_location: str
+        :param env: Target the run was executed against
+        :type env: str
+        :param exclude_run_id: Ignore state saved by this workflow run, so later
+            steps compare against the previous refresh, defaults to None
+        :type exclude_run_id: Optional[str], optional
+        :return: Directory to pass to DBT as `--state`, or None if nothing is saved
+        :rtype: Optional[str]
+        """
+        project_dir = self._project_dir(project_location, env)
+        if not project_dir.exists():
+            return None
+        for state_dir in sorted(project_dir.iterdir(), reverse=True):
+            run_id = state_dir.name.split("--", 1)[1]
+            if exclude_run_id is None or run_id != exclude_run_id:
+                return str(state_dir)
+        return None
@@ -0,0 +1,132 @@
+import os
+import statistics
+from typing import Any, Dict, Optional
+
+from temporal_dbt_python.json_store import JsonStore
+
+OBSERVED_STATUSES = frozenset({"success", "pass", "warn", "fail"})
+
+
+class ThreadPolicy:
+    """Chooses `--threads` for each DBT call, subclasses implement `threads`"""
+
+    def threads(self, key: str) -> int:
+        raise NotImplementedError
+
+    def observe(
+        self, key: str, threads: Optional[int], run_results: Optional[Dict[str, Any]]
+    ):
+        """Feedback from a finished call, ignored unless the policy adapts"""
+
+
+class FixedThreads(ThreadPolicy):
+    def __init__(self, threads: int) -> None:
+        """FixedThreads The same thread count for every call
+
+        :param threads: Threads to run DBT with
+        :type threads: int
+        """
+        self.count = threads
+
+    def threads(self, key: str) -> int:
+        return self.count
+
+
+class PerCoreThreads(ThreadPolicy):
+    def __init__(
+        self, per_core: float = 1.0, minimum: int = 1, maximum: Optional[int] = None
+    ) -> None:
+        """PerCoreThreads Scales threads with the worker's CPU count
+
+        :param per_core: Threads per core, defaults to 1.0
+        :type per_core: float, optional
+        :param minimum: Lower bound, defaults to 1
+        :type minimum: int, optional
+        :param maximum: Upper bound, defaults to None
+        :type maximum: Optional[int], optional
+        """
+        self.per_core = per_core
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def threads(self, key: str) -> int:
+        threads = max(self.minimum, int((os.cpu_count() or 1) * self.per_core))
+        return threads if self.maximum is None else min(threads, self.maximum)
+
+
+class AdaptiveThreads(ThreadPolicy):
+    def __init__(
+        self,
+        path: str,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 16,
+        tolerance: float = 0.5,
+    ) -> None:
+        """AdaptiveThreads Tunes threads per warehouse from recent query latency
+
+        Each node's fastest `execution_time` so far is taken as its uncontended
+        latency. After a call, if nodes typically ran more than `tolerance` slower
+        than that, the warehouse is treated as saturated and threads are halved.
+        Otherwise one more thread is tried next time. State is kept in a local
+        JSON file.
+
+        :param path: JSON file to keep the state in, created if missing
+        :type path: str
+        :param initial: Threads for warehouses without history, defaults to 4
+        :type initial: int, optional
+        :param minimum: Lower bound, defaults to 1
+        :type minimum: int, optional
+        :param maximum: Upper bound, defaults to 16
+        :type maximum: int, optional
+        :param tolerance: Relative slowdown accepted before backing off, defaults
+            to 0.5
+        :type tolerance: float, optional
+        """
+        self.store = JsonStore(path)
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+
+    def threads(self, key: str) -> int:
+        return self.store.read().get(key, {}).get("threads", self.initial)
+
+    def observe(
+        self, key: str, threads: Optional[int], run_results: Optional[Dict[str, Any]]
+    ):
+        """observe Adjusts the warehouse's threads from a call's node latencies
+
+        :param key: Warehouse the call ran against, see `warehouse_key`
+        :type key: str
+        :param threads: Threads the call ran with, None if DBT's default
+        :type threads: Optional[int]
+        :param run_results: DBT's `run_results` artifact
+        :type run_results: Optional[Dict[str, Any]]
+        """
+        if threads is None or run_results is None:
+            return
+        latencies = {
+            result["unique_id"]: result["execution_time"]
+            for result in run_results.get("results", [])
+            if result.get("status") in OBSERVED_STATUSES
+            and result.get("execution_time")
+        }
+        if not latencies:
+            return
+
+        with self.store.transaction() as state:
+            warehouse = state.setdefault(key, {"threads": self.initial})
+            fastest = warehouse.setdefault("fastest", {})
+            slowdowns = [
+                latency / fastest[unique_id]
+                for unique_id, latency in latencies.items()
+                if fastest.get(unique_id)
+            ]
+            for unique_id, latency in latencies.items():
+                fastest[unique_id] = min(latency, fastest.get(unique_id, latency))
+
+            if slowdowns and statistics.median(slowdowns) > 1 + self.tolerance:
+                warehouse["threads"] = max(self.minimum, threads // 2)
+            else:
+                warehouse["threads"] = min(self.maximum, threads + 1)
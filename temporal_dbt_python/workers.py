@@ -1,9 +1,48 @@
-from typing import List, Optional
+import asyncio
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type, Union
 
-from temporalio.client import Client
+from temporalio.client import Client, WorkflowHandle
+from temporalio.exceptions import WorkflowAlreadyStartedError
 from temporalio.worker import Worker
 
 from temporal_dbt_python.activities import DbtActivities
+from temporal_dbt_python.dto import OperationRequest
+from temporal_dbt_python.workflow import DbtSingleFlightWorkflow, single_flight_id
+
+
+def host_task_queue(queue_name: str = "dbt-update-operations") -> str:
+    """Task queue only the workers in this process listen on"""
+    return f"{queue_name}--{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkerGroup:
+    def __init__(self, workers: Sequence[Worker]) -> None:
+        """WorkerGroup Runs several workers as one, like a single `Worker`
+
+        :param workers: Workers to run together
+        :type workers: Sequence[Worker]
+        """
+        self.workers = list(workers)
+
+    async def run(self):
+        """Runs every worker until they all stop"""
+        await asyncio.gather(*(worker.run() for worker in self.workers))
+
+    async def shutdown(self):
+        """Stops every worker, letting running activities finish"""
+        await asyncio.gather(*(worker.shutdown() for worker in self.workers))
+
+    async def __aenter__(self) -> "WorkerGroup":
+        for worker in self.workers:
+            await worker.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        for worker in reversed(self.workers):
+            await worker.__aexit__(*exc_info)
 
 
 def create_worker(
@@ -12,7 +51,10 @@ def create_worker(
     queue_name="dbt-update-operations",
     workflows: Optional[List] = None,
     additional_tasks: Optional[List] = None,
-) -> Worker:
+    max_workers: Optional[int] = None,
+    use_processes: bool = False,
+    sticky: bool = False,
+) -> Union[Worker, WorkerGroup]:
     """create_worker Convenience function for instantiating worker class
 
     :param client: Temporal client instance
@@ -27,11 +69,44 @@ def create_worker(
     :param additional_tasks: List of additional tasks such as alert callbacks, defaults
         to None
     :type additional_tasks: Optional[List], optional
-    :return: Instance of the Worker class
-    :rtype: Worker
+    :param max_workers: Size of the pool DBT invocations are dispatched to, which also
+        caps concurrent activities on the worker, split between the shared and host
+        queue workers if sticky. Ignored for the pool if the activity manager already
+        has an executor. Defaults to None, running DBT inline
+    :type max_workers: Optional[int], optional
+    :param use_processes: Use a process pool rather than a thread pool, defaults to
+        False
+    :type use_processes: bool, optional
+    :param sticky: Also listen on `host_task_queue(queue_name)`, so workflows that
+        claim this worker run every later step on this worker process. Defaults to
+        False
+    :type sticky: bool, optional
+    :return: Instance of the Worker class, or a group of the shared and host
+        queue workers if sticky
+    :rtype: Union[Worker, WorkerGroup]
     """
-    activities = [
+    worker_kwargs: Dict[str, Any] = {}
+    host_kwargs: Dict[str, Any] = {}
+    if max_workers is not None:
+        worker_kwargs["max_concurrent_activities"] = max_workers
+        if sticky:
+            # Both workers feed the same pool, so they share its size
+            host_kwargs["max_concurrent_activities"] = max(1, max_workers // 2)
+            worker_kwargs["max_concurrent_activities"] = max(
+                1, max_workers - max_workers // 2
+            )
+        if activity_mgr.executor is None:
+            pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            activity_mgr.executor = pool_cls(max_workers=max_workers)
+
+    activities: List[Callable[..., Any]] = [
+        activity_mgr.claim_worker,
         activity_mgr.run,
+        activity_mgr.plan_shards,
+        activity_mgr.run_shard,
+        activity_mgr.build,
+        activity_mgr.source_freshness,
+        activity_mgr.commit_freshness,
         activity_mgr.docs_generate,
         activity_mgr.debug,
         activity_mgr.clean,
@@ -40,11 +115,66 @@ def create_worker(
         activity_mgr.test_source,
     ]
 
+    dbt_activities = list(activities)
+
     activities.extend([] if additional_tasks is None else additional_tasks)
     worker = Worker(
         client=client,
         task_queue=queue_name,
         workflows=[] if workflows is None else workflows,
         activities=activities,
+        **worker_kwargs,
     )
-    return worker
+    if not sticky:
+        return worker
+
+    activity_mgr.host_queue = host_task_queue(queue_name)
+    host_worker = Worker(
+        client=client,
+        task_queue=activity_mgr.host_queue,
+        activities=dbt_activities,
+        **host_kwargs,
+    )
+    return WorkerGroup([worker, host_worker])
+
+
+async def start_single_flight(
+    client: Client,
+    run_params: OperationRequest,
+    queue_name: str = "dbt-update-operations",
+    workflow_cls: Type[DbtSingleFlightWorkflow] = DbtSingleFlightWorkflow,
+    mode: Optional[str] = None,
+) -> WorkflowHandle:
+    """start_single_flight Requests a refresh, coalescing with one in flight
+
+    :param client: Temporal client instance
+    :type client: Client
+    :param run_params: Refresh to request
+    :type run_params: OperationRequest
+    :param queue_name: Queue the workflow runs on, defaults to "dbt-update-operations"
+    :type queue_name: str, optional
+    :param workflow_cls: Configured single flight workflow, defaults to
+        DbtSingleFlightWorkflow
+    :type workflow_cls: Type[DbtSingleFlightWorkflow], optional
+    :param mode: "attach" or "queue", defaults to None using the workflow's mode
+    :type mode: Optional[str], optional
+    :return: Handle whose result is the refresh the request was served by
+    :rtype: WorkflowHandle
+    """
+    mode = mode or getattr(workflow_cls, "mode", "attach")
+    workflow_id = single_flight_id(run_params)
+    if mode == "queue":
+        # Signal-with-start: starts the workflow, or queues behind the running one
+        return await client.start_workflow(
+            workflow_cls.run,
+            id=workflow_id,
+            task_queue=queue_name,
+            start_signal="request",
+            start_signal_args=[run_params],
+        )
+    try:
+        return await client.start_workflow(
+            workflow_cls.run, run_params, id=workflow_id, task_queue=queue_name
+        )
+    except WorkflowAlreadyStartedError:
+        return client.get_workflow_handle(workflow_id)
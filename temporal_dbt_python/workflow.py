@@ -1,18 +1,171 @@
+import asyncio
+import dataclasses
+import hashlib
 from datetime import timedelta
 from pathlib import Path
-from typing import Awaitable, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional, Tuple
 
 from temporalio import workflow
 from temporalio.common import RetryPolicy
-from temporalio.exceptions import ActivityError, ApplicationError
+from temporalio.exceptions import (
+    ActivityError,
+    ApplicationError,
+    ChildWorkflowError,
+    TimeoutType,
+)
 
 from temporal_dbt_python.activities import DbtActivities
-from temporal_dbt_python.dto import OperationRequest
+from temporal_dbt_python.dag import merge_run_summaries
+from temporal_dbt_python.dto import (
+    BatchRequest,
+    BatchSummary,
+    FreshnessReport,
+    OperationRequest,
+    RunSummary,
+)
+from temporal_dbt_python.exceptions import WorkflowExecutionError
+from temporal_dbt_python.freshness import source_selector
+
+# Skip the refresh without new source data, or only select models downstream of it
+FRESHNESS_GATES = frozenset({"skip", "select"})
+# Join the in-flight refresh's result, or queue a single refresh to run after it
+SINGLE_FLIGHT_MODES = frozenset({"attach", "queue"})
+
+
+def _location_hash(project_location: str) -> str:
+    """Short hash telling apart projects in same-named directories"""
+    return hashlib.sha1(Path(project_location).as_posix().encode()).hexdigest()[:8]
+
+
+def batch_key(run_params: OperationRequest) -> str:
+    """Identifies a request within a batch by project location and target"""
+    project = Path(run_params.project_location)
+    location_hash = _location_hash(run_params.project_location)
+    return f"{project.stem}-{location_hash}--{run_params.env}"
+
+
+def single_flight_id(run_params: OperationRequest) -> str:
+    """Workflow id shared by every refresh of the same project and target"""
+    project = Path(run_params.project_location)
+    location_hash = _location_hash(run_params.project_location)
+    return f"dbt-refresh--{project.stem}-{location_hash}--{run_params.env}"
+
+
+def batch_ready(
+    run_params: OperationRequest,
+    depends_on: Dict[str, List[str]],
+    keys: Collection[str],
+    summary: BatchSummary,
+) -> Optional[bool]:
+    """batch_ready Checks a request's upstream projects on the same target
+
+    :param run_params: Request waiting to run
+    :type run_params: OperationRequest
+    :param depends_on: Projects each project reads from, by project name. Every
+        project in the batch with an upstream's name counts as that upstream
+    :type depends_on: Dict[str, List[str]]
+    :param keys: `batch_key` of every request in the batch, upstream projects
+        outside of it are assumed to be refreshed elsewhere
+    :type keys: Collection[str]
+    :param summary: Outcomes so far
+    :type summary: BatchSummary
+    :return: True once every upstream request succeeded, False if one didn't, and
+        None while still waiting on them
+    :rtype: Optional[bool]
+    """
+    project = Path(run_params.project_location).stem
+    upstreams = set(depends_on.get(project, []))
+    suffix = f"--{run_params.env}"
+    waiting = False
+    for key in sorted(keys):
+        if not key.endswith(suffix):
+            continue
+        if key[: -len(suffix)].rsplit("-", 1)[0] not in upstreams:
+            continue
+        if key in summary.failed or key in summary.skipped:
+            return False
+        waiting = waiting or key not in summary.succeeded
+    return None if waiting else True
+
+
+def duplicate_batch_keys(
+    requests: List[OperationRequest], summary: BatchSummary
+) -> List[str]:
+    """Keys requested more than once, or again after already being run"""
+    seen = set(summary.succeeded) | set(summary.failed) | set(summary.skipped)
+    duplicates = []
+    for run_params in requests:
+        key = batch_key(run_params)
+        if key in seen and key not in duplicates:
+            duplicates.append(key)
+        seen.add(key)
+    return duplicates
+
+
+class DbtAlertingWorkflow:
+    """Notification helpers shared by the DBT workflows"""
+
+    alert_error_activity: Optional[Callable[[str], bool]] = None
+    alert_success_activity: Optional[Callable[[str], bool]] = None
+    n_retries: int
+    start_to_close: timedelta
+    retry_policy: RetryPolicy
+
+    async def _alert(
+        self,
+        run_params: OperationRequest,
+        step_id: str,
+        alert_fn: Optional[Callable[[str], Any]],
+        start_to_close=30,
+        max_attempts=3,
+    ):
+        """Internal wrapper for alert execution"""
+        if alert_fn is None:
+            return
+
+        project = Path(run_params.project_location).stem  # IDs which project
+        env = run_params.env  # IDs which profile target we're hititng
+        wfid = workflow.info().workflow_id  # IDs the specific workflow for follow up
+        identifier = f"{wfid}--{project}--{env}--{step_id}"
+        return await workflow.execute_activity(
+            alert_fn,
+            identifier,
+            start_to_close_timeout=timedelta(start_to_close),
+            retry_policy=RetryPolicy(maximum_attempts=max_attempts),
+        )
+
+    async def alert_success(
+        self, run_params: OperationRequest, step_id: str = "complete"
+    ):
+        """alert_success Sends notification to confirm succesful execution of pipeline
+
+        :param step_id: String denoting step of the workflow, defaults to "complete"
+        :type step_id: str
+        """
+        await self._alert(run_params, step_id, self.alert_success_activity)
+
+    async def alert_error(self, run_params: OperationRequest, step_id: str):
+        """alert_error Raises more durable notification in case of error
+
+        :param step_id: String denoting step of the workflow
+        :type step_id: str
+        """
+        await self._alert(
+            run_params,
+            step_id,
+            self.alert_error_activity,
+            start_to_close=60,
+            max_attempts=5,
+        )
 
 
 @workflow.defn
-class DbtRefreshWorkflow:
+class DbtRefreshWorkflow(DbtAlertingWorkflow):
     activity_mgr: DbtActivities
+    use_build: bool = False
+    freshness_gate: Optional[str] = None
+    sticky: bool = False
+    sticky_schedule_timeout: Optional[int] = None
 
     @classmethod
     def configure(
@@ -22,12 +175,18 @@ class DbtRefreshWorkflow:
         activity_mgr: DbtActivities,
         alert_error_activity: Optional[Callable[[str], bool]] = None,
         alert_success_activity: Optional[Callable[[str], bool]] = None,
+        use_build: bool = False,
+        freshness_gate: Optional[str] = None,
+        sticky: bool = False,
+        sticky_schedule_timeout: Optional[int] = None,
     ):
         """DbtRefreshWorkflow Executes basic DBT refresh workflow.
 
-        Due to no `temporalio` support for sessions, this workflow should be executed
-        on a single worker. Use the Go SDK to compose a session-based workflow based
-        on Python activities if multiple machines are required.
+        The steps share DBT state on disk, so without `sticky` this workflow should
+        be executed on a single worker. With it, the first step claims whichever
+        worker picks it up and every later step runs on that worker's host queue,
+        so many workers created with `create_worker(sticky=True)` can share the
+        load. The Go SDK's sessions are an alternative.
 
         :param n_retries: Number of retries for DBT operations
         :type n_retries: int
@@ -45,6 +204,25 @@ class DbtRefreshWorkflow:
         :type alert_error_activity: Optional[Callable], optional
         :param alert_success_activity: Notifies on workflow success, defaults to None
         :type alert_success_activity: Optional[Callable], optional
+        :param use_build: Replace the `test_source`, `run` and `test` steps with a
+            single `dbt build`, still alerting on the phase that failed. Defaults to
+            False
+        :type use_build: bool, optional
+        :param freshness_gate: Check source freshness before transforming. "skip"
+            skips the refresh when no source has new data, alerting success with
+            step "skipped". "select" also narrows the refresh to models downstream
+            of fresh sources. Defaults to None, always refreshing everything
+        :type freshness_gate: Optional[str], optional
+        :param sticky: Run every step on the host that claims the workflow,
+            defaults to False
+        :type sticky: bool, optional
+        :param sticky_schedule_timeout: Seconds a step waits for the claimed worker
+            to start it, after which the step and every later one run on any
+            worker. Set it well above the longest step, so only a dead host trips
+            it, and only if workers share the project's state on disk. Defaults to
+            None, waiting for the claimed worker however long it is busy
+        :type sticky_schedule_timeout: Optional[int], optional
+        :raises WorkflowExecutionError: On an unknown freshness gate
         :return: Returns a true value denoting the success of the run
         :rtype: bool
         """
@@ -54,6 +232,12 @@ class DbtRefreshWorkflow:
         cls.alert_error_activity = alert_error_activity
         cls.alert_success_activity = alert_success_activity
         cls.retry_policy = RetryPolicy(maximum_attempts=n_retries)
+        cls.use_build = use_build
+        if freshness_gate is not None and freshness_gate not in FRESHNESS_GATES:
+            raise WorkflowExecutionError(f"Unknown freshness gate {freshness_gate}")
+        cls.freshness_gate = freshness_gate
+        cls.sticky = sticky
+        cls.sticky_schedule_timeout = sticky_schedule_timeout
         return cls
 
     @workflow.run
@@ -64,75 +248,383 @@ class DbtRefreshWorkflow:
         :type run_params: OperationRequest
         :raises ApplicationError: Raises on exceed retry limit after notifying team
         """
-        tasks = [
+        setup: List[Tuple[str, Callable[[OperationRequest], Awaitable[Any]]]] = [
             ("debug", self.activity_mgr.debug),
             ("deps", self.activity_mgr.deps),
-            ("test_source", self.activity_mgr.test_source),
-            ("run", self.activity_mgr.run),
-            ("test", self.activity_mgr.test),
         ]
+        tasks: List[Tuple[str, Callable[[OperationRequest], Awaitable[Any]]]] = []
+        if self.use_build:
+            tasks.append(("build", self.activity_mgr.build))
+        else:
+            tasks.extend(
+                [
+                    ("test_source", self.activity_mgr.test_source),
+                    ("run", self.activity_mgr.run),
+                    ("test", self.activity_mgr.test),
+                ]
+            )
 
+        report = None
+        self._routing: Dict[str, Any] = {}
         try:
-            for name, activity in tasks:
-                await workflow.execute_activity(
-                    activity,
-                    run_params,
-                    retry_policy=self.retry_policy,
-                    start_to_close_timeout=self.start_to_close,
+            if self.sticky:
+                name = "claim_worker"
+                host_queue = await self._step(
+                    self.activity_mgr.claim_worker, run_params
+                )
+                self._routing = {"task_queue": host_queue}
+                if self.sticky_schedule_timeout is not None:
+                    self._routing["schedule_to_start_timeout"] = timedelta(
+                        seconds=self.sticky_schedule_timeout
+                    )
+            for name, activity in setup:
+                await self._step(activity, run_params)
+            if self.freshness_gate is not None:
+                name = "source_freshness"
+                report = await self._step(
+                    self.activity_mgr.source_freshness, run_params
                 )
+                if report.fresh == []:
+                    workflow.logger.info("No new source data, skipping the refresh")
+                    await self.alert_success(run_params, "skipped")
+                    return
+                run_params = dataclasses.replace(
+                    self._fresh_selection(run_params, report),
+                    source_loaded_at=report.loaded_at,
+                )
+
+            for name, activity in tasks:
+                result = await self._step(activity, run_params)
+            if self.use_build:
+                await self._check_build_phases(run_params, result)
+            if report is not None:
+                name = "commit_freshness"
+                await self._step(self.activity_mgr.commit_freshness, run_params, report)
             await self.alert_success(run_params)
         except ActivityError as ae:
             await self.alert_error(run_params, name)
             raise ApplicationError(f"Workflow failed at step {name}: {str(ae)}")
         finally:
-            await workflow.execute_activity(
-                self.activity_mgr.clean,
-                run_params,
+            await self._step(self.activity_mgr.clean, run_params)
+
+    async def _step(self, activity: Callable, *args: Any) -> Any:
+        """_step Runs a step on the claimed worker, or any worker if it is gone
+
+        A step the claimed worker doesn't start within `sticky_schedule_timeout`
+        runs on the shared queue instead, as does every step after it.
+
+        :param activity: Activity to run
+        :type activity: Callable
+        :return: The activity's result
+        :rtype: Any
+        """
+        try:
+            return await workflow.execute_activity(
+                activity,
+                args=list(args),
                 retry_policy=self.retry_policy,
                 start_to_close_timeout=self.start_to_close,
+                **self._routing,
             )
+        except ActivityError as ae:
+            timeout = getattr(ae.cause, "type", None)
+            if timeout != TimeoutType.SCHEDULE_TO_START or not self._routing:
+                raise
+            workflow.logger.warning(
+                f"{self._routing['task_queue']} did not start the step in time, "
+                "continuing on any worker"
+            )
+            self._routing = {}
+            return await self._step(activity, *args)
 
-    async def _alert(
-        self,
-        run_params: OperationRequest,
-        step_id: str,
-        alert_fn: Callable[[str, Dict], Awaitable[None]],
-        start_to_close=30,
-        max_attempts=3,
+    def _fresh_selection(
+        self, run_params: OperationRequest, report: FreshnessReport
+    ) -> OperationRequest:
+        """Narrows the request to models downstream of sources with new data"""
+        if self.freshness_gate != "select" or report.fresh is None:
+            return run_params
+        selectors = [source_selector(unique_id) for unique_id in report.fresh]
+        if run_params.select:
+            # DBT intersects comma separated selectors
+            selectors = [f"{s},{f}" for s in run_params.select for f in selectors]
+        return dataclasses.replace(run_params, select=selectors)
+
+    async def _check_build_phases(
+        self, run_params: OperationRequest, phases: Dict[str, bool]
     ):
-        """Internal wrapper for alert execution"""
-        if alert_fn is None:
-            return
+        """Alerts and fails on the first phase of a `dbt build` that didn't pass"""
+        for phase, passed in phases.items():
+            if not passed:
+                await self.alert_error(run_params, phase)
+                raise ApplicationError(f"Workflow failed at step {phase}")
 
-        project = Path(run_params.project_location).stem  # IDs which project
-        env = run_params.env  # IDs which profile target we're hititng
-        wfid = workflow.info().workflow_id  # IDs the specific workflow for follow up
-        identifier = f"{wfid}--{project}--{env}--{step_id}"
-        return await workflow.execute_activity(
-            alert_fn,
-            identifier,
-            start_to_close_timeout=timedelta(start_to_close),
-            retry_policy=RetryPolicy(maximum_attempts=max_attempts),
+
+@workflow.defn
+class DbtDistributedRefreshWorkflow(DbtAlertingWorkflow):
+    activity_mgr: DbtActivities
+    max_shards: int = 4
+
+    @classmethod
+    def configure(
+        cls,
+        n_retries: int,
+        start_to_close: int,
+        activity_mgr: DbtActivities,
+        max_shards: int = 4,
+        alert_error_activity: Optional[Callable[[str], bool]] = None,
+        alert_success_activity: Optional[Callable[[str], bool]] = None,
+    ):
+        """DbtDistributedRefreshWorkflow Fans a DBT run out across many workers
+
+        The model DAG is split into shards that are run as parallel `--select`
+        activities on the shared task queue, stage by stage so dependencies are
+        always built first. Every worker must have the project, its packages and
+        the profile available at the same location.
+
+        :param n_retries: Number of retries for DBT operations
+        :type n_retries: int
+        :param start_to_close: Timeout in seconds for each DBT operation
+        :type start_to_close: int
+        :param activity_mgr: Instance of the activity manager class
+        :type activity_mgr: DbtActivities
+        :param max_shards: Upper limit on shards run concurrently, defaults to 4
+        :type max_shards: int, optional
+        :param alert_error_activity: Notifies in case of activity failure, defaults to
+            None
+        :type alert_error_activity: Optional[Callable], optional
+        :param alert_success_activity: Notifies on workflow success, defaults to None
+        :type alert_success_activity: Optional[Callable], optional
+        :return: Returns the configured workflow class
+        :rtype: Type[DbtDistributedRefreshWorkflow]
+        """
+        cls.n_retries = n_retries
+        cls.start_to_close = timedelta(seconds=start_to_close)
+        cls.activity_mgr = activity_mgr
+        cls.max_shards = max_shards
+        cls.alert_error_activity = alert_error_activity
+        cls.alert_success_activity = alert_success_activity
+        cls.retry_policy = RetryPolicy(maximum_attempts=n_retries)
+        return cls
+
+    @workflow.run
+    async def run(self, run_params: OperationRequest) -> RunSummary:
+        """run The main execution method of the workflow
+
+        :param run_params: Parameters sent by the server
+        :type run_params: OperationRequest
+        :raises ApplicationError: Raises on exceed retry limit after notifying team
+        :return: Merged per-node results of every shard
+        :rtype: RunSummary
+        """
+        name = "plan_shards"
+        try:
+            plan = await workflow.execute_activity(
+                self.activity_mgr.plan_shards,
+                args=[run_params, self.max_shards],
+                retry_policy=self.retry_policy,
+                start_to_close_timeout=self.start_to_close,
+            )
+
+            name = "run"
+            started = workflow.now()
+            summaries = []
+            for stage in plan.stages:
+                summaries.extend(
+                    await asyncio.gather(
+                        *[
+                            workflow.execute_activity(
+                                self.activity_mgr.run_shard,
+                                dataclasses.replace(run_params, select=shard),
+                                retry_policy=self.retry_policy,
+                                start_to_close_timeout=self.start_to_close,
+                            )
+                            for shard in stage
+                        ]
+                    )
+                )
+            await self.alert_success(run_params)
+        except ActivityError as ae:
+            await self.alert_error(run_params, name)
+            raise ApplicationError(f"Workflow failed at step {name}: {str(ae)}")
+        summary = merge_run_summaries(summaries)
+        summary.predicted_makespan = plan.predicted_makespan
+        summary.makespan = (workflow.now() - started).total_seconds()
+        if summary.predicted_makespan is not None:
+            workflow.logger.info(
+                f"Predicted shard makespan {summary.predicted_makespan:.1f}s, "
+                f"took {summary.makespan:.1f}s"
+            )
+        return summary
+
+
+@workflow.defn
+class DbtBatchRefreshWorkflow:
+    child_workflow: Any = DbtRefreshWorkflow
+    max_concurrent: int = 4
+    max_children_per_run: int = 100
+
+    @classmethod
+    def configure(
+        cls,
+        child_workflow: type = DbtRefreshWorkflow,
+        max_concurrent: int = 4,
+        max_children_per_run: int = 100,
+    ):
+        """DbtBatchRefreshWorkflow Refreshes many projects and targets as one batch
+
+        Each request runs as a child workflow, at most `max_concurrent` at a time.
+        A project waits for the projects it depends on to succeed on the same
+        target, and is skipped if one of them fails. Continues as new once
+        `max_children_per_run` children have finished, keeping history bounded.
+        Register the child workflow on the same worker.
+
+        :param child_workflow: Workflow run for each request, defaults to
+            DbtRefreshWorkflow
+        :type child_workflow: type, optional
+        :param max_concurrent: Children running at once, defaults to 4
+        :type max_concurrent: int, optional
+        :param max_children_per_run: Children started before continuing as new,
+            defaults to 100
+        :type max_children_per_run: int, optional
+        :return: Returns the configured workflow class
+        :rtype: Type[DbtBatchRefreshWorkflow]
+        """
+        cls.child_workflow = child_workflow
+        cls.max_concurrent = max_concurrent
+        cls.max_children_per_run = max_children_per_run
+        return cls
+
+    @workflow.run
+    async def run(self, batch: BatchRequest) -> BatchSummary:
+        """run The main execution method of the workflow
+
+        :param batch: Requests to refresh and the dependencies between projects
+        :type batch: BatchRequest
+        :raises ApplicationError: If a project and target is requested twice, as
+            its children would share a workflow id
+        :return: Keys of the requests that succeeded, failed or were skipped
+        :rtype: BatchSummary
+        """
+        duplicates = duplicate_batch_keys(batch.requests, batch.summary)
+        if duplicates:
+            raise ApplicationError(
+                f"Batch requests {', '.join(duplicates)} more than once",
+                non_retryable=True,
+            )
+        summary = batch.summary
+        keys = {batch_key(r) for r in batch.requests}
+        keys.update(summary.succeeded, summary.failed, summary.skipped)
+        pending = list(batch.requests)
+        running: Dict[asyncio.Future, str] = {}
+        started = 0
+        while pending or running:
+            for run_params in list(pending):
+                ready = batch_ready(run_params, batch.depends_on, keys, summary)
+                if ready is None:
+                    continue
+                if ready and (
+                    len(running) >= self.max_concurrent
+                    or started >= self.max_children_per_run
+                ):
+                    continue
+                pending.remove(run_params)
+                key = batch_key(run_params)
+                if not ready:
+                    workflow.logger.warning(f"Skipping {key}, an upstream failed")
+                    summary.skipped.append(key)
+                    continue
+                child = workflow.execute_child_workflow(
+                    self.child_workflow.run,
+                    run_params,
+                    id=f"{workflow.info().workflow_id}--{key}",
+                )
+                running[asyncio.ensure_future(child)] = key
+                started += 1
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in [t for t in running if t in done]:  # Deterministic order
+                key = running.pop(task)
+                try:
+                    task.result()
+                    summary.succeeded.append(key)
+                except ChildWorkflowError as e:
+                    workflow.logger.error(f"Refresh of {key} failed: {e}")
+                    summary.failed.append(key)
+
+        if pending and started >= self.max_children_per_run:
+            workflow.continue_as_new(BatchRequest(pending, batch.depends_on, summary))
+        for run_params in pending:
+            # Only cyclic dependencies leave requests that can never become ready
+            workflow.logger.error(f"Skipping {batch_key(run_params)}, cyclic deps")
+            summary.skipped.append(batch_key(run_params))
+        workflow.logger.info(
+            f"Batch finished, {len(summary.succeeded)} succeeded, "
+            f"{len(summary.failed)} failed and {len(summary.skipped)} skipped"
         )
+        return summary
 
-    async def alert_success(self, run_params: OperationRequest):
-        """alert_success Sends notification to confirm succesful execution of pipeline
 
-        :param step_id: String denoting step of the workflow
-        :type step_id: str
+@workflow.defn
+class DbtSingleFlightWorkflow:
+    child_workflow: Any = DbtRefreshWorkflow
+    mode: str = "attach"
+
+    @classmethod
+    def configure(cls, child_workflow: type = DbtRefreshWorkflow, mode: str = "attach"):
+        """DbtSingleFlightWorkflow Coalesces overlapping refreshes of one project
+
+        Runs under the id from `single_flight_id`, so at most one refresh of a
+        project and target is in flight. Start it with `start_single_flight`. In
+        "attach" mode a second request waits on the in-flight run's result. In
+        "queue" mode it is signalled in, and one more refresh runs after the
+        current one, however many requests arrived meanwhile. Register the child
+        workflow on the same worker.
+
+        :param child_workflow: Workflow doing the refresh, defaults to
+            DbtRefreshWorkflow
+        :type child_workflow: type, optional
+        :param mode: "attach" or "queue", defaults to "attach"
+        :type mode: str, optional
+        :raises WorkflowExecutionError: On an unknown mode
+        :return: Returns the configured workflow class
+        :rtype: Type[DbtSingleFlightWorkflow]
         """
-        await self._alert(run_params, "complete", self.alert_success_activity)
+        if mode not in SINGLE_FLIGHT_MODES:
+            raise WorkflowExecutionError(f"Unknown single flight mode {mode}")
+        cls.child_workflow = child_workflow
+        cls.mode = mode
+        return cls
 
-    async def alert_error(self, run_params: OperationRequest, step_id: str):
-        """alert_error Raises more durable notification in case of error
+    def __init__(self) -> None:
+        self._queued: Optional[OperationRequest] = None
 
-        :param step_id: String denoting step of the workflow
-        :type step_id: str
+    @workflow.signal
+    def request(self, run_params: OperationRequest):
+        """Queues a refresh after the current one, replacing any already queued"""
+        self._queued = run_params
+
+    @workflow.run
+    async def run(self, run_params: Optional[OperationRequest] = None) -> Any:
+        """run The main execution method of the workflow
+
+        :param run_params: Refresh to run, defaults to None waiting for a `request`
+            signal as sent by signal-with-start
+        :type run_params: Optional[OperationRequest], optional
+        :return: Result of the last refresh run
+        :rtype: Any
         """
-        await self._alert(
+        if run_params is None:
+            await workflow.wait_condition(lambda: self._queued is not None)
+            run_params, self._queued = self._queued, None
+
+        result = await workflow.execute_child_workflow(
+            self.child_workflow.run,
             run_params,
-            step_id,
-            self.alert_error_activity,
-            start_to_close=60,
-            max_attempts=5,
+            id=f"{workflow.info().workflow_id}--refresh",
         )
+        if self._queued is not None:
+            # Requests that arrived mid-refresh run once more, in a fresh history
+            workflow.continue_as_new(self._queued)
+        return result
@@ -1,19 +1,38 @@
 import asyncio
+import json
+import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest import mock
 
+from temporalio.testing import ActivityEnvironment
+
 from temporal_dbt_python.activities import (
     DbtActivities,
+    build_phases,
+    dbt_build,
     dbt_clean,
     dbt_debug,
     dbt_deps,
     dbt_docs_generate,
+    dbt_plan_shards,
     dbt_run,
+    dbt_run_shard,
+    dbt_source_freshness,
     dbt_test,
+    selection_flags,
 )
-from temporal_dbt_python.dto import DbtResults, OperationRequest
-from temporal_dbt_python.exceptions import WorkflowExecutionError
+from temporal_dbt_python.concurrency import WarehouseSlots, project_key
+from temporal_dbt_python.debug_cache import DebugCache
+from temporal_dbt_python.dto import DbtResults, OperationRequest, ShardPlan
+from temporal_dbt_python.exceptions import PartialRunError, WorkflowExecutionError
+from temporal_dbt_python.freshness import FreshnessStore
+from temporal_dbt_python.history import DurationHistory
+from temporal_dbt_python.result_cache import ResultCache, node_fingerprints
+from temporal_dbt_python.state import StateStore
+from temporal_dbt_python.thread_policy import FixedThreads
 
 results_success = DbtResults(0, "log string", {"test": "results"})
 results_fail = DbtResults(1, "log string", {"test": "results"})
@@ -22,6 +41,27 @@ dbt_activities = DbtActivities(Path(__file__).parent)
 
 op_request = OperationRequest("dev", "./test")
 
+build_manifest = {
+    "nodes": {
+        "test.proj.not_null_stg_orders_id": {"fqn": ["proj", "staging", "nn"]},
+        "test.proj.unique_orders_id": {"fqn": ["proj", "marts", "unique"]},
+    }
+}
+
+
+def build_results(exit_code, statuses):
+    run_results = {
+        "results": [
+            {"unique_id": unique_id, "status": status}
+            for unique_id, status in statuses.items()
+        ]
+    }
+    return DbtResults(
+        exit_code,
+        "log string",
+        {"run_results": run_results, "manifest": build_manifest},
+    )
+
 
 @mock.patch("temporal_dbt_python.activities.dbt_handler", return_value=results_success)
 class TestActivities(unittest.TestCase):
@@ -40,6 +80,14 @@ class TestActivities(unittest.TestCase):
         with self.assertRaises(WorkflowExecutionError):
             parse_output("id", results_fail, None)
 
+        # only the tail of a long log is logged
+        long_log = DbtResults(1, "".join(f"line {i}\n" for i in range(1000)), {})
+        with self.assertLogs(level="ERROR") as logs:
+            with self.assertRaises(WorkflowExecutionError):
+                parse_output("id", long_log, None)
+        self.assertNotIn("line 979\n", logs.records[0].getMessage())
+        self.assertTrue(logs.records[0].getMessage().endswith("line 999"))
+
         # should raise signal
         with self.assertRaises(OutputExeption):
             self.assertTrue(parse_output("Id", results_success, check_output_callback))
@@ -59,6 +107,37 @@ class TestActivities(unittest.TestCase):
         self.assertTrue(dbt_debug("dev", "./test"))
         self.assertTrue(asyncio.run(dbt_activities.debug(op_request)))
 
+    def test_activity_dbt_debug_cached(self, mock_handler):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = DebugCache(str(Path(tmp_dir, "debug.json")), ttl=60)
+            cached_activities = DbtActivities(Path(__file__).parent, debug_cache=cache)
+            self.assertTrue(asyncio.run(cached_activities.debug(op_request)))
+            self.assertTrue(asyncio.run(cached_activities.debug(op_request)))
+            mock_handler.assert_called_once()
+
+            # Failures aren't cached
+            mock_handler.return_value = results_fail
+            with self.assertRaises(WorkflowExecutionError):
+                dbt_debug("prod", "./test", debug_cache=cache)
+            with self.assertRaises(WorkflowExecutionError):
+                dbt_debug("prod", "./test", debug_cache=cache)
+            self.assertEqual(mock_handler.call_count, 3)
+            mock_handler.return_value = results_success
+
+    def test_activity_dbt_debug_connection_only(self, mock_handler):
+        probe_activities = DbtActivities(
+            Path(__file__).parent, debug_connection_only=True
+        )
+        with mock.patch(
+            "temporal_dbt_python.activities.probe_connection", return_value=None
+        ) as probe:
+            self.assertTrue(asyncio.run(probe_activities.debug(op_request)))
+            probe.return_value = "Could not connect"
+            with self.assertRaises(WorkflowExecutionError):
+                dbt_debug("dev", "./test", connection_only=True)
+        self.assertEqual(probe.call_args.args[0], "dev")
+        mock_handler.assert_not_called()
+
     def test_activity_dbt_clean(self, mock_handler):
         self.assertTrue(dbt_clean("dev", "./test"))
         self.assertTrue(asyncio.run(dbt_activities.clean(op_request)))
@@ -74,3 +153,426 @@ class TestActivities(unittest.TestCase):
     def test_activity_dbt_test_source(self, mock_handler):
         self.assertTrue(dbt_test("dev", "./test", staging_only=True))
         self.assertTrue(asyncio.run(dbt_activities.test_source(op_request)))
+
+    def test_activity_dispatch_to_executor(self, mock_handler):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            pooled_activities = DbtActivities(Path(__file__).parent, executor=executor)
+
+            async def run_concurrently():
+                return await asyncio.gather(
+                    pooled_activities.run(op_request),
+                    pooled_activities.test(op_request),
+                )
+
+            self.assertListEqual(asyncio.run(run_concurrently()), [True, True])
+        self.assertEqual(mock_handler.call_count, 2)
+
+    def test_build_phases(self, mock_handler):
+        run_results = build_results(
+            1,
+            {
+                "test.proj.not_null_stg_orders_id": "pass",
+                "model.proj.orders": "success",
+                "test.proj.unique_orders_id": "fail",
+            },
+        ).outputs["run_results"]
+        self.assertDictEqual(
+            build_phases(run_results, build_manifest),
+            {"test_source": True, "run": True, "test": False},
+        )
+
+    def test_activity_dbt_build(self, mock_handler):
+        self.assertDictEqual(
+            dbt_build("dev", "./test"),
+            {"test_source": True, "run": True, "test": True},
+        )
+        self.assertTrue(all(asyncio.run(dbt_activities.build(op_request)).values()))
+
+        mock_handler.return_value = build_results(
+            1,
+            {
+                "test.proj.not_null_stg_orders_id": "fail",
+                "model.proj.orders": "skipped",
+            },
+        )
+        self.assertDictEqual(
+            dbt_build("dev", "./test"),
+            {"test_source": False, "run": True, "test": True},
+        )
+
+        mock_handler.return_value = results_fail
+        with self.assertRaises(WorkflowExecutionError):
+            dbt_build("dev", "./test")
+
+    def test_selection_flags(self, mock_handler):
+        self.assertListEqual(selection_flags(), [])
+        self.assertListEqual(
+            selection_flags(["a", "b"], ["c"]), ["--select", "a", "b", "--exclude", "c"]
+        )
+        dbt_test("dev", "./test", staging_only=True, select=["a"], exclude=["c"])
+        self.assertListEqual(
+            mock_handler.call_args.args[2],
+            ["test", "--select", "staging", "--exclude", "c"],
+        )
+
+    def test_state_selection_flags(self, mock_handler):
+        self.assertListEqual(
+            selection_flags(exclude=["c"], state_location="state"),
+            ["--select", "state:modified+", "--exclude", "c"]
+            + ["--defer", "--state", "state"],
+        )
+        self.assertListEqual(
+            selection_flags(["a"], state_location="state")[:2],
+            ["--select", "a,state:modified+"],
+        )
+
+    def test_activity_slim_run(self, mock_handler):
+        slim_request = OperationRequest("dev", "./test", state_mode="slim")
+        with self.assertRaises(WorkflowExecutionError):
+            asyncio.run(dbt_activities.run(slim_request))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = StateStore(tmp_dir)
+            slim_activities = DbtActivities(Path(__file__).parent, state_store=store)
+            mock_handler.return_value = DbtResults(0, "", {"manifest": build_manifest})
+
+            # No saved state, so the first run is a full one that records state
+            self.assertTrue(asyncio.run(slim_activities.run(slim_request)))
+            self.assertNotIn("--state", mock_handler.call_args.args[2])
+            state_location = store.latest(str(Path(__file__).parent / "test"), "dev")
+            self.assertIsNotNone(state_location)
+
+            self.assertTrue(asyncio.run(slim_activities.test(slim_request)))
+            self.assertIn(state_location, mock_handler.call_args.args[2])
+
+    def test_dbt_run_retries_remaining_nodes(self, mock_handler):
+        # stg_orders shares its name with a directory of models
+        paths = ["stg_orders", "orders", "revenue", "stg_orders/orders_by_day"]
+        run_manifest = {
+            "nodes": {
+                f"model.proj.{path.split('/')[-1]}": {
+                    "name": path.split("/")[-1],
+                    "fqn": ["proj"] + path.split("/"),
+                    "original_file_path": f"models/{path}.sql",
+                }
+                for path in paths
+            }
+        }
+
+        def handler(env, project, commands, *args, **kwargs):
+            if commands[0] == "parse":
+                return DbtResults(0, "", {"manifest": run_manifest})
+            return results
+
+        results = build_results(
+            1,
+            {
+                "model.proj.stg_orders": "success",
+                "model.proj.orders": "error",
+                "model.proj.revenue": "skipped",
+            },
+        )
+        mock_handler.side_effect = handler
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(PartialRunError) as ctx:
+                dbt_run("dev", tmp_dir)
+            completed = ctx.exception.completed
+            self.assertListEqual(completed, ["model.proj.stg_orders"])
+
+            stored = {}
+            results = build_results(
+                0, {"model.proj.orders": "success", "model.proj.revenue": "success"}
+            )
+            dbt_run(
+                "dev", tmp_dir, None, False, stored.__setitem__, completed=completed
+            )
+            self.assertListEqual(
+                mock_handler.call_args.args[2],
+                [
+                    "run",
+                    "--fail-fast",
+                    "--exclude",
+                    "package:proj,proj.stg_orders,file:stg_orders.sql",
+                ],
+            )
+            run_results = list(stored.values())[0]["run_results"]
+            self.assertEqual(len(run_results["results"]), 2)
+
+            # The earlier attempt's entries are merged in when it left them behind
+            Path(tmp_dir, "target").mkdir()
+            Path(tmp_dir, "target", "run_results.json").write_text(
+                json.dumps(
+                    {
+                        "results": [
+                            {"unique_id": "model.proj.stg_orders", "status": "success"},
+                            {"unique_id": "model.proj.orders", "status": "error"},
+                        ]
+                    }
+                )
+            )
+            dbt_run(
+                "dev", tmp_dir, None, False, stored.__setitem__, completed=completed
+            )
+            run_results = json.loads(list(stored.values())[-1]["run_results"])
+            self.assertListEqual(
+                [r["unique_id"] for r in run_results["results"]],
+                ["model.proj.stg_orders", "model.proj.orders", "model.proj.revenue"],
+            )
+
+    def test_dbt_run_skips_cached_nodes(self, mock_handler):
+        manifest = {
+            "nodes": {
+                "model.proj.calendar": {"raw_code": "select 1"},
+                "model.proj.orders": {"raw_code": "select 2"},
+                "model.proj.stg_orders": {
+                    "raw_code": "select 4",
+                    "depends_on": {"nodes": ["source.proj.shop.orders"]},
+                },
+            },
+            "sources": {"source.proj.shop.orders": {}},
+        }
+        for unique_id, node in manifest["nodes"].items():
+            node.update(name=unique_id.split(".")[-1], fqn=unique_id.split(".")[1:])
+        parse_results = DbtResults(0, "", {"manifest": manifest})
+        run_results = build_results(
+            0,
+            {
+                "model.proj.calendar": "success",
+                "model.proj.orders": "success",
+                "model.proj.stg_orders": "success",
+            },
+        )
+        loaded_at = {"source.proj.shop.orders": "2022-10-02T00:00:00Z"}
+        # Where the activities below resolve the request's project to
+        project = str(Path(__file__).parent / "test")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ResultCache(str(Path(tmp_dir, "results.json")))
+            mock_handler.side_effect = [parse_results, run_results]
+            dbt_run("dev", project, result_cache=cache, source_loaded_at=loaded_at)
+            self.assertListEqual(mock_handler.call_args.args[2], ["run", "--fail-fast"])
+
+            # Source load times only count when this refresh checked them
+            mock_handler.side_effect = [parse_results, run_results]
+            dbt_run("dev", project, result_cache=cache, source_loaded_at=loaded_at)
+            self.assertIn("package:proj,stg_orders", mock_handler.call_args.args[2])
+            mock_handler.side_effect = [parse_results, run_results]
+            dbt_run("dev", project, result_cache=cache)
+            self.assertNotIn("package:proj,stg_orders", mock_handler.call_args.args[2])
+
+            manifest["nodes"]["model.proj.orders"]["raw_code"] = "select 3"
+            mock_handler.side_effect = [parse_results, run_results]
+            activities = DbtActivities(Path(__file__).parent, result_cache=cache)
+            asyncio.run(activities.run(op_request))
+            self.assertListEqual(
+                mock_handler.call_args.args[2],
+                ["run", "--fail-fast", "--exclude", "package:proj,calendar"],
+            )
+
+            mock_handler.side_effect = [parse_results, run_results]
+            refresh_request = OperationRequest("dev", "./test", full_refresh=True)
+            asyncio.run(activities.run(refresh_request))
+            self.assertListEqual(
+                mock_handler.call_args.args[2],
+                ["run", "--fail-fast", "--full-refresh"],
+            )
+            fingerprints = node_fingerprints(manifest)
+            self.assertEqual(
+                len(cache.unchanged(project_key(project, "dev"), fingerprints)), 2
+            )
+            self.assertListEqual(cache.unchanged("dev", fingerprints), [])
+
+    def test_activity_dbt_source_freshness(self, mock_handler):
+        freshness = {
+            "results": [
+                {
+                    "unique_id": "source.proj.shop.orders",
+                    "status": "error",
+                    "max_loaded_at": "2022-10-02T00:00:00Z",
+                }
+            ]
+        }
+        mock_handler.return_value = DbtResults(1, "", {"sources": freshness})
+        report = dbt_source_freshness("dev", "./test")
+        self.assertListEqual(mock_handler.call_args.args[2], ["source", "freshness"])
+        self.assertListEqual(report.fresh, [])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = FreshnessStore(str(Path(tmp_dir, "sources.json")))
+            activities = DbtActivities(Path(__file__).parent, freshness_store=store)
+            report = asyncio.run(activities.source_freshness(op_request))
+            self.assertListEqual(report.fresh, ["source.proj.shop.orders"])
+
+            asyncio.run(activities.commit_freshness(op_request, report))
+            report = asyncio.run(activities.source_freshness(op_request))
+            self.assertListEqual(report.fresh, [])
+
+            # Other projects on the target keep their own load times
+            other_request = OperationRequest("dev", "./other")
+            report = asyncio.run(activities.source_freshness(other_request))
+            self.assertListEqual(report.fresh, ["source.proj.shop.orders"])
+
+        # Nothing to check, so the gate can't tell whether data changed
+        mock_handler.return_value = DbtResults(0, "", {"sources": {"results": []}})
+        self.assertIsNone(dbt_source_freshness("dev", "./test").fresh)
+        mock_handler.return_value = results_fail
+        with self.assertRaises(WorkflowExecutionError):
+            dbt_source_freshness("dev", "./test")
+
+    def test_activity_warehouse_slots(self, mock_handler):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            slots = WarehouseSlots(tmp_dir, 2, threads_per_run=4)
+            activities = DbtActivities(Path(__file__).parent, warehouse_slots=slots)
+            self.assertTrue(asyncio.run(activities.run(op_request)))
+            self.assertEqual(mock_handler.call_args.kwargs["threads"], 2)
+            self.assertTrue(asyncio.run(activities.deps(op_request)))
+            self.assertNotIn("threads", mock_handler.call_args.kwargs)
+
+    def test_activity_warehouse_slots_without_executor(self, mock_handler):
+        running = []
+        peak = []
+
+        def slow_handler(*args, **kwargs):
+            running.append(1)
+            peak.append(len(running))
+            time.sleep(0.2)
+            running.pop()
+            return results_success
+
+        mock_handler.side_effect = slow_handler
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            slots = WarehouseSlots(tmp_dir, 1, threads_per_run=1, poll_interval=0.05)
+            activities = DbtActivities(Path(__file__).parent, warehouse_slots=slots)
+
+            async def run_both():
+                ticks = 0
+
+                async def tick():
+                    nonlocal ticks
+                    while True:
+                        await asyncio.sleep(0.01)
+                        ticks += 1
+
+                ticker = asyncio.ensure_future(tick())
+                results = await asyncio.gather(
+                    activities.run(op_request), activities.test(op_request)
+                )
+                ticker.cancel()
+                return results, ticks
+
+            results, ticks = asyncio.run(run_both())
+        mock_handler.side_effect = None
+        self.assertEqual(results, [True, True])
+        self.assertEqual(max(peak), 1)
+        # The event loop kept running while one activity waited for the slot
+        self.assertGreater(ticks, 20)
+
+    def test_activity_thread_policy(self, mock_handler):
+        def report_results(env, project, commands, *args, results_callback, **kwargs):
+            results = build_results(0, {"model.proj.orders": "success"})
+            results.threads = kwargs["threads"]
+            results_callback(commands, results, 2.0)
+            return results
+
+        mock_handler.side_effect = report_results
+        sink = mock.Mock()
+        activities = DbtActivities(
+            Path(__file__).parent, metrics_sink=sink, thread_policy=FixedThreads(6)
+        )
+        asyncio.run(activities.run(op_request))
+        self.assertEqual(sink.emit.call_args.args[0].threads, 6)
+
+        # Requests can pin their own thread count
+        asyncio.run(activities.run(OperationRequest("dev", "./test", threads=2)))
+        self.assertEqual(sink.emit.call_args.args[0].threads, 2)
+
+    def test_activity_profiling(self, mock_handler):
+        asyncio.run(dbt_activities.run(op_request))
+        self.assertNotIn("profiling", mock_handler.call_args.kwargs)
+        profiled = OperationRequest("dev", "./test", profiling="sampling")
+        asyncio.run(dbt_activities.run(profiled))
+        self.assertEqual(mock_handler.call_args.kwargs["profiling"], "sampling")
+
+        profiling_activities = DbtActivities(
+            Path(__file__).parent, profiling="cprofile"
+        )
+        asyncio.run(profiling_activities.test(op_request))
+        self.assertEqual(mock_handler.call_args.kwargs["profiling"], "cprofile")
+
+    def test_activity_heartbeats_progress_and_retry_state(self, mock_handler):
+        def report_progress(*args, progress_callback=None, **kwargs):
+            progress_callback(1, 2)
+            return build_results(1, {"model.proj.stg_orders": "success"})
+
+        mock_handler.side_effect = report_progress
+        heartbeats = []
+        env = ActivityEnvironment()
+        env.on_heartbeat = lambda *details: heartbeats.append(details)
+        with self.assertRaises(PartialRunError):
+            asyncio.run(env.run(dbt_activities.run, op_request))
+        self.assertEqual(heartbeats[0], ([], {"completed": 1, "total": 2}))
+        self.assertEqual(heartbeats[-1], (["model.proj.stg_orders"],))
+
+    def test_activity_metrics(self, mock_handler):
+        def report_results(env, project, commands, *args, results_callback, **kwargs):
+            results = build_results(0, {"model.proj.orders": "success"})
+            results.outputs["run_results"]["elapsed_time"] = 1.5
+            results_callback(commands, results, 2.0)
+            return results
+
+        mock_handler.side_effect = report_results
+        sink = mock.Mock()
+        activities = DbtActivities(Path(__file__).parent, metrics_sink=sink)
+        asyncio.run(activities.run(op_request))
+        metrics = sink.emit.call_args.args[0]
+        self.assertEqual(metrics.activity, "dbt_run")
+        self.assertEqual(metrics.project, "test")
+        self.assertEqual(metrics.parse_time, 0.5)
+        self.assertEqual(metrics.nodes[0].unique_id, "model.proj.orders")
+
+        # Publishing problems are logged rather than failing the activity
+        sink.emit.side_effect = IOError
+        self.assertTrue(asyncio.run(activities.run(op_request)))
+
+    def test_activity_dbt_plan_shards(self, mock_handler):
+        mock_handler.return_value = DbtResults(0, "", {"manifest": build_manifest})
+        self.assertEqual(dbt_plan_shards("dev", "./test"), ShardPlan([], None))
+        plan = asyncio.run(dbt_activities.plan_shards(op_request, 2))
+        self.assertListEqual(plan.stages, [])
+
+        # Makespans are only predicted, in seconds, from the project's history
+        timed = {"results": [{"unique_id": "model.proj.a", "status": "success"}]}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            history = DurationHistory(str(Path(tmp_dir, "durations.json")))
+            history.update("dev", timed)
+            plan = dbt_plan_shards("dev", "./test", duration_history=history)
+            self.assertIsNone(plan.predicted_makespan)
+            history.update(project_key("./test", "dev"), timed)
+            plan = dbt_plan_shards("dev", "./test", duration_history=history)
+            self.assertEqual(plan.predicted_makespan, 0.0)
+
+    def test_activity_duration_history(self, mock_handler):
+        def report_results(env, project, commands, *args, results_callback, **kwargs):
+            results = build_results(0, {"model.proj.orders": "success"})
+            results.outputs["run_results"]["results"][0]["execution_time"] = 30.0
+            results_callback(commands, results, 31.0)
+            return results
+
+        mock_handler.side_effect = report_results
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            history = DurationHistory(str(Path(tmp_dir, "durations.json")))
+            activities = DbtActivities(Path(__file__).parent, duration_history=history)
+            asyncio.run(activities.run_shard(op_request))
+            key = project_key(str(Path(__file__).parent / "test"), "dev")
+            self.assertDictEqual(history.durations(key), {"model.proj.orders": 30.0})
+            self.assertDictEqual(history.durations("dev"), {})
+
+    def test_activity_dbt_run_shard(self, mock_handler):
+        mock_handler.return_value = build_results(0, {"model.proj.orders": "success"})
+        summary = dbt_run_shard("dev", "./test", select=["orders"])
+        self.assertTrue(summary.success)
+        self.assertEqual(summary.results[0].unique_id, "model.proj.orders")
+        self.assertIn("orders", mock_handler.call_args.args[2])
+
+        shard_request = OperationRequest("dev", "./test", select=["orders"])
+        summary = asyncio.run(dbt_activities.run_shard(shard_request))
+        self.assertEqual(summary.results[0].status, "success")
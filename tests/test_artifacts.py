@@ -0,0 +1,58 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from temporal_dbt_python import artifacts
+from temporal_dbt_python.activities import load_artifact
+from temporal_dbt_python.artifacts import CompressedArtifact
+from temporal_dbt_python.dbt_wrapper import FileCapture
+from temporal_dbt_python.state import StateStore
+
+manifest = {
+    "metadata": {"dbt_version": "1.3.0"},
+    "nodes": {
+        f"model.proj.m{i}": {"name": f"m{i}", "sql": "x" * 100} for i in range(50)
+    },
+    "sources": {},
+}
+
+
+class TestCompressedArtifact(unittest.TestCase):
+    def check_round_trip(self, codec):
+        contents = json.dumps(manifest, indent=2)
+        artifact = CompressedArtifact.from_contents(contents, codec)
+        self.assertEqual(artifact.codec, codec)
+        self.assertEqual(artifact.raw_size, len(contents))
+        self.assertLess(artifact.compressed_size, artifact.raw_size / 4)
+
+        self.assertListEqual(list(artifact.sections), ["metadata", "nodes", "sources"])
+        self.assertDictEqual(artifact.section("nodes"), manifest["nodes"])
+        self.assertDictEqual(
+            artifact.load(["nodes", "missing"]), {"nodes": manifest["nodes"]}
+        )
+        self.assertDictEqual(json.loads(b"".join(artifact.iter_chunks())), manifest)
+
+    def test_gzip(self):
+        self.check_round_trip("gzip")
+
+    @unittest.skipIf(artifacts.zstandard is None, "zstandard not installed")
+    def test_zstd(self):
+        self.check_round_trip("zstd")
+
+    def test_file_capture_compresses_json_only(self):
+        file_capture = FileCapture(compress="gzip")
+        file_capture.write_file("target/manifest.json", json.dumps(manifest))
+        file_capture.write_file("target/run/proj/models/m0.sql", "select 1")
+        self.assertIsInstance(file_capture.buffer["manifest"], CompressedArtifact)
+        self.assertEqual(file_capture.buffer["m0"], "select 1")
+
+        loaded = load_artifact(file_capture.buffer, "./test", "manifest", ["metadata"])
+        self.assertDictEqual(loaded, {"metadata": manifest["metadata"]})
+
+    def test_state_store_streams_compressed_manifest(self):
+        artifact = CompressedArtifact.from_contents(manifest, "gzip")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_dir = StateStore(tmp_dir).save("./proj", "dev", artifact)
+            saved = json.loads(Path(state_dir, "manifest.json").read_text())
+        self.assertDictEqual(saved, manifest)
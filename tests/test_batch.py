@@ -0,0 +1,82 @@
+import asyncio
+import unittest
+
+from temporalio.exceptions import ApplicationError
+
+from temporal_dbt_python.dto import BatchRequest, BatchSummary, OperationRequest
+from temporal_dbt_python.workflow import (
+    DbtBatchRefreshWorkflow,
+    batch_key,
+    batch_ready,
+    duplicate_batch_keys,
+)
+
+depends_on = {"marts": ["staging", "external"]}
+staging_dev = batch_key(OperationRequest("dev", "./projects/staging"))
+keys = {
+    staging_dev,
+    batch_key(OperationRequest("dev", "./projects/marts")),
+    batch_key(OperationRequest("prod", "./projects/marts")),
+}
+
+
+class TestBatch(unittest.TestCase):
+    def test_batch_key(self):
+        key = batch_key(OperationRequest("dev", "./projects/marts"))
+        self.assertRegex(key, r"^marts-[0-9a-f]{8}--dev$")
+        # Same-named projects in other directories get their own keys
+        self.assertNotEqual(key, batch_key(OperationRequest("dev", "./other/marts")))
+
+    def test_batch_ready(self):
+        marts_dev = OperationRequest("dev", "./projects/marts")
+        self.assertIsNone(batch_ready(marts_dev, depends_on, keys, BatchSummary()))
+        self.assertTrue(
+            batch_ready(marts_dev, depends_on, keys, BatchSummary([staging_dev]))
+        )
+        self.assertFalse(
+            batch_ready(marts_dev, depends_on, keys, BatchSummary([], [staging_dev]))
+        )
+
+        # Upstream projects outside of the batch don't hold it up
+        marts_prod = OperationRequest("prod", "./projects/marts")
+        self.assertTrue(batch_ready(marts_prod, depends_on, keys, BatchSummary()))
+
+        # Every same-named upstream in the batch has to succeed
+        other_staging = batch_key(OperationRequest("dev", "./other/staging"))
+        both = keys | {other_staging}
+        self.assertIsNone(
+            batch_ready(marts_dev, depends_on, both, BatchSummary([staging_dev]))
+        )
+        self.assertTrue(
+            batch_ready(
+                marts_dev,
+                depends_on,
+                both,
+                BatchSummary([staging_dev, other_staging]),
+            )
+        )
+
+    def test_duplicate_batch_keys(self):
+        marts_dev = OperationRequest("dev", "./projects/marts")
+        marts_key = batch_key(marts_dev)
+        requests = [marts_dev, OperationRequest("dev", "./projects/marts", threads=2)]
+        self.assertListEqual(
+            duplicate_batch_keys(requests, BatchSummary()), [marts_key]
+        )
+        self.assertListEqual(
+            duplicate_batch_keys([marts_dev], BatchSummary([marts_key])), [marts_key]
+        )
+        self.assertListEqual(
+            duplicate_batch_keys(
+                [marts_dev, OperationRequest("prod", "./projects/marts")],
+                BatchSummary(),
+            ),
+            [],
+        )
+
+        # Rejected before any child, whose ids would clash, is started
+        batch = DbtBatchRefreshWorkflow.configure()()
+        with self.assertRaises(ApplicationError) as ctx:
+            asyncio.run(batch.run(BatchRequest(requests)))
+        self.assertTrue(ctx.exception.non_retryable)
+        self.assertIn(marts_key, str(ctx.exception))
@@ -0,0 +1,40 @@
+import json
+import tempfile
+import unittest
+
+from benchmarks.fake_adapter import install
+from benchmarks.run_benchmarks import regressions
+from benchmarks.synthetic_project import generate_project
+from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+install()
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_synthetic_project_layout(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = generate_project(tmp_dir, models=25, depth=3, tests=False)
+            layers = sorted(project.glob("models/layer_*"))
+            self.assertEqual(len(layers), 3)
+            self.assertEqual(len(list(project.glob("models/*/*.sql"))), 25)
+            self.assertIn("ref('m_001_", (layers[2] / "m_002_0000.sql").read_text())
+            self.assertFalse((project / "models" / "schema.yml").exists())
+
+    def test_build_against_fake_adapter(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = str(generate_project(tmp_dir, models=6, width=3))
+            results = dbt_handler("dev", project, ["build"], project, True)
+            self.assertEqual(results.exit_code, 0, results.log_string)
+            statuses = [
+                result["status"]
+                for result in json.loads(results.outputs["run_results"])["results"]
+            ]
+            self.assertEqual(sorted(statuses), ["pass"] * 6 + ["success"] * 6)
+
+    def test_regressions(self):
+        baseline = [{"models": 100, "parse_cold_s": 1.0, "peak_rss_mb": 100.0}]
+        results = [{"models": 100, "parse_cold_s": 1.1, "peak_rss_mb": 300.0}]
+        self.assertEqual(regressions(results, baseline, 0.2), [])
+        results[0]["parse_cold_s"] = 1.5
+        self.assertEqual(len(regressions(results, baseline, 0.2)), 1)
+        self.assertEqual(regressions(results, [], 0.2), [])
@@ -0,0 +1,65 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from temporal_dbt_python.concurrency import WarehouseSlots, project_key, warehouse_key
+from temporal_dbt_python.exceptions import WorkflowExecutionError
+
+
+class TestWarehouseSlots(unittest.TestCase):
+    def test_warehouse_key(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = Path(tmp_dir, "jaffle_shop")
+            self.assertEqual(warehouse_key(str(project), "dev"), "jaffle_shop--dev")
+
+            project.mkdir()
+            with open(Path(project, "dbt_project.yml"), "w") as f:
+                f.write("name: jaffle_shop\nprofile: snowflake/analytics\n")
+            self.assertEqual(
+                warehouse_key(str(project), "prod"), "snowflake_analytics--prod"
+            )
+
+    def test_project_key(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = Path(tmp_dir, "shop")
+            project.mkdir()
+            with open(Path(project, "dbt_project.yml"), "w") as f:
+                f.write("name: jaffle_shop\nprofile: warehouse\n")
+            key = project_key(str(project), "dev")
+            self.assertRegex(key, r"^warehouse--dev--jaffle_shop-[0-9a-f]{8}$")
+            self.assertNotEqual(key, project_key(str(Path(tmp_dir, "other")), "dev"))
+
+    def test_slots_shared_between_runs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            slots = WarehouseSlots(
+                tmp_dir,
+                {"default": 3, "small--dev": 1},
+                threads_per_run=2,
+                poll_interval=0.01,
+                timeout=0.05,
+            )
+            self.assertEqual(slots.limit("small--dev"), 1)
+            with slots.acquire("warehouse--dev") as first:
+                with slots.acquire("warehouse--dev") as second:
+                    self.assertEqual((first, second), (2, 1))
+                    with self.assertRaises(WorkflowExecutionError):
+                        with slots.acquire("warehouse--dev"):
+                            pass
+                    # Other warehouses have their own slots
+                    self.assertEqual(
+                        slots.run("warehouse--prod", lambda **kw: kw), {"threads": 2}
+                    )
+
+            # Waiting runs proceed once slots are released
+            granted = []
+            waiting = WarehouseSlots(tmp_dir, 1, poll_interval=0.01)
+            with waiting.acquire("small--dev"):
+                waiter = threading.Thread(
+                    target=lambda: granted.append(waiting.run("small--dev", dict))
+                )
+                waiter.start()
+                waiter.join(0.1)
+                self.assertListEqual(granted, [])
+            waiter.join()
+            self.assertListEqual(granted, [{"threads": 1}])
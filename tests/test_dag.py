@@ -0,0 +1,192 @@
+import unittest
+
+from temporal_dbt_python.dag import (
+    balance,
+    connected_components,
+    critical_path_priorities,
+    merge_run_summaries,
+    model_graph,
+    node_selectors,
+    plan_shards,
+    predict_makespan,
+    stage_selectors,
+    summarise_run_results,
+    topological_layers,
+)
+from temporal_dbt_python.dto import NodeResult, RunSummary
+
+
+def make_manifest(edges, extra_nodes=()):
+    """Builds a minimal manifest from (parent, child) model name pairs"""
+    names = {name for edge in edges for name in edge} | set(extra_nodes)
+    nodes = {
+        f"model.proj.{name}": {
+            "name": name,
+            "fqn": ["proj", "staging", name],
+            "resource_type": "model",
+            "depends_on": {
+                "nodes": [f"model.proj.{p}" for p, c in edges if c == name]
+                + ["source.proj.raw.orders"]
+            },
+        }
+        for name in names
+    }
+    nodes["test.proj.unique_a"] = {
+        "name": "unique_a",
+        "resource_type": "test",
+        "depends_on": {"nodes": ["model.proj.a"]},
+    }
+    return {"nodes": nodes}
+
+
+class TestDag(unittest.TestCase):
+    def test_model_graph_keeps_models_only(self):
+        graph = model_graph(make_manifest([("a", "b")]))
+        self.assertDictEqual(
+            graph, {"model.proj.a": set(), "model.proj.b": {"model.proj.a"}}
+        )
+
+    def test_topological_layers(self):
+        graph = {"a": set(), "b": {"a"}, "c": {"a"}, "d": {"b", "c"}}
+        self.assertListEqual(topological_layers(graph), [["a"], ["b", "c"], ["d"]])
+
+        with self.assertRaises(ValueError):
+            topological_layers({"a": {"b"}, "b": {"a"}})
+
+    def test_connected_components(self):
+        graph = {"a": set(), "b": {"a"}, "c": set(), "d": {"c"}, "e": set()}
+        self.assertListEqual(
+            connected_components(graph), [["a", "b"], ["c", "d"], ["e"]]
+        )
+
+    def test_balance(self):
+        bins = balance([["a", "b", "c"], ["d", "e"], ["f"], ["g"]], 2)
+        self.assertListEqual(sorted(len(b) for b in bins), [3, 4])
+        self.assertEqual(len(balance([["a"]], 4)), 1)
+
+    def test_plan_shards_independent_subgraphs(self):
+        manifest = make_manifest([("a", "b"), ("c", "d")], extra_nodes=["e"])
+        stages = plan_shards(manifest, 2)
+        self.assertListEqual(
+            stage_selectors(manifest, stages),
+            [
+                [
+                    ["package:proj,a", "package:proj,b", "package:proj,e"],
+                    ["package:proj,c", "package:proj,d"],
+                ]
+            ],
+        )
+
+    def test_node_selectors_exact(self):
+        def model(package, path):
+            name = path.split("/")[-1][: -len(".sql")]
+            fqn = [package] + path.split("/")[1:-1] + [name]
+            return f"model.{package}.{name}", {
+                "name": name,
+                "fqn": fqn,
+                "original_file_path": path,
+            }
+
+        manifest = {
+            "nodes": dict(
+                [
+                    model("proj", "models/staging/orders.sql"),
+                    model("proj", "models/staging/orders/order_items.sql"),
+                    model("proj", "models/marts.sql"),
+                    model("proj", "models/marts/revenue.sql"),
+                    model("other", "models/orders.sql"),
+                ]
+            )
+        }
+        # A name or FQN alone would also select the sibling directory's models
+        self.assertListEqual(
+            node_selectors(
+                manifest,
+                [
+                    "model.proj.orders",
+                    "model.proj.order_items",
+                    "model.proj.marts",
+                    "model.proj.revenue",
+                    "model.other.orders",
+                ],
+            ),
+            [
+                "package:proj,orders",
+                "package:proj,order_items",
+                "package:proj,proj.marts,file:marts.sql",
+                "package:proj,revenue",
+                "package:other,orders",
+            ],
+        )
+
+    def test_plan_shards_layers(self):
+        manifest = make_manifest([("a", "b"), ("a", "c"), ("b", "d"), ("c", "d")])
+        self.assertListEqual(
+            plan_shards(manifest, 4),
+            [
+                [["model.proj.a"]],
+                [["model.proj.b"], ["model.proj.c"]],
+                [["model.proj.d"]],
+            ],
+        )
+
+    def test_critical_path_priorities(self):
+        graph = {"a": set(), "b": {"a"}, "c": {"a"}, "d": {"b"}}
+        costs = {"a": 1.0, "b": 5.0, "c": 2.0, "d": 1.0}
+        self.assertDictEqual(
+            critical_path_priorities(graph, costs.get),
+            {"a": 7.0, "b": 6.0, "c": 2.0, "d": 1.0},
+        )
+        self.assertEqual(critical_path_priorities(graph)["a"], 3.0)
+
+    def test_plan_shards_orders_long_poles_first(self):
+        manifest = make_manifest([("a", "b"), ("c", "d"), ("d", "e")])
+        costs = {f"model.proj.{n}": c for n, c in zip("abcde", [1, 1, 2, 2, 2])}
+        stages = plan_shards(manifest, 2, costs.get)
+        self.assertListEqual(
+            stages,
+            [
+                [
+                    ["model.proj.c", "model.proj.d", "model.proj.e"],
+                    ["model.proj.a", "model.proj.b"],
+                ]
+            ],
+        )
+        self.assertEqual(predict_makespan(manifest, stages, costs.get), 6.0)
+        self.assertEqual(predict_makespan(manifest, stages, costs.get, threads=4), 6.0)
+
+        layered = make_manifest([("a", "b"), ("a", "c"), ("a", "d")])
+        costs = {"model.proj.a": 1.0, "model.proj.b": 4.0}
+        stages = plan_shards(layered, 1, lambda n: costs.get(n, 1.0))
+        self.assertEqual(
+            predict_makespan(layered, stages, lambda n: costs.get(n, 1.0)), 7.0
+        )
+        self.assertEqual(
+            predict_makespan(layered, stages, lambda n: costs.get(n, 1.0), threads=3),
+            5.0,
+        )
+
+    def test_predict_makespan_same_names_across_packages(self):
+        manifest = make_manifest([("a", "b")])
+        manifest["nodes"]["model.other.a"] = {
+            "name": "a",
+            "resource_type": "model",
+            "depends_on": {"nodes": []},
+        }
+        costs = {"model.proj.a": 1.0, "model.proj.b": 1.0, "model.other.a": 5.0}
+        stages = plan_shards(manifest, 2, costs.get)
+        self.assertEqual(predict_makespan(manifest, stages, costs.get), 5.0)
+
+    def test_merge_run_summaries(self):
+        run_results = {
+            "results": [
+                {"unique_id": "model.proj.a", "status": "success", "execution_time": 1}
+            ]
+        }
+        first = summarise_run_results(run_results)
+        second = RunSummary(False, [NodeResult("model.proj.b", "error", 2.0)])
+        merged = merge_run_summaries([first, second])
+        self.assertFalse(merged.success)
+        self.assertListEqual(
+            [r.unique_id for r in merged.results], ["model.proj.a", "model.proj.b"]
+        )
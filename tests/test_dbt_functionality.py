@@ -1,3 +1,7 @@
+import json
+import os
+import tempfile
+import threading
 import unittest
 from unittest import mock
 
@@ -20,6 +24,30 @@ def mock_invoke_fail(*args, **kwargs):
     return 1
 
 
+def mock_invoke_named(args):
+    import dbt.clients.system as dbt_system
+
+    # Mimic DBT moving into the project mid-call
+    project_dir = args[args.index("--project-dir") + 1]
+    os.chdir(project_dir)
+    print(project_dir)
+    dbt_system.write_file("./run_results.json", {"project": project_dir})
+    return 0
+
+
+def mock_invoke_json(args):
+    print(json.dumps({"msg": "Running with dbt=1.3.0", "data": {}}))
+    print(
+        json.dumps(
+            {
+                "msg": "1 of 1 OK created sql view model dev.orders [OK in 0.10s]",
+                "data": {"node_info": {"unique_id": "model.proj.orders"}},
+            }
+        )
+    )
+    return 0 if args[:2] == ["--log-format", "json"] else 1
+
+
 class TestDbtFunctionality(unittest.TestCase):
     """Some of these are a little silly - waiting on upgraded APIs"""
 
@@ -68,3 +96,103 @@ class TestDbtFunctionality(unittest.TestCase):
         self.assertEqual(results.log_string, "a\nb\n")
         self.assertIn("test", results.outputs)
         self.assertEqual(results.outputs["test"]["test"], "fail")
+
+    @mock.patch("temporal_dbt_python.dbt_wrapper.invoke_dbt", return_value=0)
+    def test_dbt_handler_threads(self, mock_invoke):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        results = dbt_handler("dev", "./test", ["run"], threads=3)
+        self.assertListEqual(mock_invoke.call_args.args[0][-2:], ["--threads", "3"])
+        self.assertEqual(results.threads, 3)
+        results = dbt_handler("dev", "./test", ["deps"], threads=3)
+        self.assertNotIn("--threads", mock_invoke.call_args.args[0])
+        self.assertIsNone(results.threads)
+
+    def test_profile_threads(self):
+        from temporal_dbt_python.dbt_wrapper import profile_threads
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertIsNone(profile_threads("dev", tmp_dir, tmp_dir))
+            with open(os.path.join(tmp_dir, "dbt_project.yml"), "w") as f:
+                f.write("name: proj\nprofile: proj\n")
+            with open(os.path.join(tmp_dir, "profiles.yml"), "w") as f:
+                f.write(
+                    "proj:\n  outputs:\n"
+                    "    dev: {type: postgres, threads: 6}\n"
+                    "    prod: {type: postgres, threads: \"{{ env_var('T') }}\"}\n"
+                )
+            self.assertEqual(profile_threads("dev", tmp_dir, tmp_dir), 6)
+            self.assertIsNone(profile_threads("prod", tmp_dir, tmp_dir))
+            self.assertIsNone(profile_threads("ci", tmp_dir, tmp_dir))
+
+    @mock.patch(
+        "temporal_dbt_python.dbt_wrapper.invoke_dbt", side_effect=mock_invoke_json
+    )
+    def test_dbt_handler_structured_logs(self, mock_invoke):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        results = dbt_handler("dev", "./test", ["run"], structured_logs=True)
+        self.assertEqual(results.exit_code, 0)
+        self.assertTrue(results.log_string.startswith("Running with dbt=1.3.0\n"))
+        self.assertEqual(len(results.events), 1)
+        self.assertEqual(results.events[0].unique_id, "model.proj.orders")
+        self.assertEqual(results.events[0].execution_time, 0.1)
+
+    @mock.patch(
+        "temporal_dbt_python.dbt_wrapper.invoke_dbt", side_effect=mock_invoke_named
+    )
+    def test_dbt_handler_isolates_concurrent_calls(self, mock_invoke):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        cwd = os.getcwd()
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            projects = [os.path.join(tmp_dir, f"proj_{i}") for i in range(4)]
+            for project in projects:
+                os.makedirs(project)
+
+            def call(project):
+                results[project] = dbt_handler(
+                    "dev", project, ["run"], prevent_writes=True
+                )
+
+            threads = [threading.Thread(target=call, args=(p,)) for p in projects]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(os.getcwd(), cwd)
+        for project in projects:
+            self.assertEqual(results[project].log_string, f"{project}\n")
+            outputs = results[project].outputs
+            self.assertEqual(outputs["run_results"]["project"], project)
+
+    def test_output_routed_by_thread(self):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        call_started = threading.Event()
+        bystander_done = threading.Event()
+
+        def bystander():
+            call_started.wait()
+            print("bystander")
+            bystander_done.set()
+
+        def mock_invoke(args):
+            # DBT runs nodes on threads it starts, their output belongs to the call
+            node = threading.Thread(target=print, args=("node",))
+            node.start()
+            node.join()
+            call_started.set()
+            bystander_done.wait(5)
+            return 0
+
+        other = threading.Thread(target=bystander)
+        other.start()
+        with mock.patch(
+            "temporal_dbt_python.dbt_wrapper.invoke_dbt", side_effect=mock_invoke
+        ):
+            results = dbt_handler("dev", "./test", ["run"], prevent_writes=True)
+        other.join()
+        self.assertEqual(results.log_string, "node\n")
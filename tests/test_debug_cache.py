@@ -0,0 +1,58 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from temporal_dbt_python.dbt_wrapper import probe_connection
+from temporal_dbt_python.debug_cache import DebugCache, debug_cache_key
+
+
+class TestDebugCache(unittest.TestCase):
+    def test_checks_expire_after_ttl(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = DebugCache(str(Path(tmp_dir, "debug.json")), ttl=60)
+            self.assertFalse(cache.passed("warehouse--dev--abc"))
+            with mock.patch("time.time", return_value=1000.0):
+                cache.record("warehouse--dev--abc")
+            with mock.patch("time.time", return_value=1059.0):
+                self.assertTrue(cache.passed("warehouse--dev--abc"))
+                self.assertFalse(cache.passed("warehouse--prod--abc"))
+            with mock.patch("time.time", return_value=1061.0):
+                self.assertFalse(cache.passed("warehouse--dev--abc"))
+
+    def test_key_follows_profile_target_and_profiles_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            Path(tmp_dir, "dbt_project.yml").write_text("profile: warehouse\n")
+            Path(tmp_dir, "profiles.yml").write_text("warehouse: {}\n")
+            key = debug_cache_key("dev", tmp_dir, tmp_dir)
+            self.assertTrue(key.startswith("warehouse--dev--"))
+            self.assertEqual(key, debug_cache_key("dev", tmp_dir, tmp_dir))
+            self.assertNotEqual(key, debug_cache_key("prod", tmp_dir, tmp_dir))
+
+            Path(tmp_dir, "profiles.yml").write_text("warehouse: {target: dev}\n")
+            self.assertNotEqual(key, debug_cache_key("dev", tmp_dir, tmp_dir))
+
+    def test_probe_reports_errors(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertIn("No profile", probe_connection("dev", tmp_dir, tmp_dir))
+
+            Path(tmp_dir, "dbt_project.yml").write_text("profile: warehouse\n")
+            Path(tmp_dir, "profiles.yml").write_text(
+                "warehouse:\n"
+                "  target: dev\n"
+                "  outputs:\n"
+                "    dev: {type: not_an_adapter, threads: 1}\n"
+            )
+            self.assertIsNotNone(probe_connection("dev", tmp_dir, tmp_dir))
+            self.assertIn("prod", probe_connection("prod", tmp_dir, tmp_dir))
+
+            # No adapters are installed here, so stand in for the profile
+            with mock.patch(
+                "dbt.config.profile.Profile.from_raw_profiles"
+            ) as from_raw, mock.patch(
+                "dbt.task.debug.DebugTask.attempt_connection", return_value=None
+            ) as attempt:
+                self.assertIsNone(probe_connection("dev", tmp_dir, tmp_dir))
+            self.assertEqual(from_raw.call_args.args[1], "warehouse")
+            self.assertEqual(from_raw.call_args.kwargs["target_override"], "dev")
+            attempt.assert_called_once_with(from_raw.return_value)
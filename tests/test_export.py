@@ -0,0 +1,90 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from temporal_dbt_python.artifacts import CompressedArtifact
+from temporal_dbt_python.export import ArtifactExporter, LocalFileStore, SQLiteStore
+
+outputs = {
+    "manifest": CompressedArtifact.from_contents({"nodes": {"a": 1}}, "gzip"),
+    "run_results": json.dumps({"results": []}),
+}
+
+
+class RecordingStore:
+    """Store that fails a set number of times and tracks concurrency"""
+
+    def __init__(self, failures=0, release=None):
+        self.failures = failures
+        self.release = release
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def put_batch(self, items):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if self.release is not None:
+                self.release.wait(5)
+            with self.lock:
+                if self.failures:
+                    self.failures -= 1
+                    raise IOError("object store unavailable")
+                self.batches.append([name for _, name, _ in items])
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class TestArtifactExporter(unittest.TestCase):
+    def test_callback_returns_before_upload(self):
+        release = threading.Event()
+        store = RecordingStore(release=release)
+        with ArtifactExporter(store, batch_size=2) as exporter:
+            self.assertTrue(exporter("run-1", outputs))
+            self.assertFalse(exporter.flush(timeout=0.1))
+            release.set()
+            self.assertTrue(exporter.flush(timeout=5))
+        self.assertListEqual(store.batches, [["manifest", "run_results"]])
+
+    def test_retries_and_failures(self):
+        store = RecordingStore(failures=1)
+        with ArtifactExporter(store, max_retries=2, backoff=0) as exporter:
+            exporter("run-1", outputs)
+        self.assertEqual(len(store.batches), 1)
+        self.assertListEqual(exporter.failed, [])
+
+        store = RecordingStore(failures=5)
+        with ArtifactExporter(store, max_retries=2, backoff=0) as exporter:
+            exporter("run-1", outputs)
+        self.assertListEqual([name for _, name, _ in exporter.failed], list(outputs))
+
+    def test_bounded_parallelism(self):
+        release = threading.Event()
+        store = RecordingStore(release=release)
+        with ArtifactExporter(store, max_workers=2, batch_size=1) as exporter:
+            for index in range(5):
+                exporter(f"run-{index}", outputs)
+            threading.Timer(0.2, release.set).start()
+        self.assertEqual(len(store.batches), 10)
+        self.assertLessEqual(store.peak, 2)
+
+    def test_local_stores(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_store = LocalFileStore(tmp_dir)
+            sqlite_store = SQLiteStore(str(Path(tmp_dir, "artifacts.db")))
+            for store in (file_store, sqlite_store):
+                with ArtifactExporter(store) as exporter:
+                    exporter("run-1", outputs)
+
+            exported = Path(tmp_dir, "run-1", "manifest").read_bytes()
+            self.assertDictEqual(json.loads(exported), {"nodes": {"a": 1}})
+            self.assertEqual(
+                sqlite_store.get("run-1", "run_results"), b'{"results": []}'
+            )
+            self.assertIsNone(sqlite_store.get("run-2", "run_results"))
@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from temporal_dbt_python.freshness import FreshnessStore, fresh_sources, source_selector
+
+freshness = {
+    "results": [
+        {
+            "unique_id": "source.proj.shop.orders",
+            "status": "pass",
+            "max_loaded_at": "2022-10-02T00:00:00Z",
+        },
+        {
+            "unique_id": "source.proj.shop.customers",
+            "status": "error",
+            "max_loaded_at": "2022-09-01T00:00:00Z",
+        },
+        {"unique_id": "source.proj.crm.accounts", "status": "runtime error"},
+    ]
+}
+
+
+class TestFreshness(unittest.TestCase):
+    def test_source_selector(self):
+        self.assertEqual(
+            source_selector("source.proj.shop.orders"), "source:shop.orders+"
+        )
+
+    def test_fresh_by_threshold(self):
+        self.assertListEqual(
+            fresh_sources(freshness),
+            ["source.proj.crm.accounts", "source.proj.shop.orders"],
+        )
+
+    def test_fresh_since_last_refresh(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = FreshnessStore(str(Path(tmp_dir, "freshness", "sources.json")))
+            self.assertEqual(len(fresh_sources(freshness, store.refreshed("dev"))), 3)
+
+            store.commit(
+                "dev",
+                {
+                    "source.proj.shop.orders": "2022-10-01T00:00:00Z",
+                    "source.proj.shop.customers": "2022-09-01T00:00:00Z",
+                },
+            )
+            self.assertListEqual(
+                fresh_sources(freshness, store.refreshed("dev")),
+                ["source.proj.crm.accounts", "source.proj.shop.orders"],
+            )
+            self.assertDictEqual(store.refreshed("prod"), {})
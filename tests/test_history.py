@@ -0,0 +1,37 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from temporal_dbt_python.history import DurationHistory
+
+
+def run_results(durations, status="success"):
+    return {
+        "results": [
+            {"unique_id": unique_id, "status": status, "execution_time": duration}
+            for unique_id, duration in durations.items()
+        ]
+    }
+
+
+class TestDurationHistory(unittest.TestCase):
+    def test_smoothed_durations_per_target(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            history = DurationHistory(str(Path(tmp_dir, "history", "durations.json")))
+            self.assertEqual(history.estimator("dev")("model.proj.a"), 1.0)
+
+            history.update(
+                "dev", run_results({"model.proj.a": 10.0, "model.proj.b": 2.0})
+            )
+            history.update("dev", run_results({"model.proj.a": 20.0}))
+            history.update("dev", run_results({"model.proj.b": 100.0}, "skipped"))
+            history.update("prod", run_results({"model.proj.a": 60.0}))
+            history.update("dev", None)
+
+            self.assertDictEqual(
+                history.durations("dev"), {"model.proj.a": 15.0, "model.proj.b": 2.0}
+            )
+            estimate = history.estimator("dev")
+            self.assertEqual(estimate("model.proj.a"), 15.0)
+            self.assertEqual(estimate("model.proj.new"), 8.5)  # Median of the rest
+            self.assertEqual(history.estimator("prod")("model.proj.a"), 60.0)
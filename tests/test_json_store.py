@@ -0,0 +1,47 @@
+import multiprocessing
+import tempfile
+import unittest
+from pathlib import Path
+
+from temporal_dbt_python.json_store import JsonStore
+
+
+def _increment(path: str, times: int):
+    store = JsonStore(path)
+    for _ in range(times):
+        with store.transaction() as contents:
+            contents["count"] = contents.get("count", 0) + 1
+
+
+class TestJsonStore(unittest.TestCase):
+    def test_transaction_writes_back(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = JsonStore(str(Path(tmp_dir, "nested", "store.json")))
+            self.assertDictEqual(store.read(), {})
+
+            with store.transaction() as contents:
+                contents["dev"] = {"model.a": 1.0}
+            self.assertDictEqual(store.read(), {"dev": {"model.a": 1.0}})
+
+            # Nothing is written when the block fails
+            with self.assertRaises(RuntimeError):
+                with store.transaction() as contents:
+                    contents.clear()
+                    raise RuntimeError()
+            self.assertDictEqual(store.read(), {"dev": {"model.a": 1.0}})
+
+            Path(store.path).write_text("{not json")
+            self.assertDictEqual(store.read(), {})
+
+    def test_updates_serialised_across_processes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir, "store.json"))
+            processes = [
+                multiprocessing.Process(target=_increment, args=(path, 25))
+                for _ in range(4)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            self.assertDictEqual(JsonStore(path).read(), {"count": 100})
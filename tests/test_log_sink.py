@@ -0,0 +1,131 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from temporal_dbt_python.dto import NodeEvent
+from temporal_dbt_python.log_sink import LogSink, log_tail, parse_node_events
+
+DBT_LINES = [
+    "12:00:00  Running with dbt=1.3.0\n",
+    "12:00:01  1 of 2 START sql view model dev.stg_orders ........ [RUN]\n",
+    "12:00:01  2 of 2 START sql table model dev.orders ........... [RUN]\n",
+    "12:00:02  1 of 2 OK created sql view model dev.stg_orders ... [OK in 0.10s]\n",
+    "12:00:03  2 of 2 ERROR creating sql table model dev.orders .. [ERROR in 0.20s]\n",
+]
+
+JSON_RECORDS = [
+    {
+        "code": "Q033",
+        "data": {
+            "index": 1,
+            "node_info": {"node_status": "executing", "unique_id": "model.proj.orders"},
+            "total": 2,
+        },
+        "msg": "1 of 2 START sql table model dev.orders .... [RUN]",
+        "ts": "2022-11-01T00:00:00Z",
+    },
+    {
+        "code": "Q012",
+        "data": {
+            "execution_time": 1,
+            "index": 1,
+            "node_info": {"node_status": "executing", "unique_id": "model.proj.orders"},
+            "status": "SELECT 42",
+            "total": 2,
+        },
+        "msg": "1 of 2 OK created sql table model dev.orders .... [SELECT 42 in 1.25s]",
+        "ts": "2022-11-01T00:00:01Z",
+    },
+    {
+        "code": "Q035",
+        "data": {
+            "execution_time": 0,
+            "index": 2,
+            "node_info": {"unique_id": "model.proj.revenue"},
+            "status": "error",
+            "total": 2,
+        },
+        "msg": "2 of 2 ERROR creating sql view model dev.revenue .... [ERROR in 0.50s]",
+        "ts": "2022-11-01T00:00:02Z",
+    },
+]
+JSON_LINES = [json.dumps(record) for record in JSON_RECORDS]
+
+
+class TestLogSink(unittest.TestCase):
+    def test_progress_from_node_lines(self):
+        progress = []
+        sink = LogSink(progress_callback=lambda *p: progress.append(p))
+        for line in DBT_LINES:
+            # DBT's writes don't line up with line breaks
+            sink.write(line[:10])
+            sink.write(line[10:])
+        self.assertListEqual(progress, [(1, 2), (2, 2)])
+        self.assertEqual(sink.getvalue(), "".join(DBT_LINES))
+
+    def test_tail_is_bounded(self):
+        sink = LogSink(max_bytes=100)
+        for index in range(100):
+            sink.write(f"line {index}\n")
+        self.assertLessEqual(len(sink.getvalue()), 100)
+        self.assertTrue(sink.getvalue().endswith("line 99\n"))
+        self.assertEqual(log_tail(sink.getvalue(), 2), "line 98\nline 99")
+
+        # Measured in bytes, not characters
+        sink = LogSink(max_bytes=100)
+        for index in range(100):
+            sink.write(f"ligne {index} \u00e9t\u00e9\n")
+        self.assertLessEqual(len(sink.getvalue().encode()), 100)
+
+        # Output with no line breaks is bounded too
+        sink = LogSink(max_bytes=100)
+        for _ in range(100):
+            sink.write("." * 50)
+        sink.write("end")
+        self.assertLessEqual(len(sink.getvalue().encode()), 100)
+        self.assertTrue(sink.getvalue().endswith("...end"))
+
+    def test_spill_file_rotates(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            spill_path = str(Path(tmp_dir, "dbt.log"))
+            sink = LogSink(10, spill_path, spill_max_bytes=50, spill_backups=2)
+            for index in range(30):
+                sink.write(f"line {index}\n")
+            sink.close()
+            self.assertTrue(Path(tmp_dir, "dbt.log.1").exists())
+            self.assertTrue(Path(tmp_dir, "dbt.log.2").exists())
+            self.assertFalse(Path(tmp_dir, "dbt.log.3").exists())
+            self.assertTrue(Path(spill_path).read_text().endswith("line 29\n"))
+
+    def test_parse_node_events(self):
+        events = list(parse_node_events(["not json"] + JSON_LINES))
+        self.assertListEqual(
+            events,
+            [
+                NodeEvent("model.proj.orders", "start", timestamp=events[0].timestamp),
+                NodeEvent(
+                    "model.proj.orders",
+                    "finish",
+                    "success",
+                    events[1].timestamp,
+                    execution_time=1.25,
+                    rows_affected=42,
+                ),
+                NodeEvent(
+                    "model.proj.revenue",
+                    "finish",
+                    "error",
+                    events[2].timestamp,
+                    execution_time=0.5,
+                ),
+            ],
+        )
+
+    def test_structured_sink_keeps_messages(self):
+        progress = []
+        sink = LogSink(progress_callback=lambda *p: progress.append(p), structured=True)
+        sink.write("\n".join(JSON_LINES) + "\n")
+        self.assertEqual(len(sink.events), 3)
+        self.assertListEqual(progress, [(1, 2), (2, 2)])
+        self.assertTrue(sink.getvalue().startswith("1 of 2 START sql table model"))
@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from temporal_dbt_python.manifest_cache import ManifestCache, hash_project_files
+
+
+def make_project(root: str) -> Path:
+    project = Path(root, "proj")
+    Path(project, "models").mkdir(parents=True)
+    Path(project, "dbt_project.yml").write_text("name: proj\n")
+    Path(project, "models", "orders.sql").write_text("select 1 as id\n")
+    return project
+
+
+def mock_invoke_parse(args):
+    """Records whether parse state was present, then leaves fresh state behind"""
+    project = Path(args[args.index("--project-dir") + 1])
+    state_file = Path(project, "target", "partial_parse.msgpack")
+    print("warm" if state_file.exists() else "cold")
+    state_file.parent.mkdir(exist_ok=True)
+    state_file.write_bytes(
+        b"parsed-" + Path(project, "models", "orders.sql").read_bytes()
+    )
+    return 0
+
+
+class TestManifestCache(unittest.TestCase):
+    def test_hash_ignores_target(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = make_project(tmp_dir)
+            fingerprint = hash_project_files(str(project))
+            Path(project, "target").mkdir()
+            Path(project, "target", "manifest.json").write_text("{}")
+            self.assertEqual(fingerprint, hash_project_files(str(project)))
+
+            Path(project, "models", "orders.sql").write_text("select 2 as id\n")
+            self.assertNotEqual(fingerprint, hash_project_files(str(project)))
+
+    @mock.patch(
+        "temporal_dbt_python.dbt_wrapper.invoke_dbt", side_effect=mock_invoke_parse
+    )
+    def test_restores_state_after_clean(self, mock_invoke):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        cache = ManifestCache()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = str(make_project(tmp_dir))
+            first = dbt_handler("dev", project, ["run"], manifest_cache=cache)
+            self.assertEqual(first.log_string, "cold\n")
+
+            Path(project, "target", "partial_parse.msgpack").unlink()  # dbt clean
+            second = dbt_handler("dev", project, ["test"], manifest_cache=cache)
+            self.assertEqual(second.log_string, "warm\n")
+
+            # Other targets keep their own state
+            Path(project, "target", "partial_parse.msgpack").unlink()
+            other = dbt_handler("prod", project, ["run"], manifest_cache=cache)
+            self.assertEqual(other.log_string, "cold\n")
+
+    @mock.patch(
+        "temporal_dbt_python.dbt_wrapper.invoke_dbt", side_effect=mock_invoke_parse
+    )
+    def test_evicts_stale_and_oversized_entries(self, mock_invoke):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        cache = ManifestCache()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = str(make_project(tmp_dir))
+            dbt_handler("dev", project, ["run"], manifest_cache=cache)
+            self.assertIsNotNone(cache.get(project, "dev"))
+
+            Path(project, "models", "orders.sql").write_text("select 2 as id\n")
+            cache.restore(project, "dev")
+            self.assertEqual(cache.size_bytes, 0)
+
+            dbt_handler("dev", project, ["run"], manifest_cache=cache)
+            cache.max_bytes = 1
+            dbt_handler("prod", project, ["run"], manifest_cache=cache)
+            self.assertEqual(cache.size_bytes, 0)
+
+    @mock.patch("temporal_dbt_python.dbt_wrapper.invoke_dbt", return_value=0)
+    def test_skips_non_parsing_commands(self, mock_invoke):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        cache = mock.Mock()
+        dbt_handler("dev", "./test", ["deps"], manifest_cache=cache)
+        cache.restore.assert_not_called()
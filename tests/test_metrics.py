@@ -0,0 +1,93 @@
+import json
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+from unittest import mock
+
+from temporal_dbt_python.dto import ActivityMetrics
+from temporal_dbt_python.metrics import (
+    FileMetricsSink,
+    OpenTelemetryMetricsSink,
+    PrometheusMetricsSink,
+    node_metrics,
+)
+
+run_results = {
+    "elapsed_time": 3.0,
+    "results": [
+        {
+            "unique_id": "model.proj.orders",
+            "status": "success",
+            "execution_time": 2.5,
+            "adapter_response": {"rows_affected": 42, "bytes_processed": 1024},
+        },
+        {"unique_id": "model.proj.revenue", "status": "skipped"},
+    ],
+}
+
+
+def example_metrics():
+    return ActivityMetrics(
+        "dbt_run", "dev", "proj", 0, 5.0, 2.0, 250.0, node_metrics(run_results)
+    )
+
+
+class TestMetrics(unittest.TestCase):
+    def test_node_metrics(self):
+        orders, revenue = node_metrics(run_results)
+        self.assertEqual(orders.execution_time, 2.5)
+        self.assertEqual(orders.rows_affected, 42)
+        self.assertEqual(orders.bytes_processed, 1024)
+        self.assertEqual(revenue.execution_time, 0.0)
+        self.assertIsNone(revenue.rows_affected)
+        self.assertListEqual(node_metrics(None), [])
+
+    def test_file_sink(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir, "metrics", "dbt.jsonl")
+            sink = FileMetricsSink(str(path))
+            sink.emit(example_metrics())
+            sink.emit(example_metrics())
+            lines = path.read_text().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])["nodes"][0]["rows_affected"], 42)
+
+    def test_prometheus_sink(self):
+        sink = PrometheusMetricsSink(port=0)
+        try:
+            failed = example_metrics()
+            failed.nodes[0].status = "error"
+            sink.emit(failed)
+            sink.emit(example_metrics())
+            port = sink.server.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as r:
+                body = r.read().decode()
+        finally:
+            sink.close()
+        self.assertIn("# TYPE dbt_node_execution_seconds gauge", body)
+        self.assertIn(
+            'dbt_node_rows_affected{activity="dbt_run",project="proj",env="dev",'
+            'node="model.proj.orders"} 42',
+            body,
+        )
+        # A node's latest result replaces its earlier one, whatever the status
+        self.assertEqual(body.count('node="model.proj.orders"} 42'), 1)
+        self.assertIn("dbt_process_peak_rss_megabytes", body)
+        self.assertNotIn('node="model.proj.revenue"} None', body)
+
+    def test_open_telemetry_sink(self):
+        meter = mock.Mock()
+        sink = OpenTelemetryMetricsSink(meter)
+        sink.emit(example_metrics())
+        histogram = meter.create_histogram.return_value
+        histogram.record.assert_any_call(
+            42,
+            attributes={
+                "activity": "dbt_run",
+                "project": "proj",
+                "env": "dev",
+                "node": "model.proj.orders",
+                "status": "success",
+            },
+        )
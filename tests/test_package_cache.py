@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from temporal_dbt_python.activities import dbt_deps
+from temporal_dbt_python.dto import DbtResults
+from temporal_dbt_python.package_cache import (
+    PackageCache,
+    package_cache_key,
+    packages_install_path,
+)
+
+PROJECT_YML = "name: proj\nversion: '1.0'\nconfig-version: 2\nprofile: proj\n"
+PACKAGE_YML = "name: local_pkg\nversion: '1.0'\nconfig-version: 2\n"
+
+
+def make_project(root: str) -> str:
+    """Project depending on a local package, which stands in for the hub"""
+    project = Path(root, "proj")
+    local_pkg = Path(root, "local_pkg", "macros")
+    project.mkdir()
+    local_pkg.mkdir(parents=True)
+    Path(project, "dbt_project.yml").write_text(PROJECT_YML)
+    Path(project, "packages.yml").write_text("packages:\n  - local: ../local_pkg\n")
+    Path(local_pkg.parent, "dbt_project.yml").write_text(PACKAGE_YML)
+    Path(local_pkg, "m.sql").write_text("{% macro m() %}1{% endmacro %}\n")
+    return str(project)
+
+
+def mock_deps(env, project_location, *args, **kwargs):
+    """Installs a copy of the package the way `dbt deps` would"""
+    package = Path(packages_install_path(project_location), "local_pkg")
+    package.mkdir(parents=True)
+    Path(package, "dbt_project.yml").write_text(PACKAGE_YML)
+    return DbtResults(0, "", {})
+
+
+class TestPackageCache(unittest.TestCase):
+    def test_cache_key(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = make_project(tmp_dir)
+            key = package_cache_key(project, "1.3.0")
+            self.assertNotEqual(key, package_cache_key(project, "1.4.0"))
+            Path(project, "packages.yml").write_text("packages: []\n")
+            self.assertNotEqual(key, package_cache_key(project, "1.3.0"))
+
+            os.remove(Path(project, "packages.yml"))
+            self.assertIsNone(package_cache_key(project, "1.3.0"))
+
+    @mock.patch("temporal_dbt_python.activities.dbt_handler", side_effect=mock_deps)
+    def test_deps_skips_and_restores(self, mock_handler):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = make_project(tmp_dir)
+            cache = PackageCache(os.path.join(tmp_dir, "cache"))
+            install_path = packages_install_path(project)
+
+            self.assertTrue(dbt_deps("dev", project, package_cache=cache))
+            self.assertEqual(mock_handler.call_count, 1)
+
+            # Unchanged spec, nothing to do
+            self.assertTrue(dbt_deps("dev", project, package_cache=cache))
+            self.assertEqual(mock_handler.call_count, 1)
+
+            # Fresh checkout, restored from the cache
+            for package_file in install_path.rglob("*"):
+                if package_file.is_file():
+                    package_file.unlink()
+            self.assertTrue(dbt_deps("dev", project, package_cache=cache))
+            self.assertEqual(mock_handler.call_count, 1)
+            self.assertTrue(Path(install_path, "local_pkg", "dbt_project.yml").exists())
+
+            # New spec, DBT resolves again
+            Path(project, "packages.yml").write_text("packages: []\n")
+            shutil.rmtree(install_path)
+            self.assertTrue(dbt_deps("dev", project, package_cache=cache))
+            self.assertEqual(mock_handler.call_count, 2)
+
+    def test_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = make_project(tmp_dir)
+            cache = PackageCache(os.path.join(tmp_dir, "cache"), max_entries=1)
+            packages_install_path(project).mkdir()
+            cache.store(project, "first")
+            cache.store(project, "second")
+            self.assertListEqual(os.listdir(cache.cache_dir), ["second"])
+
+    def test_real_deps_with_local_package(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = make_project(tmp_dir)
+            cache = PackageCache(os.path.join(tmp_dir, "cache"))
+            self.assertTrue(dbt_deps("dev", project, package_cache=cache))
+            key = package_cache_key(project)
+            self.assertTrue(Path(cache.cache_dir, key, "local_pkg").exists())
+            self.assertTrue(cache.is_installed(project, key))
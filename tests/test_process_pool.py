@@ -0,0 +1,98 @@
+import os
+import unittest
+from unittest import mock
+
+from temporal_dbt_python.dto import DbtResults
+from temporal_dbt_python.log_sink import DEFAULT_LOG_MAX_BYTES
+from temporal_dbt_python.process_pool import DbtProcessPool
+
+
+def pid_handler(*args, **kwargs):
+    """Stand-in for `dbt_handler` that reports which process served the call"""
+    return DbtResults(0, str(os.getpid()), {"args": list(args)})
+
+
+def progress_handler(progress_callback=None):
+    """Stand-in for `dbt_handler` that reports node progress"""
+    if progress_callback is None:
+        return DbtResults(1, "", {})
+    for completed in (1, 2):
+        progress_callback(completed, 2)
+    return DbtResults(0, "", {})
+
+
+def pid_progress_handler(progress_callback=None):
+    """Stand-in for `dbt_handler` that reports progress and its process"""
+    if progress_callback is not None:
+        progress_callback(1, 1)
+    return DbtResults(0, str(os.getpid()), {})
+
+
+class TestProcessPool(unittest.TestCase):
+    def test_execute_in_subprocess(self):
+        with DbtProcessPool(size=1, preload=(), handler=pid_handler) as pool:
+            results = pool.execute("dev", "/proj", ["run"])
+        self.assertEqual(results.exit_code, 0)
+        self.assertNotEqual(results.log_string, str(os.getpid()))
+        self.assertListEqual(results.outputs["args"], ["dev", "/proj", ["run"]])
+
+    def test_recycle_after_max_runs(self):
+        with DbtProcessPool(
+            size=1, max_runs=2, preload=(), handler=pid_handler
+        ) as pool:
+            pids = [pool.execute().log_string for _ in range(3)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+
+    def test_recycle_after_rss_threshold(self):
+        with DbtProcessPool(
+            size=1, max_rss_mb=0.001, preload=(), handler=pid_handler
+        ) as pool:
+            pids = [pool.execute().log_string for _ in range(2)]
+        self.assertNotEqual(pids[0], pids[1])
+
+    def test_dbt_handler_delegates_to_pool(self):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        pool = mock.Mock()
+        pool.execute.return_value = DbtResults(0, "", {})
+        dbt_handler("dev", "/proj", ["run"], process_pool=pool)
+        pool.execute.assert_called_once_with(
+            "dev",
+            "/proj",
+            ["run"],
+            None,
+            False,
+            progress_callback=None,
+            log_max_bytes=DEFAULT_LOG_MAX_BYTES,
+            log_spill_dir=None,
+            structured_logs=False,
+            compress_artifacts=None,
+            threads=None,
+            profiling=None,
+        )
+
+    def test_progress_relayed_from_subprocess(self):
+        progress = []
+        with DbtProcessPool(size=1, preload=(), handler=progress_handler) as pool:
+            results = pool.execute(progress_callback=lambda *p: progress.append(p))
+            self.assertListEqual(progress, [(1, 2), (2, 2)])
+            self.assertEqual(results.exit_code, 0)
+
+            # Without a callback the handler isn't given one
+            self.assertEqual(pool.execute().exit_code, 1)
+
+    def test_recycle_after_interrupted_call(self):
+        def cancel(*progress):
+            raise RuntimeError("cancelled")
+
+        with DbtProcessPool(size=1, preload=(), handler=pid_progress_handler) as pool:
+            pid = pool.execute().log_string
+            with self.assertRaises(RuntimeError):
+                pool.execute(progress_callback=cancel)
+
+            # The next call gets its own results from a fresh process
+            results = pool.execute(progress_callback=lambda *p: None)
+            self.assertEqual(results.exit_code, 0)
+            self.assertNotEqual(results.log_string, pid)
+            self.assertEqual(pool.execute().exit_code, 0)
@@ -0,0 +1,99 @@
+import json
+import time
+import unittest
+from unittest import mock
+
+from temporal_dbt_python.exceptions import WorkflowExecutionError
+from temporal_dbt_python.profiling import InvocationProfile, node_phases
+
+run_results = {
+    "results": [
+        {
+            "unique_id": "model.proj.orders",
+            "timing": [
+                {
+                    "name": "compile",
+                    "started_at": "2022-11-01T00:00:00.000000Z",
+                    "completed_at": "2022-11-01T00:00:00.500000Z",
+                },
+                {
+                    "name": "execute",
+                    "started_at": "2022-11-01T00:00:00.500000Z",
+                    "completed_at": "2022-11-01T00:00:02.500000Z",
+                },
+            ],
+        },
+        {"unique_id": "model.proj.skipped", "timing": []},
+    ]
+}
+
+
+def mock_invoke_slow(args):
+    import dbt.clients.system as dbt_system
+
+    print("Running with dbt=1.3.0")
+    time.sleep(0.05)
+    dbt_system.write_file("./run_results.json", json.dumps(run_results))
+    return 0
+
+
+class TestProfiling(unittest.TestCase):
+    def test_node_phases(self):
+        self.assertEqual(
+            node_phases(run_results), {"node_compile": 0.5, "node_execute": 2.0}
+        )
+        self.assertEqual(node_phases(None), {})
+
+    def test_unknown_profiler(self):
+        with self.assertRaises(WorkflowExecutionError):
+            InvocationProfile("perf")
+
+    @mock.patch(
+        "temporal_dbt_python.dbt_wrapper.invoke_dbt", side_effect=mock_invoke_slow
+    )
+    def test_sampling_profile(self, mock_invoke):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        results = dbt_handler(
+            "dev", "./test", ["run"], prevent_writes=True, profiling="sampling"
+        )
+        phases = json.loads(results.outputs["profile_phases"])
+        for phase in ("total", "dbt_invocation", "log_capture", "artifact_capture"):
+            self.assertIn(phase, phases)
+        self.assertGreaterEqual(phases["dbt_invocation"], 0.05)
+        self.assertEqual(phases["node_execute"], 2.0)
+
+        speedscope = json.loads(results.outputs["profile"])
+        self.assertEqual(speedscope["name"], "dbt run")
+        self.assertGreater(len(speedscope["profiles"][0]["samples"]), 0)
+        sampled = {frame["name"] for frame in speedscope["shared"]["frames"]}
+        self.assertIn("mock_invoke_slow", sampled)
+        self.assertNotIn("profile_stats", results.outputs)
+
+    @mock.patch(
+        "temporal_dbt_python.dbt_wrapper.invoke_dbt", side_effect=mock_invoke_slow
+    )
+    def test_cprofile_stats(self, mock_invoke):
+        from temporal_dbt_python.dbt_wrapper import dbt_handler
+
+        results_callback = mock.Mock()
+        results = dbt_handler(
+            "dev",
+            "./test",
+            ["run"],
+            prevent_writes=True,
+            results_callback=results_callback,
+            profiling="cprofile",
+        )
+        results_callback.assert_called_once()
+        phases = json.loads(results.outputs["profile_phases"])
+        self.assertIn("results_callback", phases)
+        functions = {
+            row["function"] for row in json.loads(results.outputs["profile_stats"])
+        }
+        self.assertIn("mock_invoke_slow", functions)
+        self.assertNotIn("profile", results.outputs)
+
+        # Unprofiled calls are unchanged
+        results = dbt_handler("dev", "./test", ["run"], prevent_writes=True)
+        self.assertNotIn("profile_phases", results.outputs)
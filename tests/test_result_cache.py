@@ -0,0 +1,90 @@
+import copy
+import tempfile
+import unittest
+from pathlib import Path
+
+from temporal_dbt_python.result_cache import ResultCache, node_fingerprints
+
+manifest = {
+    "nodes": {
+        "model.proj.stg_orders": {
+            "raw_code": "select * from {{ source('shop', 'orders') }}",
+            "config": {"materialized": "view"},
+            "depends_on": {"nodes": ["source.proj.shop.orders"], "macros": []},
+        },
+        "model.proj.orders": {
+            "raw_code": "select {{ cents('amount') }} from {{ ref('stg_orders') }}",
+            "config": {"materialized": "table"},
+            "depends_on": {
+                "nodes": ["model.proj.stg_orders"],
+                "macros": ["macro.proj.cents"],
+            },
+        },
+        "model.proj.calendar": {
+            "raw_code": "select 1",
+            "config": {"materialized": "table"},
+            "depends_on": {"nodes": [], "macros": []},
+        },
+    },
+    "sources": {"source.proj.shop.orders": {"config": {}}},
+    "macros": {"macro.proj.cents": {"macro_sql": "{{ col }} * 100"}},
+}
+
+freshness = {
+    "results": [{"unique_id": "source.proj.shop.orders", "max_loaded_at": "2022-10-01"}]
+}
+
+
+class TestResultCache(unittest.TestCase):
+    def test_node_fingerprints(self):
+        fingerprints = node_fingerprints(manifest, freshness)
+        self.assertEqual(len(set(fingerprints.values())), 3)
+        self.assertEqual(fingerprints, node_fingerprints(manifest, freshness))
+
+        # Without freshness data, nodes reading the source can't be trusted
+        unknown = node_fingerprints(manifest)
+        self.assertIsNone(unknown["model.proj.orders"])
+        self.assertEqual(
+            unknown["model.proj.calendar"], fingerprints["model.proj.calendar"]
+        )
+
+        # Changes propagate downstream, through macros and new source loads
+        edited = copy.deepcopy(manifest)
+        edited["macros"]["macro.proj.cents"]["macro_sql"] = "{{ col }} / 100"
+        changed = node_fingerprints(edited, freshness)
+        self.assertEqual(
+            changed["model.proj.stg_orders"], fingerprints["model.proj.stg_orders"]
+        )
+        self.assertNotEqual(
+            changed["model.proj.orders"], fingerprints["model.proj.orders"]
+        )
+        reloaded = copy.deepcopy(freshness)
+        reloaded["results"][0]["max_loaded_at"] = "2022-10-02"
+        changed = node_fingerprints(manifest, reloaded)
+        self.assertNotEqual(
+            changed["model.proj.orders"], fingerprints["model.proj.orders"]
+        )
+
+    def test_unchanged_after_successful_build(self):
+        fingerprints = node_fingerprints(manifest, freshness)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ResultCache(str(Path(tmp_dir, "cache", "results.json")))
+            self.assertListEqual(cache.unchanged("dev", fingerprints), [])
+
+            cache.record(
+                "dev",
+                fingerprints,
+                [
+                    {"unique_id": "model.proj.stg_orders", "status": "success"},
+                    {"unique_id": "model.proj.orders", "status": "error"},
+                    {"unique_id": "model.proj.calendar", "status": "success"},
+                ],
+            )
+            self.assertListEqual(
+                cache.unchanged("dev", fingerprints),
+                ["model.proj.calendar", "model.proj.stg_orders"],
+            )
+            self.assertListEqual(cache.unchanged("prod", fingerprints), [])
+
+            cache.invalidate("dev")
+            self.assertListEqual(cache.unchanged("dev", fingerprints), [])
@@ -0,0 +1,45 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from temporalio.exceptions import WorkflowAlreadyStartedError
+
+from temporal_dbt_python.dto import OperationRequest
+from temporal_dbt_python.workers import start_single_flight
+from temporal_dbt_python.workflow import DbtSingleFlightWorkflow, single_flight_id
+
+run_params = OperationRequest("dev", "./projects/marts")
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_single_flight_id(self):
+        workflow_id = single_flight_id(run_params)
+        self.assertTrue(workflow_id.startswith("dbt-refresh--marts-"))
+        self.assertTrue(workflow_id.endswith("--dev"))
+        self.assertEqual(
+            workflow_id, single_flight_id(OperationRequest("dev", "./projects/marts"))
+        )
+        self.assertNotEqual(
+            workflow_id, single_flight_id(OperationRequest("dev", "./other/marts"))
+        )
+
+    def test_attach_to_running_refresh(self):
+        client = mock.Mock()
+        client.start_workflow = mock.AsyncMock(
+            side_effect=WorkflowAlreadyStartedError("id", "DbtSingleFlightWorkflow")
+        )
+        handle = asyncio.run(start_single_flight(client, run_params, mode="attach"))
+        client.get_workflow_handle.assert_called_once_with(single_flight_id(run_params))
+        self.assertIs(handle, client.get_workflow_handle.return_value)
+
+    def test_queue_with_signal_with_start(self):
+        client = mock.Mock()
+        client.start_workflow = mock.AsyncMock()
+        asyncio.run(start_single_flight(client, run_params, mode="queue"))
+        client.start_workflow.assert_awaited_once_with(
+            DbtSingleFlightWorkflow.run,
+            id=single_flight_id(run_params),
+            task_queue="dbt-update-operations",
+            start_signal="request",
+            start_signal_args=[run_params],
+        )
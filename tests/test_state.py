@@ -0,0 +1,24 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from temporal_dbt_python.state import StateStore
+
+
+class TestStateStore(unittest.TestCase):
+    def test_latest_and_retention(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = StateStore(tmp_dir, retention=2)
+            self.assertIsNone(store.latest("./proj", "dev"))
+
+            for run_id in ["run-1", "run-2", "run-3"]:
+                store.save("./proj", "dev", {"run": run_id}, run_id)
+            latest = store.latest("./proj", "dev")
+            self.assertTrue(latest.endswith("--run-3"))
+            self.assertTrue(Path(latest, "manifest.json").exists())
+            self.assertEqual(len(list(Path(latest).parent.iterdir())), 2)
+
+            # A later step of the same workflow compares against the previous run
+            previous = store.latest("./proj", "dev", exclude_run_id="run-3")
+            self.assertTrue(previous.endswith("--run-2"))
+            self.assertIsNone(store.latest("./proj", "prod"))
@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from temporal_dbt_python.activities import DbtActivities
+from temporal_dbt_python.dto import OperationRequest
+from temporal_dbt_python.exceptions import WorkflowExecutionError
+from temporal_dbt_python.workers import WorkerGroup, create_worker, host_task_queue
+
+run_params = OperationRequest("dev", "./test")
+
+
+class TestSticky(unittest.TestCase):
+    def test_host_task_queue(self):
+        with mock.patch("socket.gethostname", return_value="worker-1"), mock.patch(
+            "os.getpid", return_value=42
+        ):
+            self.assertEqual(host_task_queue(), "dbt-update-operations--worker-1-42")
+            self.assertEqual(host_task_queue("dbt"), "dbt--worker-1-42")
+
+    def test_claim_worker(self):
+        activity_mgr = DbtActivities(Path(__file__).parent)
+        with self.assertRaises(WorkflowExecutionError):
+            asyncio.run(activity_mgr.claim_worker(run_params))
+        activity_mgr.host_queue = "dbt--worker-1"
+        self.assertEqual(
+            asyncio.run(activity_mgr.claim_worker(run_params)), "dbt--worker-1"
+        )
+
+    @mock.patch("temporal_dbt_python.workers.Worker")
+    def test_create_sticky_worker(self, mock_worker):
+        activity_mgr = DbtActivities(Path(__file__).parent)
+        alert = mock.Mock()
+        worker = create_worker(mock.Mock(), activity_mgr, additional_tasks=[alert])
+        self.assertIs(worker, mock_worker.return_value)
+        self.assertIsNone(activity_mgr.host_queue)
+
+        with mock.patch("socket.gethostname", return_value="worker-1"), mock.patch(
+            "os.getpid", return_value=42
+        ):
+            group = create_worker(
+                mock.Mock(),
+                activity_mgr,
+                sticky=True,
+                additional_tasks=[alert],
+                max_workers=5,
+            )
+        self.assertIsInstance(group, WorkerGroup)
+        shared, host = mock_worker.call_args_list[-2:]
+        self.assertEqual(shared.kwargs["task_queue"], "dbt-update-operations")
+        self.assertIn(alert, shared.kwargs["activities"])
+        self.assertEqual(host.kwargs["task_queue"], activity_mgr.host_queue)
+        self.assertEqual(activity_mgr.host_queue, "dbt-update-operations--worker-1-42")
+        self.assertEqual(shared.kwargs["max_concurrent_activities"], 3)
+        self.assertEqual(host.kwargs["max_concurrent_activities"], 2)
+        self.assertNotIn(alert, host.kwargs["activities"])
+        self.assertIn(activity_mgr.run, host.kwargs["activities"])
+
+    def test_worker_group_runs_all(self):
+        workers = [mock.Mock(run=mock.AsyncMock()), mock.Mock(run=mock.AsyncMock())]
+        asyncio.run(WorkerGroup(workers).run())
+        for worker in workers:
+            worker.run.assert_awaited_once()
+
+    @mock.patch("temporalio.workflow.logger")
+    @mock.patch("temporalio.workflow.execute_activity")
+    def test_step_falls_back_to_shared_queue(self, mock_execute, mock_logger):
+        from temporalio.exceptions import (
+            ActivityError,
+            RetryState,
+            TimeoutError,
+            TimeoutType,
+        )
+
+        from temporal_dbt_python.workflow import DbtRefreshWorkflow
+
+        def timed_out(timeout_type):
+            error = ActivityError(
+                "timed out",
+                scheduled_event_id=1,
+                started_event_id=0,
+                identity="",
+                activity_type="dbt_run",
+                activity_id="1",
+                retry_state=RetryState.TIMEOUT,
+            )
+            error.__cause__ = TimeoutError(
+                "timed out", type=timeout_type, last_heartbeat_details=[]
+            )
+            return error
+
+        activity_mgr = DbtActivities(Path(__file__).parent)
+        refresh = DbtRefreshWorkflow.configure(1, 60, activity_mgr)()
+        refresh._routing = {"task_queue": "dbt--worker-1-42"}
+        mock_execute.side_effect = [timed_out(TimeoutType.SCHEDULE_TO_START), True]
+        self.assertTrue(asyncio.run(refresh._step(activity_mgr.run, run_params)))
+        self.assertEqual(
+            mock_execute.call_args_list[0].kwargs["task_queue"], "dbt--worker-1-42"
+        )
+        self.assertNotIn("task_queue", mock_execute.call_args.kwargs)
+        self.assertDictEqual(refresh._routing, {})
+
+        # Other failures, and timeouts on the shared queue, are raised as they are
+        mock_execute.side_effect = [timed_out(TimeoutType.SCHEDULE_TO_START)]
+        with self.assertRaises(ActivityError):
+            asyncio.run(refresh._step(activity_mgr.run, run_params))
+        refresh._routing = {"task_queue": "dbt--worker-1-42"}
+        mock_execute.side_effect = [timed_out(TimeoutType.START_TO_CLOSE)]
+        with self.assertRaises(ActivityError):
+            asyncio.run(refresh._step(activity_mgr.run, run_params))
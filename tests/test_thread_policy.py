@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from temporal_dbt_python.thread_policy import (
+    AdaptiveThreads,
+    FixedThreads,
+    PerCoreThreads,
+)
+
+
+def run_results(latencies):
+    return {
+        "results": [
+            {"unique_id": unique_id, "status": "success", "execution_time": latency}
+            for unique_id, latency in latencies.items()
+        ]
+    }
+
+
+class TestThreadPolicy(unittest.TestCase):
+    def test_fixed_and_per_core(self):
+        self.assertEqual(FixedThreads(6).threads("warehouse--dev"), 6)
+        with mock.patch("os.cpu_count", return_value=8):
+            self.assertEqual(PerCoreThreads(2).threads("warehouse--dev"), 16)
+            self.assertEqual(PerCoreThreads(2, maximum=12).threads("w--dev"), 12)
+            self.assertEqual(PerCoreThreads(0.1, minimum=2).threads("w--dev"), 2)
+
+    def test_adaptive_backs_off_when_latency_rises(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            policy = AdaptiveThreads(
+                str(Path(tmp_dir, "threads.json")), initial=4, maximum=6
+            )
+            key = "warehouse--dev"
+            self.assertEqual(policy.threads(key), 4)
+
+            policy.observe(key, 4, run_results({"model.a": 2.0, "model.b": 4.0}))
+            self.assertEqual(policy.threads(key), 5)
+            policy.observe(key, 5, run_results({"model.a": 2.2, "model.b": 4.4}))
+            self.assertEqual(policy.threads(key), 6)
+            policy.observe(key, 6, run_results({"model.a": 2.0}))
+            self.assertEqual(policy.threads(key), 6)
+
+            # Queries queueing on the warehouse halve the threads
+            policy.observe(key, 6, run_results({"model.a": 5.0, "model.b": 9.0}))
+            self.assertEqual(policy.threads(key), 3)
+
+            # Calls without timings or a known thread count change nothing
+            policy.observe(key, None, run_results({"model.a": 1.0}))
+            policy.observe(key, 3, {"results": []})
+            self.assertEqual(policy.threads(key), 3)
+            self.assertEqual(policy.threads("warehouse--prod"), 4)